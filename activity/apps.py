@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ActivityConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "activity"
+
+    def ready(self):
+        # Events from posts, jobs and courses feed the activity timelines
+        from . import signals  # noqa: F401
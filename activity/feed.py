@@ -0,0 +1,196 @@
+"""
+Personalized activity feed.
+
+Events are stored once as :class:`~activity.models.Activity` rows. After
+commit a background task pushes their ids (fan-out on write) into a Redis
+sorted set per reader, scored by id and capped at ``FEED_LENGTH``: the
+actor's followers, the actor and the user the event is about. Private
+events (purchases) only reach the actor. Every actor also has an outbox of
+their own public events.
+
+Actors with more than ``FANOUT_LIMIT`` followers are not fanned out; they
+are added to the ``celebrities`` set and their followers pull their outboxes
+at read time (fan-out on read) and merge them in. Either way a page costs a
+bounded number of Redis reads plus one query for the activities themselves.
+
+A timeline holds a ``0`` member once it has been filled from the database.
+Pushes to a timeline that is not ready only collect until its first read
+rebuilds it, under ``WATCH`` like :mod:`jobs.membership`.
+"""
+
+from django.core.cache import cache
+from django.db.models import Q
+from redis.exceptions import WatchError
+
+from buguser.taskqueue import task
+
+from .models import Activity, Follow
+
+FEED_LENGTH = 500
+# Followers above which an actor's events are pulled by readers instead
+FANOUT_LIMIT = 5000
+FANOUT_BATCH = 1000
+# Idle readers' feeds are rebuilt on their next visit
+FEED_TTL = 7 * 24 * 60 * 60
+
+# Events of a newly followed user copied into the follower's feed
+FOLLOW_BACKFILL = 20
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 50
+
+READY = "0"
+CELEBRITIES_KEY = "activity:celebrities"
+
+# Verbs shown to the actor's followers; the rest only reach the recipient
+PUBLIC_VERBS = (
+    Activity.POST_CREATED,
+    Activity.POST_LIKED,
+    Activity.COMMENT_ADDED,
+    Activity.JOB_POSTED,
+)
+# Verbs shown in the actor's own feed only
+PRIVATE_VERBS = (Activity.COURSE_ORDERED,)
+
+
+def feed_key(user_id):
+    return f"activity:feed:{user_id}"
+
+
+def outbox_key(user_id):
+    return f"activity:outbox:{user_id}"
+
+
+def _push(pipe, key, activity_ids):
+    pipe.zadd(key, {activity_id: activity_id for activity_id in activity_ids})
+    # Rank 0 is the READY member, whose score 0 is below every id
+    pipe.zremrangebyrank(key, 1, -(FEED_LENGTH + 2))
+    pipe.expire(key, FEED_TTL)
+
+
+@task(queue="activity")
+def publish(activity_id):
+    """Deliver an activity to the feeds that show it."""
+    activity = Activity.objects.filter(pk=activity_id).only("actor_id", "verb", "recipient_id").first()
+    if activity is None:
+        return
+    client = cache.client.get_client()
+    pipe = client.pipeline(transaction=False)
+    if activity.recipient_id:
+        _push(pipe, feed_key(activity.recipient_id), [activity.id])
+    if activity.verb in PRIVATE_VERBS:
+        _push(pipe, feed_key(activity.actor_id), [activity.id])
+    elif activity.verb in PUBLIC_VERBS:
+        _push(pipe, outbox_key(activity.actor_id), [activity.id])
+        _push(pipe, feed_key(activity.actor_id), [activity.id])
+        followers = Follow.objects.filter(followee_id=activity.actor_id)
+        if followers[:FANOUT_LIMIT + 1].count() > FANOUT_LIMIT:
+            # Sticky, so outbox-only events stay visible if the count drops
+            pipe.sadd(CELEBRITIES_KEY, activity.actor_id)
+        else:
+            for count, follower_id in enumerate(
+                followers.values_list("follower_id", flat=True).iterator(chunk_size=FANOUT_BATCH), 1
+            ):
+                _push(pipe, feed_key(follower_id), [activity.id])
+                if count % FANOUT_BATCH == 0:
+                    pipe.execute()
+    pipe.execute()
+
+
+@task(queue="activity")
+def follow_changed(follower_id, followee_id, following):
+    """
+    Copy the recent public events of a newly followed user into the
+    follower's feed, or drop all of them on unfollow.
+    """
+    client = cache.client.get_client()
+    key = feed_key(follower_id)
+    events = Activity.objects.filter(actor_id=followee_id, verb__in=PUBLIC_VERBS)
+    if following:
+        ids = list(events.order_by("-id").values_list("id", flat=True)[:FOLLOW_BACKFILL])
+        if ids:
+            pipe = client.pipeline(transaction=False)
+            _push(pipe, key, ids)
+            pipe.execute()
+    else:
+        held = [int(member) for member in client.zrange(key, 0, -1) if member != READY.encode()]
+        # The follower's own events about the followee stay
+        ids = list(events.exclude(recipient_id=follower_id).filter(id__in=held).values_list("id", flat=True))
+        if ids:
+            client.zrem(key, *ids)
+
+
+def _rebuild(client, key, events):
+    """Refill timeline ``key`` with the latest ``events`` and return their ids, newest first."""
+    with client.pipeline() as pipe:
+        pipe.watch(key)
+        ids = list(events.order_by("-id").values_list("id", flat=True)[:FEED_LENGTH])
+        try:
+            pipe.multi()
+            pipe.delete(key)
+            pipe.zadd(key, {READY: 0, **{activity_id: activity_id for activity_id in ids}})
+            pipe.expire(key, FEED_TTL)
+            pipe.execute()
+        except WatchError:
+            # Pushed to while we read; the next read rebuilds it again
+            pass
+    return ids
+
+
+def feed_events(user_id):
+    """The activities a rebuilt feed of ``user_id`` holds."""
+    followees = Follow.objects.filter(follower_id=user_id).values("followee_id")
+    return Activity.objects.filter(
+        Q(actor_id__in=followees, verb__in=PUBLIC_VERBS)
+        | Q(actor_id=user_id, verb__in=PUBLIC_VERBS + PRIVATE_VERBS)
+        | Q(recipient_id=user_id)
+    )
+
+
+def _page_ids(client, timelines, before, size):
+    """
+    Ids of up to ``size`` activities below ``before`` from each of
+    ``timelines`` (``[(key, events)]``), rebuilding the ones not ready.
+    """
+    upper = f"({before}" if before else "+inf"
+    pipe = client.pipeline(transaction=False)
+    for key, _ in timelines:
+        pipe.zscore(key, READY)
+        pipe.zrevrangebyscore(key, upper, f"({READY}", start=0, num=size)
+    replies = pipe.execute()
+
+    ids = set()
+    for index, (key, events) in enumerate(timelines):
+        ready, found = replies[2 * index:2 * index + 2]
+        if ready is None:
+            found = _rebuild(client, key, events)
+            if before:
+                found = [activity_id for activity_id in found if activity_id < before]
+        ids.update(int(activity_id) for activity_id in found[:size])
+    return ids
+
+
+def feed_page(user_id, before=None, size=PAGE_SIZE):
+    """
+    ``(activities, next_before)`` of one feed page, newest first.
+    ``next_before`` is ``None`` on the last page.
+    """
+    client = cache.client.get_client()
+    timelines = [(feed_key(user_id), feed_events(user_id))]
+    celebrities = [int(member) for member in client.smembers(CELEBRITIES_KEY)]
+    if celebrities:
+        for followee_id in Follow.objects.filter(follower_id=user_id, followee_id__in=celebrities).values_list(
+            "followee_id", flat=True
+        ):
+            timelines.append(
+                (outbox_key(followee_id), Activity.objects.filter(actor_id=followee_id, verb__in=PUBLIC_VERBS))
+            )
+
+    # One more than the page tells whether there is a next one
+    ids = sorted(_page_ids(client, timelines, before, size + 1), reverse=True)
+    page, has_more = ids[:size], len(ids) > size
+
+    # Rows deleted since they were pushed are skipped
+    rows = Activity.objects.select_related("actor__buguserdetail").in_bulk(page)
+    activities = [rows[activity_id] for activity_id in page if activity_id in rows]
+    return activities, page[-1] if has_more else None
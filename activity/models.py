@@ -1 +1,64 @@
+from django.db import models
+from buguser.models import User
+
 # Create your models here.
+
+
+class Follow(models.Model):
+    follower = models.ForeignKey(User, related_name="following", on_delete=models.CASCADE)
+    followee = models.ForeignKey(User, related_name="followers", on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["follower", "followee"], name="follow_unique_pair"),
+        ]
+        indexes = [
+            # Fan-out walks an actor's followers
+            models.Index(fields=["followee", "follower"], name="follow_followee_idx"),
+        ]
+
+    def __str__(self):
+        return "%s -> %s" % (self.follower.email, self.followee.email)
+
+
+class Activity(models.Model):
+    POST_CREATED = "post_created"
+    POST_LIKED = "post_liked"
+    COMMENT_ADDED = "comment_added"
+    JOB_POSTED = "job_posted"
+    JOB_APPLIED = "job_applied"
+    COURSE_ORDERED = "course_ordered"
+
+    VERB_CHOICES = [
+        (POST_CREATED, "Post created"),
+        (POST_LIKED, "Post liked"),
+        (COMMENT_ADDED, "Comment added"),
+        (JOB_POSTED, "Job posted"),
+        (JOB_APPLIED, "Job applied"),
+        (COURSE_ORDERED, "Course ordered"),
+    ]
+
+    actor = models.ForeignKey(User, related_name="activities", on_delete=models.CASCADE)
+    verb = models.CharField(max_length=20, choices=VERB_CHOICES)
+    # The user the activity is about (owner of the liked post, company of the
+    # job applied to), who gets it whether or not they follow the actor
+    recipient = models.ForeignKey(
+        User, related_name="notifications", null=True, blank=True, on_delete=models.CASCADE
+    )
+    object_type = models.CharField(max_length=20)
+    object_id = models.PositiveIntegerField()
+    # Denormalized summary (titles, names), so a feed page needs no joins
+    data = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["actor", "-id"], name="activity_actor_idx"),
+            models.Index(fields=["recipient", "-id"], name="activity_recipient_idx"),
+            # Activities are deleted with the object they are about
+            models.Index(fields=["object_type", "object_id"], name="activity_object_idx"),
+        ]
+
+    def __str__(self):
+        return "%s %s %s:%s" % (self.actor_id, self.verb, self.object_type, self.object_id)
@@ -0,0 +1,41 @@
+from rest_framework import serializers
+
+from buguser.models import User
+from jobs.serializers import media_url
+
+from .models import Activity
+
+
+class ActorSerializer(serializers.ModelSerializer):
+    first_name = serializers.SerializerMethodField()
+    last_name = serializers.SerializerMethodField()
+    profile_pic_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = ["id", "first_name", "last_name", "profile_pic_url"]
+
+    def detail(self, obj):
+        # Users who never filled in their profile have no detail row
+        return getattr(obj, "buguserdetail", None)
+
+    def get_first_name(self, obj):
+        detail = self.detail(obj)
+        return detail.first_name if detail else None
+
+    def get_last_name(self, obj):
+        detail = self.detail(obj)
+        return detail.last_name if detail else None
+
+    def get_profile_pic_url(self, obj):
+        detail = self.detail(obj)
+        return media_url(detail.profile_pic.name) if detail and detail.profile_pic else None
+
+
+class ActivitySerializer(serializers.ModelSerializer):
+    actor = ActorSerializer(read_only=True)
+
+    class Meta:
+        model = Activity
+        fields = ["id", "actor", "verb", "object_type", "object_id", "data", "created_at"]
+
@@ -0,0 +1,108 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from courses.models import CourseOrder
+from jobs.models import BugJob, JobsApplied
+from posts.models import Comment, Post
+from posts.signals import liked
+
+from .feed import follow_changed, publish
+from .models import Activity, Follow
+
+# Model -> object_type of the activities about its rows
+OBJECT_TYPES = {
+    Post: "post",
+    Comment: "comment",
+    BugJob: "job",
+    JobsApplied: "application",
+    CourseOrder: "order",
+}
+
+
+def record_activity(actor_id, verb, instance, recipient_id=None, **data):
+    """Store an activity in the current transaction and fan it out in the background after commit."""
+    activity = Activity.objects.create(
+        actor_id=actor_id,
+        verb=verb,
+        # Nobody is notified of their own actions
+        recipient_id=recipient_id if recipient_id != actor_id else None,
+        object_type=OBJECT_TYPES[type(instance)],
+        object_id=instance.pk,
+        data=data,
+    )
+    publish.delay(activity.id)
+    return activity
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        record_activity(instance.user_id, Activity.POST_CREATED, instance, title=instance.title)
+
+
+@receiver(post_save, sender=Comment)
+def comment_added(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        owner_id, title = Post.objects.filter(pk=instance.post_id).values_list("user_id", "title").get()
+        record_activity(
+            instance.user_id, Activity.COMMENT_ADDED, instance, owner_id,
+            post_id=instance.post_id, title=title, body=instance.body[:100],
+        )
+
+
+@receiver(post_save, sender=BugJob)
+def job_posted(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and instance.is_active:
+        record_activity(instance.company_id, Activity.JOB_POSTED, instance, title=instance.title)
+
+
+@receiver(post_save, sender=JobsApplied)
+def job_applied(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        company_id, title = BugJob.objects.filter(pk=instance.job_id).values_list("company_id", "title").get()
+        record_activity(
+            instance.user_id, Activity.JOB_APPLIED, instance, company_id, job_id=instance.job_id, title=title
+        )
+
+
+@receiver(post_save, sender=CourseOrder)
+def course_ordered(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        record_activity(
+            instance.user_id, Activity.COURSE_ORDERED, instance,
+            course_id=instance.course_id, name=instance.course.name,
+        )
+
+
+@receiver(liked, sender=Post)
+def post_liked(sender, instance_id, user_id, liked, **kwargs):
+    # Sent after commit, so this runs in its own transaction
+    if liked:
+        post = Post.objects.filter(pk=instance_id).only("user_id", "title").first()
+        if post is not None:
+            record_activity(user_id, Activity.POST_LIKED, post, post.user_id, title=post.title)
+    else:
+        Activity.objects.filter(
+            actor_id=user_id, verb=Activity.POST_LIKED, object_type=OBJECT_TYPES[Post], object_id=instance_id
+        ).delete()
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=BugJob)
+@receiver(post_delete, sender=JobsApplied)
+@receiver(post_delete, sender=CourseOrder)
+def object_deleted(sender, instance, **kwargs):
+    # Feeds still hold the ids; reads skip rows that are gone
+    Activity.objects.filter(object_type=OBJECT_TYPES[sender], object_id=instance.pk).delete()
+
+
+@receiver(post_save, sender=Follow)
+def followed(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        follow_changed.delay(instance.follower_id, instance.followee_id, True)
+
+
+@receiver(post_delete, sender=Follow)
+def unfollowed(sender, instance, **kwargs):
+    follow_changed.delay(instance.follower_id, instance.followee_id, False)
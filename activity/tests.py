@@ -1 +1,164 @@
-# Create your tests here.
+from unittest import mock
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from buguser.models import User, UserCreationMethod, UserType
+from buguser.testing import FakeRedisTestCase
+from courses.models import Category, Course, CourseOrder
+from posts.models import Comment, Post
+
+from .feed import CELEBRITIES_KEY, READY, _rebuild, feed_events, feed_key, feed_page
+from .models import Activity, Follow
+
+
+@override_settings(TASKS_EAGER=True)
+class FeedTests(FakeRedisTestCase):
+    """Events are fanned out on write, pulled from celebrity outboxes on read, and paged by id."""
+
+    @classmethod
+    def setUpTestData(cls):
+        UserCreationMethod.objects.get_or_create(id=1, defaults={"name": "email"})
+        user_type, _ = UserType.objects.get_or_create(id=2, defaults={"name": "candidate"})
+        cls.alice, cls.bob, cls.carol = (
+            User.objects.create_user(f"{name}@example.com", True, user_type, password="secret")
+            for name in ("alice", "bob", "carol")
+        )
+
+    def commit(self, action, *args, **kwargs):
+        """Run ``action`` and the tasks it queues, as a committed request would."""
+        with self.captureOnCommitCallbacks(execute=True):
+            return action(*args, **kwargs)
+
+    def follow(self, follower, followee):
+        return self.commit(Follow.objects.create, follower=follower, followee=followee)
+
+    def post(self, user, title="Hello"):
+        return self.commit(Post.objects.create, user=user, title=title, content="...")
+
+    def feed_ids(self, user, before=None, size=20):
+        activities, next_before = feed_page(user.pk, before, size)
+        return [activity.object_id for activity in activities], next_before
+
+    def held(self, user):
+        return [int(member) for member in self.redis.zrange(feed_key(user.pk), 0, -1) if member != READY.encode()]
+
+    def test_public_events_reach_followers_and_the_actor(self):
+        self.follow(self.alice, self.bob)
+        post = self.post(self.bob)
+
+        self.assertEqual(self.feed_ids(self.alice), ([post.id], None))
+        self.assertEqual(self.feed_ids(self.bob), ([post.id], None))
+        self.assertEqual(self.feed_ids(self.carol), ([], None))
+
+    def test_pushes_land_in_ready_feeds(self):
+        self.follow(self.alice, self.bob)
+        feed_page(self.alice.pk)
+        post = self.post(self.bob)
+
+        activity = Activity.objects.get(object_type="post", object_id=post.id)
+        self.assertEqual(self.held(self.alice), [activity.id])
+
+    def test_course_orders_stay_private(self):
+        self.follow(self.alice, self.bob)
+        category = Category.objects.create(name="Security")
+        course = Course.objects.create(name="Forensics", description="...", price=10, category=category)
+        order = self.commit(CourseOrder.objects.create, user=self.bob, course=course)
+
+        self.assertEqual(self.feed_ids(self.bob), ([order.id], None))
+        self.assertEqual(self.feed_ids(self.alice), ([], None))
+        self.assertFalse(feed_events(self.alice.pk).filter(verb=Activity.COURSE_ORDERED).exists())
+
+    def test_comments_notify_the_post_owner(self):
+        post = self.post(self.alice)
+        comment = self.commit(Comment.objects.create, post=post, user=self.carol, body="Nice")
+
+        ids, _ = self.feed_ids(self.alice)
+        self.assertEqual(ids, [comment.id, post.id])
+
+    def test_celebrities_are_pulled_at_read_time(self):
+        self.follow(self.alice, self.bob)
+        self.follow(self.carol, self.bob)
+        feed_page(self.alice.pk)
+
+        with mock.patch("activity.feed.FANOUT_LIMIT", 1):
+            post = self.post(self.bob)
+
+        self.assertEqual(self.redis.smembers(CELEBRITIES_KEY), {str(self.bob.pk).encode()})
+        self.assertEqual(self.held(self.alice), [])
+        self.assertEqual(self.feed_ids(self.alice), ([post.id], None))
+        self.assertEqual(self.feed_ids(self.carol), ([post.id], None))
+
+    def test_pages_follow_before(self):
+        self.follow(self.alice, self.bob)
+        posts = [self.post(self.bob, f"Post {index}") for index in range(5)]
+        expected = [post.id for post in reversed(posts)]
+
+        seen, before = [], None
+        for _ in range(3):
+            ids, before = self.feed_ids(self.alice, before, size=2)
+            seen.extend(ids)
+        self.assertEqual(seen, expected)
+        self.assertIsNone(before)
+
+        # A rebuild answers the same pages
+        self.redis.delete(feed_key(self.alice.pk))
+        _, before = self.feed_ids(self.alice, size=2)
+        self.assertEqual(self.feed_ids(self.alice, before, size=2)[0], expected[2:4])
+
+    def test_follow_backfills_and_unfollow_removes(self):
+        posts = [self.post(self.bob, f"Post {index}") for index in range(3)]
+        own = self.post(self.alice)
+        feed_page(self.alice.pk)
+        # Bob's comment on Alice's post is hers to keep
+        comment = self.commit(Comment.objects.create, post=own, user=self.bob, body="Nice")
+
+        follow = self.follow(self.alice, self.bob)
+        ids, _ = self.feed_ids(self.alice)
+        self.assertEqual(ids, [comment.id, own.id, *(post.id for post in reversed(posts))])
+
+        self.commit(follow.delete)
+        self.assertEqual(self.feed_ids(self.alice), ([comment.id, own.id], None))
+
+    def test_deleted_objects_drop_out_of_feeds(self):
+        self.follow(self.alice, self.bob)
+        first, second = self.post(self.bob, "First"), self.post(self.bob, "Second")
+        feed_page(self.alice.pk)
+
+        self.commit(second.delete)
+        self.assertFalse(Activity.objects.filter(object_type="post", object_id=second.id).exists())
+        self.assertEqual(self.feed_ids(self.alice), ([first.id], None))
+
+    def test_rebuild_gives_way_to_concurrent_pushes(self):
+        post = self.post(self.bob)
+        key = feed_key(self.alice.pk)
+        events = Activity.objects.all()
+        order_by = events.order_by
+
+        def push_meanwhile(*args):
+            self.redis.zadd(key, {"999": 999})
+            return order_by(*args)
+
+        with mock.patch.object(events, "order_by", side_effect=push_meanwhile):
+            ids = _rebuild(self.redis, key, events)
+
+        activity = Activity.objects.get(object_id=post.id)
+        self.assertEqual(ids, [activity.id])
+        # Left unmarked, so the next read rebuilds it
+        self.assertIsNone(self.redis.zscore(key, READY))
+
+    def test_feed_view_links_the_next_page(self):
+        self.follow(self.alice, self.bob)
+        posts = [self.post(self.bob, f"Post {index}") for index in range(3)]
+        client = APIClient()
+        client.force_authenticate(self.alice)
+
+        response = client.get(reverse("activity-feed"), {"page_size": 2})
+        body = response.json()
+        self.assertEqual([item["object_id"] for item in body["results"]], [posts[2].id, posts[1].id])
+        self.assertIn("before=", body["next"])
+
+        response = client.get(body["next"])
+        self.assertEqual([item["object_id"] for item in response.json()["results"]], [posts[0].id])
+        self.assertIsNone(response.json()["next"])
@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import FeedView, FollowView
+
+urlpatterns = [
+    path("feed/", FeedView.as_view(), name="activity-feed"),
+    path("follow/<int:user_id>/", FollowView.as_view(), name="activity-follow"),
+]
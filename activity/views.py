@@ -1 +1,86 @@
+from django.db import IntegrityError, transaction
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.http import urlencode
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from buguser.models import User
+from buguser.renderers import UserRenderer
+
+from .feed import MAX_PAGE_SIZE, PAGE_SIZE, feed_page
+from .models import Follow
+from .serializers import ActivitySerializer
+
 # Create your views here.
+
+
+def bounded_int(value, default, maximum):
+    try:
+        return min(max(int(value), 1), maximum)
+    except (TypeError, ValueError):
+        return default
+
+
+class FeedView(APIView):
+    renderer_classes = [UserRenderer]
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Retrieve a page of the activity feed of the logged-in user",
+        manual_parameters=[
+            openapi.Parameter(
+                "before", openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                description="Only activities older than this id (from next)",
+            ),
+            openapi.Parameter(
+                "page_size", openapi.IN_QUERY, type=openapi.TYPE_INTEGER, default=PAGE_SIZE,
+                description=f"Activities per page (at most {MAX_PAGE_SIZE})",
+            ),
+        ],
+        responses={200: ActivitySerializer(many=True)},
+    )
+    def get(self, request, format=None):
+        size = bounded_int(request.query_params.get("page_size"), PAGE_SIZE, MAX_PAGE_SIZE)
+        before = bounded_int(request.query_params.get("before"), None, 2 ** 63 - 1)
+        activities, next_before = feed_page(request.user.pk, before, size)
+        next_url = None
+        if next_before is not None:
+            query = urlencode({"before": next_before, "page_size": size})
+            next_url = request.build_absolute_uri(f"{reverse('activity-feed')}?{query}")
+        return Response(
+            {"next": next_url, "results": ActivitySerializer(activities, many=True).data},
+            status=status.HTTP_200_OK,
+        )
+
+
+class FollowView(APIView):
+    renderer_classes = [UserRenderer]
+    permission_classes = [IsAuthenticated]
+
+    def follow_state(self, user_id, following):
+        return {"following": following, "followers": Follow.objects.filter(followee_id=user_id).count()}
+
+    @swagger_auto_schema(
+        operation_summary="Follow a user",
+        responses={201: "Now following", 200: "Already following", 400: "Cannot follow yourself"},
+    )
+    def post(self, request, user_id, format=None):
+        if user_id == request.user.pk:
+            return Response({"error": "You cannot follow yourself"}, status=status.HTTP_400_BAD_REQUEST)
+        get_object_or_404(User, pk=user_id, is_active=True)
+        try:
+            with transaction.atomic():
+                Follow.objects.create(follower=request.user, followee_id=user_id)
+        except IntegrityError:
+            return Response(self.follow_state(user_id, True), status=status.HTTP_200_OK)
+        return Response(self.follow_state(user_id, True), status=status.HTTP_201_CREATED)
+
+    @swagger_auto_schema(operation_summary="Unfollow a user", responses={200: "Not following"})
+    def delete(self, request, user_id, format=None):
+        Follow.objects.filter(follower=request.user, followee_id=user_id).delete()
+        return Response(self.follow_state(user_id, False), status=status.HTTP_200_OK)
@@ -55,6 +55,7 @@ INSTALLED_APPS = [
     "certificate",
     "jobs",
     "vdi",
+    "activity",
 ]
 
 MIDDLEWARE = [
@@ -259,3 +260,18 @@ CACHES = {
         },
     }
 }
+
+# Background tasks (buguser/taskqueue.py): queues and the worker threads
+# ``manage.py run_tasks`` gives each of them
+TASK_QUEUES = {
+    "default": 2,
+    "jobs": 1,  # keeps syncs of the same job in order
+    "activity": 2,
+}
+# Run tasks inline after commit instead of queueing them, for tests and
+# local development without a worker
+TASKS_EAGER = False
+
+# Answer job searches without a title query from an in-process NumPy
+# snapshot of the live jobs (jobs/snapshot.py) instead of Redis
+JOBS_SNAPSHOT_SEARCH = False
@@ -45,6 +45,7 @@ urlpatterns = [
     path("api/courses/", include("courses.urls")),
     path("api/jobs/", include("jobs.urls")),
     path("api/vdi/", include("vdi.urls")),
+    path("api/activity/", include("activity.urls")),
     path(
         "swagger/",
         schema_view.with_ui("swagger", cache_timeout=0),
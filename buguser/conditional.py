@@ -0,0 +1,158 @@
+"""
+Conditional GET support (ETag, Last-Modified and 304) for API views.
+
+Every model registered with :func:`track_versions` has a version stamp in
+Redis that is bumped after each committed save, delete or many-to-many change
+of its rows. A view using :class:`ConditionalGetMixin` lists the models its
+response is built from; its validators are derived from their stamps with one
+``HMGET``, so a request whose ``If-None-Match``/``If-Modified-Since`` still
+matches is answered with 304 right after authentication, before the view
+queries or serializes anything.
+"""
+
+import hashlib
+import logging
+import math
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+logger = logging.getLogger(__name__)
+
+# Hash of model label -> version and "<label>:modified" -> epoch milliseconds
+VERSIONS_KEY = "http:versions"
+
+M2M_ACTIONS = ("post_add", "post_remove", "post_clear")
+
+
+def model_label(model):
+    return model._meta.label_lower
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def bump_versions(*models, pipeline=None):
+    """
+    Mark ``models`` as changed. Versions start from the clock, so stamps
+    handed out before a Redis flush are not reused after it. With
+    ``pipeline`` the commands are only queued, for the caller to execute.
+    """
+    now = _now_ms()
+    pipe = pipeline if pipeline is not None else cache.client.get_client().pipeline(transaction=False)
+    for label in {model_label(model) for model in models}:
+        pipe.hsetnx(VERSIONS_KEY, label, now)
+        pipe.hincrby(VERSIONS_KEY, label, 1)
+        pipe.hset(VERSIONS_KEY, f"{label}:modified", now)
+    if pipeline is None:
+        pipe.execute()
+
+
+def model_versions(models):
+    """``(versions, last_modified)`` of ``models``, ``last_modified`` in epoch seconds."""
+    labels = [model_label(model) for model in models]
+    fields = [*labels, *(f"{label}:modified" for label in labels)]
+    client = cache.client.get_client()
+    values = client.hmget(VERSIONS_KEY, fields)
+    if None in values:
+        # Never changed since Redis was last flushed
+        now = _now_ms()
+        pipe = client.pipeline(transaction=False)
+        for field, value in zip(fields, values):
+            if value is None:
+                pipe.hsetnx(VERSIONS_KEY, field, now)
+        pipe.hmget(VERSIONS_KEY, fields)
+        values = pipe.execute()[-1]
+
+    values = [int(value) for value in values]
+    return values[:len(labels)], max(values[len(labels):]) / 1000
+
+
+def _bump_after_commit(model):
+    def bump():
+        try:
+            bump_versions(model)
+        except Exception:
+            logger.exception("Failed to bump the version of %s", model_label(model))
+
+    transaction.on_commit(bump)
+
+
+def _saved_or_deleted(sender, **kwargs):
+    _bump_after_commit(sender)
+
+
+def _m2m_changed(sender, action, **kwargs):
+    if action in M2M_ACTIONS:
+        _bump_after_commit(sender)
+
+
+def track_versions(*models):
+    """
+    Keep the version stamps of ``models`` current. Pass the ``through``
+    model of a many-to-many field to track additions and removals.
+    """
+    for model in models:
+        label = model_label(model)
+        post_save.connect(_saved_or_deleted, sender=model, dispatch_uid=f"versions:{label}:save")
+        post_delete.connect(_saved_or_deleted, sender=model, dispatch_uid=f"versions:{label}:delete")
+        m2m_changed.connect(_m2m_changed, sender=model, dispatch_uid=f"versions:{label}:m2m")
+
+
+class NotModified(Exception):
+    def __init__(self, response):
+        super().__init__("Not modified")
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """
+    Add ETag and Last-Modified validators to ``GET``/``HEAD`` responses of an
+    ``APIView`` and answer matching conditional requests with 304.
+    ``version_models`` must cover every model the response is built from.
+    """
+
+    version_models = ()
+    # Set when the response differs per user
+    vary_on_user = False
+
+    etag = None
+    last_modified = None
+
+    def get_validators(self, request):
+        versions, modified = model_versions(self.version_models)
+        parts = [request.get_full_path(), *map(str, versions)]
+        if self.vary_on_user:
+            parts.append(str(request.user.pk))
+        etag = '"%s"' % hashlib.md5(":".join(parts).encode("utf-8")).hexdigest()
+        # Last-Modified is rounded up to the whole second, so If-Modified-Since
+        # comparisons line up with the second-resolution HTTP date
+        return etag, math.ceil(modified)
+
+    def initial(self, request, *args, **kwargs):
+        # Authentication and permissions run first
+        super().initial(request, *args, **kwargs)
+        if request.method in ("GET", "HEAD") and self.version_models:
+            self.etag, self.last_modified = self.get_validators(request)
+            response = get_conditional_response(request, etag=self.etag, last_modified=self.last_modified)
+            if response is not None:
+                raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.etag and response.status_code in (200, 304):
+            response["ETag"] = self.etag
+            response["Last-Modified"] = http_date(self.last_modified)
+            if self.vary_on_user:
+                patch_vary_headers(response, ("Authorization",))
+        return response
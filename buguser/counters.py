@@ -0,0 +1,124 @@
+"""
+Denormalized counter columns (likes, comments, reviews).
+
+A counter column caches the number of rows related to its row, so reading it
+costs nothing. :func:`count_m2m` and :func:`count_related` keep a column in
+step with the rows it counts through signals, in the same transaction as the
+change. Additions are atomic ``F()`` increments. Removals recount the affected
+rows, because Django reports every id passed to ``remove()`` whether or not it
+was linked. ``manage.py reconcile_counters`` repairs any drift.
+"""
+
+from collections import namedtuple
+
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+# ``source`` rows point at ``model`` rows through their ``link`` field
+Counter = namedtuple("Counter", ["model", "field", "source", "link"])
+
+COUNTERS = []
+
+
+def related_count(source, link):
+    """Correlated ``COUNT(*)`` of the ``source`` rows whose ``link`` is the outer row."""
+    counts = (
+        source._default_manager.filter(**{link: OuterRef("pk")})
+        .order_by()
+        .values(link)
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    return Coalesce(Subquery(counts), Value(0))
+
+
+def recount(counter, pks=None):
+    """
+    Set ``counter`` to the true count for the rows in ``pks`` (every row when
+    ``None``). Returns the number of rows that were off.
+    """
+    rows = counter.model._default_manager.all()
+    if pks is not None:
+        rows = rows.filter(pk__in=pks)
+    actual = related_count(counter.source, counter.link)
+    return rows.exclude(**{counter.field: actual}).update(**{counter.field: actual})
+
+
+def increment(counter, pks, amount=1):
+    counter.model._default_manager.filter(pk__in=pks).update(**{counter.field: F(counter.field) + amount})
+
+
+def decrement(counter, pks, amount=1):
+    counter.model._default_manager.filter(pk__in=pks).update(
+        **{counter.field: Greatest(F(counter.field) - amount, 0)}
+    )
+
+
+def count_m2m(descriptor, field):
+    """Keep ``field`` equal to the number of links of the many-to-many ``descriptor`` (e.g. ``Post.likes``)."""
+    m2m = descriptor.field
+    counter = Counter(m2m.model, field, m2m.remote_field.through, m2m.m2m_field_name())
+    COUNTERS.append(counter)
+    cleared = f"_{m2m.name}_cleared_{field}"
+
+    def changed(sender, instance, action, reverse, pk_set, **kwargs):
+        # ``reverse`` means ``instance`` is on the other side (the user liking)
+        if action == "post_add" and pk_set:
+            if reverse:
+                increment(counter, pk_set)
+            else:
+                increment(counter, [instance.pk], len(pk_set))
+        elif action == "pre_clear" and reverse:
+            # The rows to recount are gone once the clear has run
+            setattr(instance, cleared, list(
+                counter.source._default_manager.filter(**{m2m.m2m_reverse_field_name(): instance.pk})
+                .values_list(counter.link, flat=True)
+            ))
+        elif action in ("post_remove", "post_clear"):
+            if not reverse:
+                recount(counter, [instance.pk])
+            elif action == "post_remove":
+                recount(counter, pk_set)
+            else:
+                recount(counter, getattr(instance, cleared, []))
+
+    m2m_changed.connect(changed, sender=counter.source, weak=False, dispatch_uid=f"counter:{counter.model._meta.label_lower}.{field}")
+    return counter
+
+
+def count_related(model, field, source, link):
+    """Keep ``model.field`` equal to the number of ``source`` rows pointing at it through ``link``."""
+    counter = Counter(model, field, source, link)
+    COUNTERS.append(counter)
+    attname = source._meta.get_field(link).attname
+    uid = f"counter:{model._meta.label_lower}.{field}"
+
+    def saved(sender, instance, created, raw=False, **kwargs):
+        if created and not raw:
+            increment(counter, [getattr(instance, attname)])
+
+    def deleted(sender, instance, **kwargs):
+        decrement(counter, [getattr(instance, attname)])
+
+    post_save.connect(saved, sender=source, weak=False, dispatch_uid=f"{uid}:save")
+    post_delete.connect(deleted, sender=source, weak=False, dispatch_uid=f"{uid}:delete")
+    return counter
+
+
+class CounterFieldsMixin:
+    """
+    Model mixin: a plain ``save()`` of an existing row leaves the
+    ``counter_fields`` alone, so a stale in-memory value never overwrites
+    increments made since the row was loaded.
+    """
+
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
@@ -0,0 +1,99 @@
+from django.core.management.base import BaseCommand
+from rest_framework.response import Response
+from buguser.renderers import UserRenderer
+import json
+import time
+
+
+def legacy_render(data):
+    """The previous UserRenderer: a str() pass to spot errors, then json.dumps."""
+    if "ErrorDetail" in str(data):
+        return json.dumps({"errors": data})
+    return json.dumps(data)
+
+
+def post_list(count, comments):
+    # Shaped like PostSerializer output
+    return [
+        {
+            "id": index,
+            "title": f"Post {index} about secure django deployments",
+            "content": "Notes on hardening a django api behind a load balancer. " * 8,
+            "image": f"posts/{index}.png",
+            "likes": list(range(index % 40)),
+            "created_at": "2024-10-01T09:30:00.123456Z",
+            "updated_at": "2024-10-02T11:15:00.654321Z",
+            "post_image_url": f"https://bugbear.in/media/posts/{index}.png",
+            "total_comments": comments,
+            "comments": [
+                {
+                    "id": index * comments + number,
+                    "content": "Thanks, this helped with our rollout.",
+                    "created_at": "2024-10-03T08:00:00.000000Z",
+                    "user": {"id": number, "email": f"user{number}@example.com", "name": f"User {number}"},
+                }
+                for number in range(comments)
+            ],
+        }
+        for index in range(count)
+    ]
+
+
+def course_list(count, modules):
+    # Shaped like CourseSerializer output
+    return [
+        {
+            "id": index,
+            "name": f"Web application security {index}",
+            "description": "Hands-on course covering the OWASP top ten. " * 6,
+            "price": 499.0 + index,
+            "image": f"https://bugbear.in/media/courses/{index}.png",
+            "date_created": "2024-09-01T10:00:00.000000Z",
+            "category": {"id": index % 5, "name": "Security"},
+            "likes": index % 120,
+            "reviews": index % 30,
+            "modules": [
+                {
+                    "id": index * modules + number,
+                    "course": index,
+                    "title": f"Module {number}",
+                    "description": "Lecture, lab and quiz.",
+                    "video_url": f"https://videos.bugbear.in/{index}/{number}",
+                    "date_created": "2024-09-02T10:00:00.000000Z",
+                }
+                for number in range(modules)
+            ],
+        }
+        for index in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = "Compare the previous and the current UserRenderer on large post and course lists"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--items", type=int, default=2000, help="Posts and courses per list")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement, the best is kept")
+
+    def handle(self, *args, **options):
+        count = max(options["items"], 1)
+        repeat = max(options["repeat"], 1)
+        renderer = UserRenderer()
+        context = {"response": Response(status=200)}
+
+        self.stdout.write(f"{count} items per list, best of {repeat} runs")
+        for label, data in (("posts", post_list(count, 5)), ("courses", course_list(count, 8))):
+            legacy = min(self.timed(lambda: legacy_render(data)) for _ in range(repeat))
+            current = min(self.timed(lambda: renderer.render(data, renderer_context=context)) for _ in range(repeat))
+            size = len(renderer.render(data, renderer_context=context))
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{label:<8} {size / 1024:9.1f} KiB  legacy {legacy * 1000:8.2f} ms  "
+                    f"current {current * 1000:8.2f} ms  ({legacy / current:.1f}x)"
+                )
+            )
+
+    def timed(self, func):
+        started = time.perf_counter()
+        func()
+        return time.perf_counter() - started
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from buguser.counters import COUNTERS, recount, related_count
+import time
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized like/comment/review counters and fix rows that drifted"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many rows are off",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        total = 0
+        for counter in COUNTERS:
+            label = f"{counter.model._meta.label}.{counter.field}"
+            if options["dry_run"]:
+                drifted = counter.model._default_manager.exclude(
+                    **{counter.field: related_count(counter.source, counter.link)}
+                ).count()
+            else:
+                # One UPDATE per counter, only touching rows that are off
+                with transaction.atomic():
+                    drifted = recount(counter)
+            total += drifted
+            self.stdout.write(f"{label:<40} {drifted} rows {'off' if options['dry_run'] else 'fixed'}")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"{total} rows across {len(COUNTERS)} counters in {time.monotonic() - started:.2f}s")
+        )
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import autodiscover_modules
+from buguser.taskqueue import TASKS, Worker
+import signal
+
+
+def parse_queues(values):
+    """``["activity:2", "default"]`` -> ``{"activity": 2, "default": 1}``"""
+    queues = {}
+    for value in values:
+        name, _, concurrency = value.partition(":")
+        try:
+            queues[name] = max(int(concurrency or 1), 1)
+        except ValueError:
+            raise CommandError(f"Invalid queue {value!r}, expected name[:threads]")
+    return queues
+
+
+class Command(BaseCommand):
+    help = "Run background tasks from the Redis task queues"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--queue",
+            action="append",
+            default=[],
+            help="Queue to work as name[:threads], repeatable (default: settings.TASK_QUEUES)",
+        )
+
+    def handle(self, *args, **options):
+        # Registers the tasks of every app
+        autodiscover_modules("tasks")
+        queues = parse_queues(options["queue"]) if options["queue"] else dict(settings.TASK_QUEUES)
+
+        worker = Worker(queues)
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: worker.stop())
+
+        self.stdout.write(
+            f"Running {len(TASKS)} tasks from " + ", ".join(f"{name} ({threads})" for name, threads in queues.items())
+        )
+        worker.run()
+        self.stdout.write(self.style.SUCCESS("Stopped"))
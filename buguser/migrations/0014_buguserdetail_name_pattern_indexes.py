@@ -0,0 +1,38 @@
+from django.db import migrations
+
+# Back the applicant name prefix search of jobs/applicants.py, which matches
+# UPPER(name) LIKE 'PREFIX%'. Under a non-C collation a btree index only
+# serves that with the pattern operator class, which only PostgreSQL has, so
+# the indexes are not part of the model state
+PATTERN_INDEXES = {
+    "buguserdetail_first_pattern_idx": "first_name",
+    "buguserdetail_last_pattern_idx": "last_name",
+}
+
+
+def create_pattern_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    table = apps.get_model("buguser", "BugUserDetail")._meta.db_table
+    for name, column in PATTERN_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" (UPPER("{column}") varchar_pattern_ops)'
+        )
+
+
+def drop_pattern_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in PATTERN_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("buguser", "0013_bugorganizationdetail_company_logo"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_pattern_indexes, drop_pattern_indexes),
+    ]
@@ -1,15 +1,40 @@
 from rest_framework import renderers
-import json
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.utils.encoders import JSONEncoder
+import orjson
+
+# Types orjson has no native support for (Decimal, lazy strings, timedelta,
+# querysets, ...) go through DRF's encoder
+_fallback = JSONEncoder()
+
+OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+
+def contains_error(data):
+    """Whether ``data`` holds any ``ErrorDetail``, i.e. is a DRF error payload."""
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, ErrorDetail):
+            return True
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
 
 
 class UserRenderer(renderers.JSONRenderer):
     charset = "utf-8"
 
     def render(self, data, accepted_media_type=None, renderer_context=None):
-        response = ""
-        if "ErrorDetail" in str(data):
-            response = json.dumps({"errors": data})
-        else:
-            response = json.dumps(data)
+        if data is None:
+            return b""
+
+        # Only error responses can carry ErrorDetail, so successful bodies
+        # are never walked
+        response = (renderer_context or {}).get("response")
+        if (response is None or response.status_code >= 400) and contains_error(data):
+            data = {"errors": data}
 
-        return response
+        return orjson.dumps(data, default=_fallback.default, option=OPTIONS)
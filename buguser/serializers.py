@@ -253,7 +253,6 @@ class PostUserSerializer(serializers.ModelSerializer):
         fields = ["id", "first_name", "last_name", "profile_pic_url"]
 
     def get_first_name(self, obj):
-        print(obj.buguserdetail)
         return obj.buguserdetail.first_name
 
     def get_last_name(self, obj):
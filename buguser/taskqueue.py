@@ -0,0 +1,296 @@
+"""
+Redis-backed background tasks.
+
+Functions decorated with :func:`task` are queued with ``.delay()`` or
+``.schedule()`` and run by ``manage.py run_tasks``, which works every queue
+with its own number of threads. Pushes wait for the current transaction to
+commit, so a task never sees data that was rolled back or not yet written.
+
+* Arguments are stored as JSON; pass ids, not model instances.
+* A failing task is retried ``max_retries`` times with exponential backoff
+  and then kept in the ``tasks:failed`` list.
+* ``key`` makes a push idempotent: another push with the same key within
+  ``unique_for`` seconds is dropped.
+* ``eta``/``countdown`` delay a task; delayed tasks wait in a sorted set
+  until the worker moves them to their queue.
+* Tasks are delivered at least once. A task still running after
+  ``VISIBILITY_TIMEOUT`` is assumed lost with its worker and queued again.
+
+With ``TASKS_EAGER`` set, tasks run inline after commit instead (tests,
+local development without a worker); failures are logged, not raised.
+Delayed tasks are skipped there: running them at once would turn a
+self-rescheduling poll into a loop inside the request.
+
+Tasks must be registered in every process that queues or runs them: define
+them in an app's ``tasks`` module (the worker imports those) or in a module
+imported while the apps load.
+"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from redis.exceptions import WatchError
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+DEFAULT_QUEUE = "default"
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF = 10
+MAX_BACKOFF = 60 * 60
+UNIQUE_FOR = 24 * 60 * 60
+
+VISIBILITY_TIMEOUT = 15 * 60
+# Failed tasks are kept for inspection this long
+FAILED_TTL = 7 * 24 * 60 * 60
+FAILED_LENGTH = 1000
+
+PROMOTE_BATCH = 100
+POLL_TIMEOUT = 1
+
+SCHEDULED_KEY = "tasks:scheduled"
+FAILED_KEY = "tasks:failed"
+
+
+def task_key(task_id):
+    return f"tasks:task:{task_id}"
+
+
+def queue_key(queue):
+    return f"tasks:queue:{queue}"
+
+
+def processing_key(queue):
+    return f"tasks:processing:{queue}"
+
+
+def unique_key(key):
+    return f"tasks:unique:{key}"
+
+
+class Task:
+    def __init__(self, func, queue, max_retries, backoff):
+        self.func = func
+        self.name = f"{func.__module__}.{func.__qualname__}"
+        self.queue = queue
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def __repr__(self):
+        return f"<Task {self.name}>"
+
+    def delay(self, *args, **kwargs):
+        return self.schedule(args, kwargs)
+
+    def schedule(self, args=(), kwargs=None, key=None, eta=None, countdown=None, unique_for=UNIQUE_FOR):
+        """
+        Queue a run once the current transaction commits and return its id.
+        ``eta`` is a datetime, ``countdown`` a number of seconds.
+        """
+        kwargs = kwargs or {}
+        task_id = uuid.uuid4().hex
+        if settings.TASKS_EAGER:
+            if eta is not None or countdown:
+                logger.debug("Skipped delayed task %s, eager mode has no schedule", self.name)
+                return task_id
+            transaction.on_commit(lambda: self.func(*args, **kwargs), robust=True)
+            return task_id
+
+        run_at = time.time()
+        if eta is not None:
+            run_at = eta.timestamp() if isinstance(eta, datetime) else float(eta)
+        elif countdown:
+            run_at += countdown
+        payload = {
+            "name": self.name,
+            "queue": self.queue,
+            "args": json.dumps(list(args)),
+            "kwargs": json.dumps(kwargs),
+            "attempts": 0,
+        }
+        # robust: a failure is logged, the committed request still succeeds
+        transaction.on_commit(lambda: push(task_id, payload, run_at, key, unique_for), robust=True)
+        return task_id
+
+
+def task(func=None, queue=DEFAULT_QUEUE, max_retries=DEFAULT_MAX_RETRIES, backoff=DEFAULT_BACKOFF):
+    """Register ``func`` as a background task; usable with or without arguments."""
+
+    def register(func):
+        registered = Task(func, queue, max_retries, backoff)
+        TASKS[registered.name] = registered
+        return registered
+
+    return register(func) if func is not None else register
+
+
+def push(task_id, payload, run_at, key=None, unique_for=UNIQUE_FOR):
+    client = cache.client.get_client()
+    if key is not None and not client.set(unique_key(key), task_id, nx=True, ex=unique_for):
+        logger.debug("Dropped task %s, key %s was queued already", payload["name"], key)
+        return False
+
+    pipe = client.pipeline()
+    pipe.hset(task_key(task_id), mapping=payload)
+    if run_at > time.time():
+        pipe.zadd(SCHEDULED_KEY, {f"{payload['queue']}|{task_id}": run_at})
+    else:
+        pipe.lpush(queue_key(payload["queue"]), task_id)
+    pipe.execute()
+    return True
+
+
+def backoff_delay(task, attempts):
+    return min(task.backoff * 2 ** (attempts - 1), MAX_BACKOFF)
+
+
+def run_task(client, task_id):
+    """Run one queued task, then schedule its retry or record its failure."""
+    key = task_key(task_id)
+    data = {field.decode(): value.decode() for field, value in client.hgetall(key).items()}
+    if not data:
+        # Finished already; requeued by a recovery that raced its worker
+        return
+    task = TASKS.get(data["name"])
+    if task is None:
+        logger.error("Unknown task %s (%s)", data["name"], task_id)
+        _fail(client, task_id)
+        return
+
+    client.hset(key, "started", time.time())
+    close_old_connections()
+    try:
+        task.func(*json.loads(data["args"]), **json.loads(data["kwargs"]))
+    except Exception:
+        attempts = int(data["attempts"]) + 1
+        if attempts > task.max_retries:
+            logger.exception("Task %s (%s) failed after %s attempts", task.name, task_id, attempts)
+            _fail(client, task_id)
+        else:
+            delay = backoff_delay(task, attempts)
+            logger.warning("Task %s (%s) failed, retrying in %ss", task.name, task_id, delay, exc_info=True)
+            pipe = client.pipeline()
+            pipe.hset(key, mapping={"attempts": attempts, "started": ""})
+            pipe.zadd(SCHEDULED_KEY, {f"{task.queue}|{task_id}": time.time() + delay})
+            pipe.execute()
+    else:
+        client.delete(key)
+    finally:
+        close_old_connections()
+
+
+def _fail(client, task_id):
+    pipe = client.pipeline()
+    pipe.lpush(FAILED_KEY, task_id)
+    pipe.ltrim(FAILED_KEY, 0, FAILED_LENGTH - 1)
+    pipe.expire(task_key(task_id), FAILED_TTL)
+    pipe.execute()
+
+
+def promote_due(client):
+    """Move the delayed tasks that are due onto their queues; returns how many."""
+    with client.pipeline() as pipe:
+        try:
+            pipe.watch(SCHEDULED_KEY)
+            due = pipe.zrangebyscore(SCHEDULED_KEY, "-inf", time.time(), start=0, num=PROMOTE_BATCH)
+            if not due:
+                return 0
+            pipe.multi()
+            pipe.zrem(SCHEDULED_KEY, *due)
+            for member in due:
+                queue, task_id = member.decode().split("|", 1)
+                pipe.lpush(queue_key(queue), task_id)
+            pipe.execute()
+        except WatchError:
+            # Another worker promoted them
+            return 0
+    return len(due)
+
+
+def recover_stale(client, queue):
+    """Queue again the tasks of ``queue`` whose worker stopped while running them."""
+    held = client.lrange(processing_key(queue), 0, -1)
+    if not held:
+        return 0
+    pipe = client.pipeline(transaction=False)
+    for task_id in held:
+        pipe.hget(task_key(task_id.decode()), "started")
+    started = pipe.execute()
+
+    now = time.time()
+    pipe = client.pipeline()
+    recovered = 0
+    for task_id, started_at in zip(held, started):
+        # A task that has not started yet was only just taken
+        if started_at and now - float(started_at) > VISIBILITY_TIMEOUT:
+            pipe.lrem(processing_key(queue), 1, task_id)
+            pipe.lpush(queue_key(queue), task_id)
+            recovered += 1
+    if recovered:
+        pipe.execute()
+    return recovered
+
+
+class Worker:
+    """Consume ``queues`` (``{name: threads}``) until :meth:`stop` is called."""
+
+    def __init__(self, queues):
+        self.queues = queues
+        self.stopping = threading.Event()
+
+    def stop(self):
+        self.stopping.set()
+
+    def consume(self, queue):
+        client = cache.client.get_client()
+        while not self.stopping.is_set():
+            try:
+                task_id = client.blmove(queue_key(queue), processing_key(queue), POLL_TIMEOUT, "RIGHT", "LEFT")
+            except Exception:
+                logger.exception("Failed to take a task from queue %s", queue)
+                self.stopping.wait(POLL_TIMEOUT)
+                continue
+            if task_id is None:
+                continue
+            try:
+                run_task(client, task_id.decode())
+            finally:
+                client.lrem(processing_key(queue), 1, task_id)
+
+    def maintain(self, interval=1):
+        client = cache.client.get_client()
+        last_recovery = 0
+        while not self.stopping.is_set():
+            try:
+                while promote_due(client) == PROMOTE_BATCH:
+                    pass
+                if time.monotonic() - last_recovery > VISIBILITY_TIMEOUT / 10:
+                    last_recovery = time.monotonic()
+                    for queue in self.queues:
+                        recover_stale(client, queue)
+            except Exception:
+                logger.exception("Task scheduler failed")
+            self.stopping.wait(interval)
+
+    def run(self):
+        threads = [threading.Thread(target=self.maintain, name="tasks-scheduler", daemon=True)]
+        for queue, concurrency in self.queues.items():
+            threads.extend(
+                threading.Thread(target=self.consume, args=(queue,), name=f"tasks-{queue}-{number}", daemon=True)
+                for number in range(concurrency)
+            )
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
@@ -0,0 +1,26 @@
+"""Background tasks of the user app, run by ``manage.py run_tasks``."""
+
+import os
+
+from django.conf import settings
+from django.core.files import File
+
+from .models import BugOrganizationDetail, BugUserDetail, User
+from .taskqueue import task
+
+DEFAULT_PROFILE_PIC = os.path.join(settings.BASE_DIR, "static", "img", "default.jpeg")
+
+
+@task
+def attach_default_profile_pic(user_id):
+    """Give a new user's empty profile the default picture."""
+    user = User.objects.filter(pk=user_id).first()
+    if user is None:
+        return
+    model = BugOrganizationDetail if user.user_type_id == 3 else BugUserDetail
+    profile = model.objects.filter(user=user).first()
+    # Retried or late: keep a picture the user uploaded meanwhile
+    if profile is None or profile.profile_pic:
+        return
+    with open(DEFAULT_PROFILE_PIC, "rb") as f:
+        profile.profile_pic.save("default.jpg", File(f), save=True)
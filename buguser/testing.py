@@ -0,0 +1,27 @@
+"""Test helpers shared by the apps."""
+
+import fakeredis
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+# The production cache backend, talking to an in-process Redis
+FAKE_REDIS_CACHES = {
+    "default": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": "redis://127.0.0.1:6379/1",
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            "CONNECTION_POOL_KWARGS": {"connection_class": fakeredis.FakeConnection},
+        },
+    }
+}
+
+
+@override_settings(CACHES=FAKE_REDIS_CACHES, TASKS_EAGER=False)
+class FakeRedisTestCase(TestCase):
+    """``TestCase`` whose cache is an empty fakeredis server; ``self.redis`` is its raw client."""
+
+    def setUp(self):
+        super().setUp()
+        self.redis = cache.client.get_client()
+        self.redis.flushall()
@@ -1 +1,125 @@
-# Create your tests here.
+import json
+import time
+from unittest import mock
+
+from django.test import override_settings
+
+from .taskqueue import (
+    FAILED_KEY,
+    SCHEDULED_KEY,
+    backoff_delay,
+    promote_due,
+    queue_key,
+    run_task,
+    task,
+    task_key,
+)
+from .testing import FakeRedisTestCase
+
+calls = []
+
+
+@task(queue="tests")
+def record(value):
+    calls.append(value)
+
+
+@task(queue="tests", max_retries=2, backoff=5)
+def explode():
+    raise ValueError("boom")
+
+
+class TaskQueueTests(FakeRedisTestCase):
+    """Pushes wait for commit, are deduplicated by key, delayed, retried and finally parked as failed."""
+
+    def setUp(self):
+        super().setUp()
+        calls.clear()
+
+    def queued(self, queue="tests"):
+        return [task_id.decode() for task_id in self.redis.lrange(queue_key(queue), 0, -1)]
+
+    def test_push_waits_for_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task_id = record.delay(1)
+            self.assertEqual(self.queued(), [])
+
+        self.assertEqual(self.queued(), [task_id])
+        payload = self.redis.hgetall(task_key(task_id))
+        self.assertEqual(json.loads(payload[b"args"]), [1])
+
+        run_task(self.redis, task_id)
+        self.assertEqual(calls, [1])
+        self.assertFalse(self.redis.exists(task_key(task_id)))
+
+    def test_unique_key_drops_repeated_pushes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = record.schedule([1], key="once")
+            record.schedule([2], key="once")
+            other = record.schedule([3], key="other")
+
+        self.assertEqual(self.queued(), [other, first])
+
+    def test_unique_key_expires(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            record.schedule([1], key="once", unique_for=30)
+        self.assertLessEqual(self.redis.ttl("tasks:unique:once"), 30)
+
+    def test_countdown_waits_in_the_schedule(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task_id = record.schedule([1], countdown=60)
+
+        self.assertEqual(self.queued(), [])
+        self.assertEqual(promote_due(self.redis), 0)
+
+        with mock.patch("buguser.taskqueue.time.time", return_value=time.time() + 61):
+            self.assertEqual(promote_due(self.redis), 1)
+        self.assertEqual(self.queued(), [task_id])
+        self.assertEqual(self.redis.zcard(SCHEDULED_KEY), 0)
+
+    def test_past_eta_is_queued_at_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task_id = record.schedule([1], eta=time.time() - 1)
+        self.assertEqual(self.queued(), [task_id])
+
+    def test_failures_back_off_then_park_the_task(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task_id = explode.delay()
+
+        for attempt in range(1, explode.max_retries + 1):
+            before = time.time()
+            with self.assertLogs("buguser.taskqueue", "WARNING"):
+                run_task(self.redis, task_id)
+            retry_at = self.redis.zscore(SCHEDULED_KEY, f"tests|{task_id}")
+            self.assertGreaterEqual(retry_at, before + backoff_delay(explode, attempt))
+            self.assertEqual(self.redis.hget(task_key(task_id), "attempts"), str(attempt).encode())
+            self.redis.zrem(SCHEDULED_KEY, f"tests|{task_id}")
+
+        with self.assertLogs("buguser.taskqueue", "ERROR"):
+            run_task(self.redis, task_id)
+        self.assertEqual(self.redis.zcard(SCHEDULED_KEY), 0)
+        self.assertEqual(self.redis.lrange(FAILED_KEY, 0, -1), [task_id.encode()])
+        self.assertGreater(self.redis.ttl(task_key(task_id)), 0)
+
+    def test_backoff_doubles(self):
+        self.assertEqual([backoff_delay(explode, attempt) for attempt in (1, 2, 3)], [5, 10, 20])
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_mode_runs_after_commit_without_redis(self):
+        with self.assertLogs(level="ERROR"):
+            with self.captureOnCommitCallbacks(execute=True):
+                record.delay(1)
+                explode.delay()
+                self.assertEqual(calls, [])
+
+        # The failing task is logged, not raised
+        self.assertEqual(calls, [1])
+        self.assertEqual(self.redis.keys("tasks:*"), [])
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_mode_skips_delayed_tasks(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            record.schedule([1], countdown=60)
+            record.schedule([2], eta=time.time() + 60)
+
+        self.assertEqual((callbacks, calls), ([], []))
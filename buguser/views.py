@@ -26,13 +26,12 @@ from .models import (
     User,
     BugOrganizationDetail
 )
-import os
 from .renderers import UserRenderer
+from .tasks import attach_default_profile_pic
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.permissions import IsAuthenticated
 from django.conf import settings
 from django.forms.models import model_to_dict
-from django.core.files import File
 
 
 def get_tokens_for_user(user):
@@ -62,8 +61,6 @@ class UserRegistrationView(APIView):
         if user:
 
             if user.user_type.id == 3:
-                default_profile_pic_path = os.path.join(settings.BASE_DIR, "static") + "/img/default.jpeg"
-
                 organization_profile, _ = BugOrganizationDetail.objects.get_or_create(
                     user=user,
                     first_name= "",
@@ -79,14 +76,9 @@ class UserRegistrationView(APIView):
                     country = "",
                     zip_code = ""
                     )
-                
-                with open(default_profile_pic_path, 'rb') as f:
-                    organization_profile.profile_pic.save('default.jpg', File(f), save=True)
 
             else:
 
-                default_profile_pic_path = os.path.join(settings.BASE_DIR, "static") + "/img/default.jpeg"
-
                 user_profile, _ = BugUserDetail.objects.get_or_create(
                     user=user,
                     first_name="",
@@ -97,8 +89,9 @@ class UserRegistrationView(APIView):
                     phone="",
                     profile_pic="",
                 )
-                with open(default_profile_pic_path, 'rb') as f:
-                    user_profile.profile_pic.save('default.jpg', File(f), save=True)
+
+            # Copying the picture is left to the task worker
+            attach_default_profile_pic.schedule([user.id], key=f"default-profile-pic:{user.id}")
         token = get_tokens_for_user(user)
         return Response(
             {"token": token, "msg": "Registration Successful"},
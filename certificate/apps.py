@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CertificateConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "certificate"
+
+    def ready(self):
+        # Counter columns follow likes and comments
+        from . import signals  # noqa: F401
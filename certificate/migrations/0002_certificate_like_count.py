@@ -0,0 +1,37 @@
+# Generated by Django 5.0.3 on 2026-10-18 13:13
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_of(model, link):
+    counts = (
+        model.objects.filter(**{link: OuterRef("pk")})
+        .order_by()
+        .values(link)
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    return Coalesce(Subquery(counts), Value(0))
+
+
+def backfill_counters(apps, schema_editor):
+    Certificate = apps.get_model("certificate", "Certificate")
+    Certificate.objects.update(like_count=count_of(Certificate.likes.through, "certificate"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("certificate", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="certificate",
+            name="like_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,11 @@
 from django.db import models
+from buguser.counters import CounterFieldsMixin
 from buguser.models import User
 
 # Create your models here.
 
 
-class Certificate(models.Model):
+class Certificate(CounterFieldsMixin, models.Model):
     id = models.AutoField(primary_key=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     title = models.CharField(max_length=255)
@@ -14,6 +15,10 @@ class Certificate(models.Model):
     valid_until = models.CharField(max_length=255)
     likes = models.ManyToManyField(User, related_name="certificate_likes", blank=True)
     certificate_create_date = models.CharField(max_length=255)
+    # Maintained by buguser.counters, see certificate/signals.py
+    like_count = models.PositiveIntegerField(default=0)
+
+    counter_fields = ("like_count",)
 
     def __str__(self):
         return self.title + " - " + self.user.email
@@ -3,19 +3,18 @@ from .models import Certificate
 
 
 class CertificateSerializer(serializers.ModelSerializer):
+    total_likes = serializers.IntegerField(source="like_count", read_only=True)
+
     class Meta:
         model = Certificate
         fields = [
             "id",
             "title",
             "description",
-            "certificate_image",
-            "created_at",
-            "updated_at",
+            "image",
+            "date_created",
             "valid_until",
+            "certificate_create_date",
             "likes",
             "total_likes",
         ]
-
-    def get_total_likes(self, obj):
-        return obj.likes.count()
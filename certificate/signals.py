@@ -0,0 +1,5 @@
+from buguser.counters import count_m2m
+
+from .models import Certificate
+
+count_m2m(Certificate.likes, "like_count")
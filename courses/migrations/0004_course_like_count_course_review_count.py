@@ -0,0 +1,46 @@
+# Generated by Django 5.0.3 on 2026-10-18 13:13
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_of(model, link):
+    counts = (
+        model.objects.filter(**{link: OuterRef("pk")})
+        .order_by()
+        .values(link)
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+    return Coalesce(Subquery(counts), Value(0))
+
+
+def backfill_counters(apps, schema_editor):
+    Course = apps.get_model("courses", "Course")
+    CourseReview = apps.get_model("courses", "CourseReview")
+    Course.objects.update(
+        like_count=count_of(Course.likes.through, "course"),
+        review_count=count_of(CourseReview, "course"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0003_coursemodulequiz_courseprogress_usercoursequiz"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="like_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="course",
+            name="review_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 
 # Create your models here.
 
+from buguser.counters import CounterFieldsMixin
 from buguser.models import User
 
 
@@ -12,7 +13,7 @@ class Category(models.Model):
         return self.name
 
 
-class Course((models.Model)):
+class Course(CounterFieldsMixin, models.Model):
     id = models.AutoField(primary_key=True)
     name = models.CharField(max_length=255)
     description = models.TextField()
@@ -21,9 +22,14 @@ class Course((models.Model)):
     date_created = models.DateTimeField(auto_now_add=True)
     likes = models.ManyToManyField(User, related_name="course_likes", blank=True)
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
+    # Maintained by buguser.counters, see courses/signals.py
+    like_count = models.PositiveIntegerField(default=0)
+    review_count = models.PositiveIntegerField(default=0)
+
+    counter_fields = ("like_count", "review_count")
 
     def get_total_likes(self):
-        return self.likes.count()
+        return self.like_count
 
     def __str__(self):
         return self.name
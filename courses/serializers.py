@@ -30,12 +30,13 @@ class CourseSerializer(serializers.ModelSerializer):
     class Meta:
         model = Course
         fields = "__all__"
+        read_only_fields = ["like_count", "review_count"]
 
     def get_likes(self, obj):
-        return obj.likes.count()
+        return obj.like_count
 
     def get_reviews(self, obj):
-        return obj.reviews.count()
+        return obj.review_count
 
     def get_modules(self, obj):
         return CourseModuleSerializer(obj.modules, many=True).data
@@ -0,0 +1,9 @@
+from buguser.conditional import track_versions
+from buguser.counters import count_m2m, count_related
+
+from .models import Category, Course, CourseModule, CourseReview
+
+track_versions(Course, Course.likes.through, Category, CourseModule, CourseReview)
+
+count_m2m(Course.likes, "like_count")
+count_related(Course, "review_count", CourseReview, "course")
@@ -7,16 +7,18 @@ from .serializers import (
     CategorySerializer,
     CourseCreateSerializer,
 )
-from .models import Course, Category, CourseOrder
+from .models import Course, Category, CourseModule, CourseOrder, CourseReview
+from buguser.conditional import ConditionalGetMixin
 from buguser.renderers import UserRenderer
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import PermissionDenied
 from django.shortcuts import get_object_or_404
 
 
-class CourseListCreateView(APIView):
+class CourseListCreateView(ConditionalGetMixin, APIView):
     renderer_classes = [UserRenderer]
     permission_classes = [IsAuthenticated]
+    version_models = (Course, Course.likes.through, Category, CourseModule, CourseReview)
 
     def get(self, request, format=None):
         courses = Course.objects.all()
@@ -90,9 +92,10 @@ class CourseOrderView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class CategoryListCreateView(APIView):
+class CategoryListCreateView(ConditionalGetMixin, APIView):
     renderer_classes = [UserRenderer]
     permission_classes = [IsAuthenticated]
+    version_models = (Category,)
 
     def get(self, request, format=None):
         categories = Category.objects.all()
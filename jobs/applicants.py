@@ -0,0 +1,183 @@
+"""
+Applicant listings for a job.
+
+Applications, their user and the user's profile details come from one joined
+query. Name search is a case-insensitive prefix match on first or last name,
+written as ``UPPER(name) LIKE UPPER(word) || '%'``. The database uppercases
+both sides, so they agree even where its ``UPPER`` only folds ASCII
+(SQLite), and PostgreSQL answers it from the ``varchar_pattern_ops``
+indexes on ``BugUserDetail`` under any collation.
+"""
+
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q, Value
+from django.db.models.functions import Upper
+
+from .models import JobsApplied
+from .signals import applications_decided
+from .serializers import media_url
+
+MAX_SEARCH_TERMS = 3
+
+EXPORT_CHUNK_SIZE = 500
+
+MAX_DECISIONS = 5000
+# Ids per IN (...) lookup, well below SQLite's bound parameter limit
+DECISION_LOOKUP_BATCH = 500
+
+APPROVED = "approved"
+REJECTED = "rejected"
+UNCHANGED = "unchanged"
+NOT_FOUND = "not_found"
+INVALID = "invalid"
+
+DETAIL_FIELDS = [
+    "first_name", "last_name", "position", "dob", "country", "city", "address",
+    "phone", "profile_pic", "gender", "about_me",
+]
+
+CSV_COLUMNS = ["id", "job_id", "job_title", "applied_date", "is_approved", "user_id", "email", *DETAIL_FIELDS]
+
+
+def name_filter(search_term):
+    """
+    Every word of ``search_term`` must be a prefix of the first or the last
+    name, so ``"ann le"`` finds Ann Lee.
+    """
+    condition = Q()
+    for word in str(search_term or "").split()[:MAX_SEARCH_TERMS]:
+        prefix = Upper(Value(word))
+        condition &= Q(first_name_upper__startswith=prefix) | Q(last_name_upper__startswith=prefix)
+    return condition
+
+
+def parse_flag(value):
+    """``True``/``False`` from a JSON boolean or a query string, ``None`` when not given."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() in ("1", "true")
+
+
+def applicant_queryset(job_id, search_term="", is_approved=None):
+    applications = (
+        JobsApplied.objects.filter(job_id=job_id)
+        .select_related("job", "user__buguserdetail")
+        .only(
+            "applied_date", "is_approved", "job__title", "user__email",
+            *(f"user__buguserdetail__{field}" for field in DETAIL_FIELDS),
+        )
+    )
+    if is_approved is not None:
+        applications = applications.filter(is_approved=is_approved)
+    if str(search_term or "").strip():
+        applications = applications.annotate(
+            first_name_upper=Upper("user__buguserdetail__first_name"),
+            last_name_upper=Upper("user__buguserdetail__last_name"),
+        ).filter(name_filter(search_term))
+    return applications
+
+
+def applicant_row(application):
+    """The listing/export representation of one application."""
+    detail = getattr(application.user, "buguserdetail", None)
+    user = {"id": application.user_id, "email": application.user.email}
+    for field in DETAIL_FIELDS:
+        user[field] = getattr(detail, field) if detail else None
+    user["profile_pic"] = media_url(detail.profile_pic.name) if detail and detail.profile_pic else None
+
+    return {
+        "id": application.id,
+        "job_id": application.job_id,
+        "job_title": application.job.title,
+        "applied_date": application.applied_date,
+        "is_approved": application.is_approved,
+        "user": user,
+    }
+
+
+class _Echo:
+    """File-like object whose ``write`` returns the value, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(applications):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for application in applications.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        row = applicant_row(application)
+        user = row.pop("user")
+        row["user_id"] = user.pop("id")
+        row.update(user)
+        yield writer.writerow([row[column] for column in CSV_COLUMNS])
+
+
+def stream_ndjson(applications):
+    for application in applications.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield json.dumps(applicant_row(application), cls=DjangoJSONEncoder) + "\n"
+
+
+def apply_decisions(job, decisions):
+    """
+    Approve or reject applications to ``job`` in bulk. ``decisions`` is a list
+    of ``{"user_id": ..., "is_approved": ...}``; when a user appears more than
+    once the last decision wins. Changed rows are written with one
+    ``bulk_update`` inside a single transaction.
+
+    Returns one ``{"user_id", "status"}`` outcome per decision, in order.
+    """
+    wanted = {}
+    outcomes = []
+    for decision in decisions:
+        user_id = decision.get("user_id") if isinstance(decision, dict) else None
+        is_approved = decision.get("is_approved") if isinstance(decision, dict) else None
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            user_id = None
+        if user_id is None or not isinstance(is_approved, bool):
+            outcomes.append({"user_id": user_id, "status": INVALID})
+            continue
+        wanted[user_id] = is_approved
+        outcomes.append({"user_id": user_id, "status": None})
+
+    changed = []
+    statuses = dict.fromkeys(wanted, NOT_FOUND)
+    user_ids = list(wanted)
+    with transaction.atomic():
+        for start in range(0, len(user_ids), DECISION_LOOKUP_BATCH):
+            applications = (
+                JobsApplied.objects.select_for_update()
+                .filter(job=job, user_id__in=user_ids[start:start + DECISION_LOOKUP_BATCH])
+                .only("id", "user_id", "is_approved")
+            )
+            for application in applications:
+                is_approved = wanted[application.user_id]
+                if application.is_approved == is_approved:
+                    statuses[application.user_id] = UNCHANGED
+                    continue
+                application.is_approved = is_approved
+                changed.append(application)
+                statuses[application.user_id] = APPROVED if is_approved else REJECTED
+
+        if changed:
+            JobsApplied.objects.bulk_update(changed, ["is_approved"])
+            approved = [application.user_id for application in changed if application.is_approved]
+            rejected = [application.user_id for application in changed if not application.is_approved]
+            transaction.on_commit(
+                lambda: applications_decided.send(
+                    sender=JobsApplied, job_id=job.pk, approved=approved, rejected=rejected
+                )
+            )
+
+    for outcome in outcomes:
+        if outcome["status"] is None:
+            outcome["status"] = statuses[outcome["user_id"]]
+    return outcomes
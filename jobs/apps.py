@@ -7,6 +7,9 @@ class JobsConfig(AppConfig):
     name = "jobs"
 
     def ready(self):
+        # Keep the Redis job store in sync with model changes
+        from . import signals  # noqa: F401
+
         # Avoid running the command when running tests or migrations
         if os.environ.get("RUN_MAIN", None) != "true":
             return
@@ -0,0 +1,95 @@
+"""
+Prefix index for job-title autocomplete.
+
+Every prefix of a title (starting at each word, so ``"dev"`` completes
+``"senior python developer"``) owns a sorted set of full titles scored by the
+number of live jobs carrying that title. A suggestion lookup is therefore a
+single ``ZREVRANGE`` on one key, independent of how many titles exist.
+
+The index lives in the job keyspace, so ``load_jobs_to_redis`` rebuilds it as
+part of a new generation and it is swapped in together with the search index.
+"""
+
+import re
+
+from .keyspace import current_keyspace
+
+MAX_PREFIX_LENGTH = 20
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 25
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_title(title):
+    return WHITESPACE_RE.sub(" ", str(title or "")).strip().lower()
+
+
+def title_prefixes(title):
+    """All prefixes, starting at every word, under which ``title`` is suggested."""
+    title = normalize_title(title)
+    prefixes = set()
+    start = 0
+    while start < len(title):
+        fragment = title[start:start + MAX_PREFIX_LENGTH]
+        for end in range(1, len(fragment) + 1):
+            prefixes.add(fragment[:end])
+        next_space = title.find(" ", start)
+        if next_space == -1:
+            break
+        start = next_space + 1
+    return prefixes
+
+
+def add_title(client, title, pipeline=None, amount=1, keys=None):
+    """Count ``amount`` more live jobs for ``title``."""
+    title = normalize_title(title)
+    if not title:
+        return
+    keys = keys or current_keyspace(client)
+    pipe = pipeline if pipeline is not None else client.pipeline(transaction=False)
+    for prefix in title_prefixes(title):
+        pipe.zincrby(keys.autocomplete(prefix), amount, title)
+    if pipeline is None:
+        pipe.execute()
+
+
+def remove_title(client, title, pipeline=None, amount=1, keys=None):
+    """Count ``amount`` fewer live jobs for ``title``, dropping it at zero."""
+    title = normalize_title(title)
+    if not title:
+        return
+    keys = keys or current_keyspace(client)
+    pipe = pipeline if pipeline is not None else client.pipeline(transaction=False)
+    for prefix in title_prefixes(title):
+        key = keys.autocomplete(prefix)
+        pipe.zincrby(key, -amount, title)
+        pipe.zremrangebyscore(key, "-inf", 0)
+    if pipeline is None:
+        pipe.execute()
+
+
+def suggest(client, query, limit=DEFAULT_LIMIT, keys=None):
+    """Return up to ``limit`` ``(title, live_job_count)`` pairs for ``query``."""
+    query = normalize_title(query)
+    if not query:
+        return []
+    limit = min(max(int(limit), 1), MAX_LIMIT)
+    keys = keys or current_keyspace(client)
+
+    if len(query) <= MAX_PREFIX_LENGTH:
+        rows = client.zrevrange(keys.autocomplete(query), 0, limit - 1, withscores=True)
+        return [(title.decode("utf-8"), int(count)) for title, count in rows]
+
+    # Prefixes are only indexed up to MAX_PREFIX_LENGTH characters, longer
+    # queries narrow the candidates of the longest indexed prefix instead.
+    rows = client.zrevrange(keys.autocomplete(query[:MAX_PREFIX_LENGTH]), 0, -1, withscores=True)
+    matches = []
+    for title, count in rows:
+        title = title.decode("utf-8")
+        if query in title:
+            matches.append((title, int(count)))
+            if len(matches) == limit:
+                break
+    return matches
+
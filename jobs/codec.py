@@ -0,0 +1,147 @@
+"""
+Compact binary encoding of the Redis job records.
+
+A record is a fixed ``struct`` header holding the numeric and flag fields
+natively, the lengths of the short text fields, the short text fields
+themselves and finally the description, which takes up the rest of the blob.
+Decoding a record only unpacks the header; text fields are decoded on first
+access, so reading a record to update its index entries never pays for the
+description.
+
+Records written before this format (JSON objects) are still decoded.
+"""
+
+import json
+import struct
+from datetime import date
+
+FORMAT_VERSION = 1
+
+# version, id, posted/expiry ordinals, salary_min, salary_max, experience, flags
+HEADER = struct.Struct("<BIIIdddB")
+
+STRING_FIELDS = ("title", "category", "job_type", "location", "company_name", "company_logo")
+STRING_LENGTHS = struct.Struct(f"<{len(STRING_FIELDS)}H")
+
+RECORD_FIELDS = frozenset((
+    "id", "job_created", "job_expiry", "salary_min", "salary_max", "experience",
+    "featured", "is_active", "description", *STRING_FIELDS,
+))
+
+FEATURED = 1
+ACTIVE = 2
+
+
+def encode_record(record):
+    """Encode a job record as built by :func:`jobs.sync.job_record`."""
+    flags = (FEATURED if record.get("featured") else 0) | (ACTIVE if record.get("is_active") else 0)
+    strings = [str(record.get(field) or "").encode("utf-8") for field in STRING_FIELDS]
+    return b"".join([
+        HEADER.pack(
+            FORMAT_VERSION,
+            int(record["id"]),
+            date.fromisoformat(record["job_created"][:10]).toordinal(),
+            date.fromisoformat(record["job_expiry"][:10]).toordinal(),
+            float(record.get("salary_min") or 0),
+            float(record.get("salary_max") or 0),
+            float(record.get("experience") or 0),
+            flags,
+        ),
+        STRING_LENGTHS.pack(*map(len, strings)),
+        *strings,
+        str(record.get("description") or "").encode("utf-8"),
+    ])
+
+
+class JobRecord:
+    """
+    A decoded job record. Only the header is unpacked up front; the text
+    fields are decoded on first access, the description separately from the
+    short ones.
+    """
+
+    __slots__ = (
+        "id", "job_created", "job_expiry", "salary_min", "salary_max",
+        "experience", "featured", "is_active", *STRING_FIELDS,
+        "_blob", "_description",
+    )
+
+    def __init__(self, blob):
+        (
+            _version, self.id, posted, expiry, self.salary_min, self.salary_max,
+            self.experience, flags,
+        ) = HEADER.unpack_from(blob)
+        self.job_created = date.fromordinal(posted)
+        self.job_expiry = date.fromordinal(expiry)
+        self.featured = bool(flags & FEATURED)
+        self.is_active = bool(flags & ACTIVE)
+        self._blob = blob
+        self._description = None
+
+    def __getattr__(self, name):
+        # Only reached for unset slots, i.e. short text fields not decoded yet
+        if name not in STRING_FIELDS:
+            raise AttributeError(name)
+        self._decode_strings()
+        return getattr(self, name)
+
+    def _decode_strings(self):
+        blob = self._blob
+        offset = HEADER.size + STRING_LENGTHS.size
+        for field, length in zip(STRING_FIELDS, STRING_LENGTHS.unpack_from(blob, HEADER.size)):
+            setattr(self, field, blob[offset:offset + length].decode("utf-8"))
+            offset += length
+
+    @property
+    def description(self):
+        if self._description is None:
+            offset = HEADER.size + STRING_LENGTHS.size + sum(STRING_LENGTHS.unpack_from(self._blob, HEADER.size))
+            self._description = self._blob[offset:].decode("utf-8")
+        return self._description
+
+    def __getitem__(self, field):
+        if field not in RECORD_FIELDS:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def get(self, field, default=None):
+        try:
+            return self[field]
+        except KeyError:
+            return default
+
+    def as_dict(self):
+        """The record in the shape the API has always returned."""
+        return {
+            "id": self.id,
+            "title": self.title,
+            "category": self.category,
+            "job_created": self.job_created.isoformat(),
+            "job_expiry": self.job_expiry.isoformat(),
+            "salary_min": f"{self.salary_min:.2f}",
+            "salary_max": f"{self.salary_max:.2f}",
+            "experience": str(self.experience),
+            "job_type": self.job_type,
+            "featured": self.featured,
+            "is_active": self.is_active,
+            "location": self.location,
+            "company_name": self.company_name,
+            "company_logo": self.company_logo,
+            "description": self.description,
+        }
+
+
+def decode_record(blob):
+    """
+    Decode a stored record. Returns a :class:`JobRecord`, or a plain ``dict``
+    for records stored as JSON by older versions.
+    """
+    if blob[:1] == b"{":
+        return json.loads(blob)
+    return JobRecord(blob)
+
+
+def record_dict(blob):
+    """Decode a stored record straight into its API representation."""
+    record = decode_record(blob)
+    return record if isinstance(record, dict) else record.as_dict()
@@ -0,0 +1,75 @@
+"""
+Read-through cache of the job detail body served by ``JobDetailView``.
+
+Bodies are cached under the job's detail version, which
+:func:`jobs.sync.bump_job_versions` bumps after every committed change to the
+job, together with the ETag stamp, so updates, deletes and category renames
+make the next read miss instead of needing an explicit delete. The version
+is read before the database, so a body loaded just before a change is stored
+under the superseded version and never served.
+
+Concurrent misses on the same job are coalesced: the first request takes a
+short ``SET NX`` lock and loads the job, the others wait for its result.
+Per-user flags are not part of the body; the view merges them in.
+"""
+
+import time
+
+from django.core.cache import cache
+from django.forms.models import model_to_dict
+
+from .models import BugJob
+
+DETAIL_TIMEOUT = 60 * 60
+
+# Cached for jobs that do not exist, so missing ids do not reach the database
+MISSING = "missing"
+MISSING_TIMEOUT = 60
+
+# The lock outlives any sane load; waiters give up and load the job
+# themselves after LOCK_WAIT
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 2.0
+LOCK_POLL_INTERVAL = 0.05
+
+
+def detail_version_key(job_id):
+    return f"jobs:detail:{job_id}:version"
+
+
+def load_job_detail(job_id):
+    """Uncached detail body of a job, ``None`` when it does not exist."""
+    job = BugJob.objects.select_related("category").filter(pk=job_id).first()
+    if job is None:
+        return None
+    body = model_to_dict(job)
+    body["category"] = job.category.name.title() if job.category else ""
+    return body
+
+
+def job_detail(job_id):
+    """Cached :func:`load_job_detail`."""
+    client = cache.client.get_client()
+    version = int(client.get(detail_version_key(job_id)) or 0)
+    key = f"job-detail:{job_id}:{version}"
+
+    body = cache.get(key)
+    if body is None:
+        lock_key = f"jobs:detail:{job_id}:lock:{version}"
+        if client.set(lock_key, 1, nx=True, ex=LOCK_TIMEOUT):
+            try:
+                body = load_job_detail(job_id)
+                cache.set(key, body or MISSING, timeout=DETAIL_TIMEOUT if body else MISSING_TIMEOUT)
+                return body
+            finally:
+                client.delete(lock_key)
+
+        deadline = time.monotonic() + LOCK_WAIT
+        while body is None and time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            body = cache.get(key)
+        if body is None:
+            # The loader is stuck or failed; don't pile onto its lock
+            return load_job_detail(job_id)
+
+    return None if body == MISSING else body
@@ -0,0 +1,96 @@
+"""
+Generation-scoped Redis key names for the job store.
+
+All job records and indexes live under ``jobs:<generation>:``. A bulk reload
+writes a complete new generation next to the live one and then flips the
+``jobs:generation`` pointer, so readers switch from one full index to the
+other in a single step and never see a half-loaded keyspace.
+"""
+
+GENERATION_KEY = "jobs:generation"
+GENERATION_COUNTER_KEY = "jobs:generation:counter"
+
+# Set while ``load_jobs_to_redis`` builds a generation; incremental syncs
+# write to it as well and record the touched job ids in the dirty set
+LOADING_GENERATION_KEY = "jobs:generation:loading"
+LOADING_DIRTY_KEY = "jobs:generation:dirty"
+
+# Bumped on every index write, so cached result sets never outlive a change
+VERSION_KEY = "jobs:version"
+
+# Job ids scored by the change number of their latest sync, so in-process
+# snapshots (jobs.snapshot) can fetch only what changed since they last looked
+CHANGES_KEY = "jobs:changes"
+CHANGE_COUNTER_KEY = "jobs:changes:counter"
+
+# Short-lived keys (intermediate set operations, cached result sets)
+TMP_PREFIX = "jobs:tmp"
+
+DEFAULT_GENERATION = "0"
+
+
+class JobKeyspace:
+    def __init__(self, generation=DEFAULT_GENERATION):
+        self.generation = str(generation)
+        self.root = f"jobs:{self.generation}"
+
+        self.posted = f"{self.root}:idx:posted"
+        self.salary_min = f"{self.root}:idx:salary_min"
+        self.experience = f"{self.root}:idx:experience"
+        # Job ids scored by the ordinal of their expiry date, for the sweeper
+        self.expiry = f"{self.root}:idx:expiry"
+
+    def __eq__(self, other):
+        return isinstance(other, JobKeyspace) and other.generation == self.generation
+
+    def __hash__(self):
+        return hash(self.generation)
+
+    def __repr__(self):
+        return f"JobKeyspace({self.generation!r})"
+
+    def job(self, job_id):
+        return f"{self.root}:job:{job_id}"
+
+    def set(self, field, value):
+        return f"{self.root}:idx:{field}:{str(value).lower()}"
+
+    def values(self, field):
+        """Every value ``field`` has been indexed with, for facet counts."""
+        return f"{self.root}:vals:{field}"
+
+    def token(self, token):
+        return f"{self.root}:idx:tok:{token}"
+
+    def token_prefix(self, prefix):
+        return f"{self.root}:idx:pfx:{prefix}"
+
+    def doc(self, job_id):
+        return f"{self.root}:idx:doc:{job_id}"
+
+    def autocomplete(self, prefix):
+        return f"{self.root}:ac:{prefix}"
+
+    def pattern(self):
+        """Glob matching every key of this generation, for SCAN."""
+        return f"{self.root}:*"
+
+
+def decode_generation(value):
+    if value is None:
+        return DEFAULT_GENERATION
+    return value.decode("utf-8") if isinstance(value, bytes) else str(value)
+
+
+def current_keyspace(client):
+    """Return the keyspace of the generation searches are currently served from."""
+    return JobKeyspace(decode_generation(client.get(GENERATION_KEY)))
+
+
+def target_keyspaces(client):
+    """Keyspaces an incremental write must reach: the live one and, during a reload, the loading one."""
+    live, loading = client.mget([GENERATION_KEY, LOADING_GENERATION_KEY])
+    keyspaces = [JobKeyspace(decode_generation(live))]
+    if loading is not None and decode_generation(loading) != keyspaces[0].generation:
+        keyspaces.append(JobKeyspace(decode_generation(loading)))
+    return keyspaces
@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand
+from jobs.codec import decode_record, encode_record
+from jobs.sync import job_queryset, job_record
+from itertools import cycle, islice
+import json
+import time
+
+# Used when the database has no jobs to sample
+SAMPLE_RECORD = {
+    "id": 123456,
+    "title": "senior python developer",
+    "category": "software development",
+    "job_created": "2024-10-01",
+    "job_expiry": "2024-12-31",
+    "salary_min": "60000.00",
+    "salary_max": "90000.00",
+    "experience": "4.0",
+    "job_type": "full time",
+    "featured": False,
+    "is_active": True,
+    "location": "bangalore, india",
+    "company_name": "bugbear technologies",
+    "company_logo": "https://bugbear.in/media/company_logos/bugbear.png",
+    "description": "design, build and maintain backend services in python and django. " * 12,
+}
+
+
+class Command(BaseCommand):
+    help = "Compare the size and decode time of JSON and binary job records"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--jobs", type=int, default=10000, help="Records per run")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement, the best is kept")
+
+    def handle(self, *args, **options):
+        count = max(options["jobs"], 1)
+        repeat = max(options["repeat"], 1)
+
+        # Sample real records and repeat them up to the requested count
+        records = [job_record(job) for job in job_queryset()[:count]] or [SAMPLE_RECORD]
+        records = list(islice(cycle(records), count))
+
+        json_blobs = [json.dumps(record).encode("utf-8") for record in records]
+        binary_blobs = [encode_record(record) for record in records]
+
+        def decode_json():
+            # What a filter pass over JSON records has to do
+            for blob in json_blobs:
+                record = json.loads(blob)
+                float(record["salary_min"]), float(record["salary_max"]), float(record["experience"])
+
+        def decode_header():
+            for blob in binary_blobs:
+                record = decode_record(blob)
+                record.salary_min, record.salary_max, record.experience
+
+        def decode_full():
+            for blob in binary_blobs:
+                decode_record(blob).as_dict()
+
+        self.stdout.write(f"{count} records, best of {repeat} runs, times per 10k records")
+        self.report("json", json_blobs, decode_json, count, repeat)
+        self.report("binary (header)", binary_blobs, decode_header, count, repeat)
+        self.report("binary (full)", binary_blobs, decode_full, count, repeat)
+
+    def report(self, label, blobs, decode, count, repeat):
+        best = min(self.timed(decode) for _ in range(repeat))
+        size = sum(map(len, blobs)) / len(blobs)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{label:<16} {size:8.1f} bytes/job {best * 10000 / count * 1000:9.2f} ms"
+            )
+        )
+
+    def timed(self, func):
+        started = time.perf_counter()
+        func()
+        return time.perf_counter() - started
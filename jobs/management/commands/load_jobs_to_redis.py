@@ -1,78 +1,123 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from django.core.cache import cache
-from django.conf import settings
-from jobs.models import BugJob
-import json
+from jobs.sync import job_queryset, sync_jobs, write_job
+from jobs.autocomplete import add_title
+from jobs.keyspace import (
+    GENERATION_COUNTER_KEY,
+    GENERATION_KEY,
+    LOADING_DIRTY_KEY,
+    LOADING_GENERATION_KEY,
+    VERSION_KEY,
+    JobKeyspace,
+    current_keyspace,
+)
+from collections import Counter
+import time
+
+# Keys left behind by the pre-generation layout
+LEGACY_PATTERNS = ("job:*", "jobs:idx:*", "jobs:ac:*", "jobs:ac-staging:*")
+
+# Keys unlinked per round trip while dropping an old generation
+DELETE_BATCH_SIZE = 1000
 
 
 class Command(BaseCommand):
-    help = "Load job titles and expiry times into Redis"
+    help = "Load live jobs into a new Redis generation and swap it in"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Jobs fetched from the database and pipelined to Redis per batch",
+        )
 
-    def handle(self, *args, **kwargs):
+    def handle(self, *args, **options):
         # Get the underlying Redis client
         redis_client = cache.client.get_client()
+        chunk_size = max(options["chunk_size"], 1)
+        started = time.monotonic()
 
-        # Clear existing job-related data from Redis
-        self.clear_existing_job_data(redis_client)
-
-        # Load all jobs from the database
-        jobs = BugJob.objects.all()
-        current_time = timezone.now()
+        # Build the new generation next to the live one, readers keep using
+        # the old one until the pointer is flipped below. Signal-driven syncs
+        # write to both generations meanwhile.
+        old_keys = current_keyspace(redis_client)
+        keys = JobKeyspace(redis_client.incr(GENERATION_COUNTER_KEY))
+        redis_client.delete(LOADING_DIRTY_KEY)
+        redis_client.set(LOADING_GENERATION_KEY, keys.generation)
 
-        for job in jobs:
-            # Convert job_expiry date to datetime by setting the time to midnight (00:00:00)
-            job_expiry_datetime = timezone.make_aware(
-                timezone.datetime.combine(job.job_expiry, timezone.datetime.min.time()),
-                timezone.get_current_timezone(),
+        swapped = False
+        try:
+            jobs = (
+                job_queryset()
+                .filter(job_expiry__gt=timezone.localdate())
+                .iterator(chunk_size=chunk_size)
             )
 
-            company_name = job.company.organization.current_company_name
-            company_logo = settings.WEB_URL + str(job.company.organization.company_logo.url)
-
-            # Calculate the expiry time in seconds
-            expiry_seconds = int((job_expiry_datetime - current_time).total_seconds())
-
-            if expiry_seconds > 0:
-                # Create a dictionary with job details, including all fields required for filtering
-                job_data = {
-                    "id": job.id,
-                    "title": job.title.lower(),
-                    "category": job.category.name.lower() if job.category else "",
-                    "job_created": job.job_posted.isoformat(),
-                    "job_expiry": job.job_expiry.isoformat(),
-                    "salary_min": str(job.salary_min),
-                    "salary_max": str(job.salary_max),
-                    "experience": str(job.experience),  # Experience level
-                    "job_type": job.job_type.lower(),  # Store job type in lowercase for consistent filtering
-                    "featured": job.featured,
-                    "is_active": job.is_active,
-                    "location": job.location.lower(),  # Store location in lowercase for consistent filtering
-                    "company_name": company_name.lower(),
-                    "company_logo": company_logo,
-                    "description": job.responsibilities.lower()
-                }
-
-                # Store the job data in Redis with an expiry time
-                job_key = f"job:{job.id}"
-                redis_client.set(job_key, json.dumps(job_data), ex=expiry_seconds)
-
-                # Add the job title to a Redis set for quick searching
-                redis_client.sadd("job_titles", job.title.lower())
+            title_counts = Counter()
+            loaded = 0
+            pipe = redis_client.pipeline(transaction=False)
+            for job in jobs:
+                # Queue the record and its index entries on the shared pipeline
+                write_job(redis_client, pipe, job, keys, fresh=True)
+                title_counts[job.title.lower()] += 1
 
+                loaded += 1
+                if loaded % chunk_size == 0:
+                    pipe.execute()
+
+            # Autocomplete counts are only known once every job has been seen
+            for count, (title, amount) in enumerate(title_counts.items(), 1):
+                add_title(redis_client, title, pipeline=pipe, amount=amount, keys=keys)
+                if count % chunk_size == 0:
+                    pipe.execute()
+            pipe.execute()
+
+            # Jobs changed while streaming may have been copied in their old state
+            dirty = redis_client.smembers(LOADING_DIRTY_KEY)
+            if dirty:
+                sync_jobs(redis_client, dirty, keyspaces=[keys])
+
+            # Swap the complete generation in; one MULTI so cached result sets
+            # keyed on the old version are never served for the new generation
+            swap = redis_client.pipeline(transaction=True)
+            swap.set(GENERATION_KEY, keys.generation)
+            swap.incr(VERSION_KEY)
+            swap.delete(LOADING_GENERATION_KEY, LOADING_DIRTY_KEY)
+            swap.execute()
+            swapped = True
+        finally:
+            if not swapped:
+                # Stop the syncs writing into the abandoned generation, then drop it
+                redis_client.delete(LOADING_GENERATION_KEY, LOADING_DIRTY_KEY)
+                self.clear_keys(redis_client, keys.pattern())
+
+        elapsed = time.monotonic() - started
         self.stdout.write(
-            self.style.SUCCESS("Successfully loaded job titles and details into Redis")
+            self.style.SUCCESS(
+                f"Loaded {loaded} jobs into generation {keys.generation} in {elapsed:.2f}s "
+                f"({loaded / elapsed if elapsed else 0:.0f} rows/s)"
+            )
         )
 
-    def clear_existing_job_data(self, redis_client):
+        # Readers have moved over, the previous generation can go
+        if old_keys != keys:
+            self.clear_keys(redis_client, old_keys.pattern())
+        for pattern in LEGACY_PATTERNS:
+            self.clear_keys(redis_client, pattern)
+        redis_client.delete("job_titles")
+
+    def clear_keys(self, redis_client, pattern):
+        """Incrementally delete every key matching ``pattern`` without blocking Redis."""
         try:
-            # Find and delete all existing job-related keys
-            job_keys = redis_client.keys("job:*")
-            if job_keys:
-                redis_client.delete(
-                    *job_keys
-                )  # Use * to unpack the list of keys for deletion
-            # Optionally, delete the job_titles set if it exists
-            redis_client.delete("job_titles")
+            batch = []
+            for key in redis_client.scan_iter(match=pattern, count=DELETE_BATCH_SIZE):
+                batch.append(key)
+                if len(batch) >= DELETE_BATCH_SIZE:
+                    redis_client.unlink(*batch)
+                    batch = []
+            if batch:
+                redis_client.unlink(*batch)
         except Exception as e:
             self.stdout.write(self.style.ERROR(f"Error clearing Redis data: {e}"))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.core.cache import cache
+from jobs.sync import SWEEP_BATCH_SIZE, sweep_expired_jobs
+import time
+
+
+class Command(BaseCommand):
+    help = "Deactivate expired jobs and remove them from the Redis job store (run from cron, or with --interval)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=SWEEP_BATCH_SIZE,
+            help="Expired jobs removed from Redis per round trip",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Keep running and sweep every this many seconds",
+        )
+
+    def handle(self, *args, **options):
+        redis_client = cache.client.get_client()
+        batch_size = max(options["batch_size"], 1)
+
+        while True:
+            started = time.monotonic()
+            deactivated, synced = sweep_expired_jobs(redis_client, batch_size=batch_size)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Deactivated {deactivated} jobs and synced {synced} expired jobs to Redis "
+                    f"in {time.monotonic() - started:.2f}s"
+                )
+            )
+            if options["interval"] <= 0:
+                break
+            time.sleep(options["interval"])
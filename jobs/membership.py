@@ -0,0 +1,115 @@
+"""
+Per-user membership cache behind the applied/saved badges on job cards.
+
+Each user has one Redis set holding the jobs they applied to (``a<id>``),
+saved (``s<id>``) and were approved for (``p<id>``), plus a ``ready`` member
+once it has been filled from the database. A whole page of jobs is annotated
+with a single ``SMISMEMBER``, whatever its size.
+
+Signals (see :mod:`jobs.signals`) add and remove members after commit. A set
+that is not ready only collects those writes until its first read rebuilds it
+from the database, under ``WATCH`` so a write landing during the rebuild
+makes it give up instead of overwriting newer state.
+"""
+
+import logging
+
+from django.core.cache import cache
+from redis.exceptions import WatchError
+
+from .models import JobsApplied, JobSaved
+
+logger = logging.getLogger(__name__)
+
+# Refreshed by every write; idle users' sets are rebuilt on their next visit
+MEMBERSHIP_TTL = 24 * 60 * 60
+
+READY = "ready"
+APPLIED = "a"
+SAVED = "s"
+APPROVED = "p"
+
+
+def membership_key(user_id):
+    return f"jobs:members:{user_id}"
+
+
+def members(prefix, job_ids):
+    return [f"{prefix}{job_id}" for job_id in job_ids]
+
+
+def update_membership(changes):
+    """
+    Apply ``{user_id: (added, removed)}`` member changes in one round trip.
+    Runs after commit, so a Redis failure is logged rather than raised.
+    """
+    try:
+        pipe = cache.client.get_client().pipeline(transaction=False)
+        for user_id, (added, removed) in changes.items():
+            key = membership_key(user_id)
+            if added:
+                pipe.sadd(key, *added)
+            if removed:
+                pipe.srem(key, *removed)
+            pipe.expire(key, MEMBERSHIP_TTL)
+        pipe.execute()
+    except Exception:
+        logger.exception("Failed to update job membership of users %s", list(changes))
+
+
+def _load_membership(client, user_id):
+    """Rebuild the set of ``user_id`` from the database and return its members."""
+    key = membership_key(user_id)
+    with client.pipeline() as pipe:
+        pipe.watch(key)
+        found = {READY}
+        for job_id, is_approved in JobsApplied.objects.filter(user_id=user_id).values_list("job_id", "is_approved"):
+            found.add(f"{APPLIED}{job_id}")
+            if is_approved:
+                found.add(f"{APPROVED}{job_id}")
+        found.update(members(SAVED, JobSaved.objects.filter(user_id=user_id).values_list("job_id", flat=True)))
+        try:
+            pipe.multi()
+            pipe.delete(key)
+            pipe.sadd(key, *found)
+            pipe.expire(key, MEMBERSHIP_TTL)
+            pipe.execute()
+        except WatchError:
+            # Changed while we read; the next read rebuilds it again
+            pass
+    return found
+
+
+def job_membership(user, job_ids):
+    """
+    ``{job_id: {"applied", "saved", "is_approved"}}`` for ``user``; anonymous
+    users get ``False`` everywhere without touching Redis.
+    """
+    job_ids = [int(job_id) for job_id in job_ids]
+    if not job_ids or not user.is_authenticated:
+        return {job_id: {"applied": False, "saved": False, "is_approved": False} for job_id in job_ids}
+
+    client = cache.client.get_client()
+    probe = [READY, *members(APPLIED, job_ids), *members(SAVED, job_ids), *members(APPROVED, job_ids)]
+    found = client.smismember(membership_key(user.pk), probe)
+    if not found[0]:
+        loaded = _load_membership(client, user.pk)
+        found = [member in loaded for member in probe]
+
+    size = len(job_ids)
+    return {
+        job_id: {
+            "applied": bool(found[1 + index]),
+            "saved": bool(found[1 + size + index]),
+            "is_approved": bool(found[1 + 2 * size + index]),
+        }
+        for index, job_id in enumerate(job_ids)
+    }
+
+
+def annotate_jobs(user, jobs):
+    """Add the ``applied``/``saved``/``is_approved`` flags of ``user`` to job dicts in place."""
+    membership = job_membership(user, [job["id"] for job in jobs])
+    for job in jobs:
+        job.update(membership[int(job["id"])])
+    return jobs
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.3 on 2026-10-18 12:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobs", "0008_jobsapplied_is_approved"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="bugjob",
+            index=models.Index(fields=["-job_posted", "-id"], name="bugjob_posted_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="bugjob",
+            index=models.Index(fields=["is_active", "-job_posted", "-id"], name="bugjob_active_posted_idx"),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.3 on 2026-10-18 12:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobs", "0009_bugjob_keyset_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="jobsapplied",
+            index=models.Index(fields=["job", "-id"], name="jobsapplied_job_id_idx"),
+        ),
+    ]
@@ -45,6 +45,13 @@ class BugJob(models.Model):
     featured = models.BooleanField(default=False)  # Is this job featured?
     is_active = models.BooleanField(default=True)  # Is this job active?
 
+    class Meta:
+        indexes = [
+            # Keyset pagination walks jobs by (job_posted, id)
+            models.Index(fields=["-job_posted", "-id"], name="bugjob_posted_id_idx"),
+            models.Index(fields=["is_active", "-job_posted", "-id"], name="bugjob_active_posted_idx"),
+        ]
+
     def __str__(self):
         return self.title
     
@@ -56,6 +63,12 @@ class JobsApplied(models.Model):
     applied_date = models.DateTimeField(auto_now_add=True)
     is_approved = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Applicant listings page through one job's applications by id
+            models.Index(fields=["job", "-id"], name="jobsapplied_job_id_idx"),
+        ]
+
     def __str__(self):
         return self.job.title
     
@@ -0,0 +1,118 @@
+import base64
+import json
+from datetime import date
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+NEXT = "n"
+PREVIOUS = "p"
+
+
+class JobCursorPagination:
+    """
+    Opaque-cursor keyset pagination ordered by ``(job_posted, id)``, newest
+    first. A cursor remembers the position of the last (or first) row that was
+    returned, so fetching page 500 costs the same as fetching page 1.
+
+    The same cursor format is shared by the ORM listing (``paginate_queryset``)
+    and the Redis search, which pages on its composite posted/id score.
+    """
+
+    page_size = 10
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    max_page_size = 100
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_page_size(self, params):
+        try:
+            page_size = int(params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def encode_cursor(self, position, direction=NEXT):
+        payload = json.dumps(dict(position, d=direction), separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+    def decode_cursor(self, params):
+        """
+        Return the decoded cursor from ``params`` (query params or request
+        body), or ``None`` when no cursor was sent.
+        """
+        encoded = params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(cursor, dict) or cursor.get("d") not in (NEXT, PREVIOUS):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def paginate_queryset(self, queryset, params):
+        """
+        Keyset-paginate a ``BugJob`` queryset. Returns ``(jobs, next, previous)``
+        where ``next``/``previous`` are cursors or ``None``.
+        """
+        page_size = self.get_page_size(params)
+        cursor = self.decode_cursor(params)
+
+        if cursor is None:
+            direction = NEXT
+            queryset = queryset.order_by("-job_posted", "-id")
+        else:
+            try:
+                posted, job_id = date.fromisoformat(cursor["p"]), int(cursor["i"])
+            except (KeyError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+            direction = cursor["d"]
+            if direction == NEXT:
+                queryset = queryset.filter(
+                    Q(job_posted__lt=posted) | Q(job_posted=posted, id__lt=job_id)
+                ).order_by("-job_posted", "-id")
+            else:
+                queryset = queryset.filter(
+                    Q(job_posted__gt=posted) | Q(job_posted=posted, id__gt=job_id)
+                ).order_by("job_posted", "id")
+
+        # One extra row tells whether another page exists in that direction
+        jobs = list(queryset[:page_size + 1])
+        has_more = len(jobs) > page_size
+        jobs = jobs[:page_size]
+        if direction == PREVIOUS:
+            jobs.reverse()
+
+        if not jobs:
+            return jobs, None, None
+
+        first = {"p": jobs[0].job_posted.isoformat(), "i": jobs[0].id}
+        last = {"p": jobs[-1].job_posted.isoformat(), "i": jobs[-1].id}
+        if direction == NEXT:
+            next_cursor = self.encode_cursor(last, NEXT) if has_more else None
+            previous_cursor = self.encode_cursor(first, PREVIOUS) if cursor else None
+        else:
+            next_cursor = self.encode_cursor(last, NEXT)
+            previous_cursor = self.encode_cursor(first, PREVIOUS) if has_more else None
+        return jobs, next_cursor, previous_cursor
+
+
+class JobCardPagination(CursorPagination):
+    """Cursor pagination for a user's saved/applied jobs, most recent first."""
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = "-id"
+
+
+class ApplicantPagination(CursorPagination):
+    """Cursor pagination for a job's applicants, latest application first."""
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = "-id"
@@ -0,0 +1,422 @@
+"""
+Redis secondary indexes for job search.
+
+Every cached job record lives under ``JobKeyspace.job(<id>)`` and is
+additionally registered in:
+
+* sorted sets for the range filters (``salary_min``, ``experience``), for
+  ordering (``job_posted``) and for expiry (``job_expiry``, see
+  :func:`jobs.sync.sweep_expired_jobs`),
+* plain sets for the equality filters (``category``, ``job_type``,
+  ``location``), and
+* the inverted token index in :mod:`jobs.text_index` for title matching.
+
+A search is answered with set intersections/unions and range queries inside
+Redis, so only the ids of the requested page are ever fetched. The filtered
+result set is kept for a short while under a key derived from the filters,
+the index version and the date, so following pages are plain keyset range
+reads.
+
+Jobs stay indexed until the sweeper drops them after their expiry date, so
+searches leave out the expired ones themselves: while the expiry index holds
+any, even an unfiltered search goes through a stored result set.
+"""
+
+import hashlib
+import json
+import uuid
+from collections import namedtuple
+from datetime import date
+
+from django.utils import timezone
+
+from .keyspace import GENERATION_KEY, TMP_PREFIX, VERSION_KEY, JobKeyspace, current_keyspace, decode_generation
+from .codec import record_dict
+from .text_index import store_text_matches, unindex_job_text
+
+RESULT_PREFIX = f"{TMP_PREFIX}:result"
+
+# Equality filters backed by one Redis set per value
+SET_FIELDS = ("category", "job_type", "location")
+# An equality field missing from the data passed to unindex_job
+UNKNOWN = object()
+
+# Filtered result sets are reused by the following pages of the same search
+RESULT_TTL = 120
+
+# Posted dates are combined with the job id so every member has a unique
+# score and ties on the same day are still ordered deterministically.
+POSTED_ID_FACTOR = 10**7
+
+# Relevance-sorted searches score ``relevance * RELEVANCE_FACTOR + posted``,
+# so equally relevant jobs are still ordered newest first.
+RELEVANCE_FACTOR = 10**13
+
+SORT_RECENT = "recent"
+SORT_RELEVANCE = "relevance"
+
+# Facet buckets, in the format of the salaryRange/experienceLevel filters so a
+# bucket can be sent straight back as a filter
+SALARY_FACETS = ("0-30000", "30000-60000", "60000-100000", "100000+")
+EXPERIENCE_FACETS = ("0-1", "1-3", "3-5", "5+")
+
+# Equality filters whose distinct values are counted as facets
+FACET_FIELDS = ("category", "job_type")
+
+SearchPage = namedtuple(
+    "SearchPage", ["total", "jobs", "first_score", "last_score", "has_more", "facets"], defaults=[None]
+)
+
+
+def posted_score(job_posted, job_id):
+    if isinstance(job_posted, str):
+        job_posted = date.fromisoformat(job_posted[:10])
+    return job_posted.toordinal() * POSTED_ID_FACTOR + int(job_id)
+
+
+def expiry_score(job_expiry):
+    """A job is expired once the ordinal of today reaches this score."""
+    if isinstance(job_expiry, str):
+        job_expiry = date.fromisoformat(job_expiry[:10])
+    return job_expiry.toordinal()
+
+
+def parse_range(value):
+    """
+    Parse a filter range such as ``"30000-50000"``, ``"5+"`` or ``"3"`` into
+    a ``(min, max)`` tuple understood by ``ZRANGEBYSCORE``.
+    Returns ``None`` for malformed input.
+    """
+    value = str(value).strip()
+    try:
+        if value.endswith("+"):
+            return float(value[:-1]), "+inf"
+        if "-" in value:
+            low, high = value.split("-", 1)
+            return float(low), float(high)
+        number = float(value)
+        return number, number
+    except ValueError:
+        return None
+
+
+def index_job(client, job_data, pipeline=None, keys=None):
+    """
+    Register a job record in every secondary index of ``keys`` (the live
+    generation by default). Pass ``pipeline`` to batch the writes with other
+    commands.
+    """
+    keys = keys or current_keyspace(client)
+    pipe = pipeline if pipeline is not None else client.pipeline(transaction=False)
+    job_id = str(job_data["id"])
+
+    pipe.incr(VERSION_KEY)
+    pipe.zadd(keys.posted, {job_id: posted_score(job_data["job_created"], job_id)})
+    pipe.zadd(keys.salary_min, {job_id: float(job_data.get("salary_min") or 0)})
+    pipe.zadd(keys.experience, {job_id: float(job_data.get("experience") or 0)})
+    pipe.zadd(keys.expiry, {job_id: expiry_score(job_data["job_expiry"])})
+    for field in SET_FIELDS:
+        value = job_data.get(field)
+        if value:
+            pipe.sadd(keys.set(field, value), job_id)
+            pipe.sadd(keys.values(field), str(value).lower())
+
+    if pipeline is None:
+        pipe.execute()
+
+
+def unindex_job(client, job_data, pipeline=None, keys=None):
+    """
+    Remove a job from every secondary index. ``job_data`` only needs the
+    ``id`` and the equality fields it was indexed with; without them the job
+    is removed from the sets of every value those fields have been indexed
+    with.
+    """
+    keys = keys or current_keyspace(client)
+    pipe = pipeline if pipeline is not None else client.pipeline(transaction=False)
+    job_id = str(job_data["id"])
+
+    pipe.incr(VERSION_KEY)
+    pipe.zrem(keys.posted, job_id)
+    pipe.zrem(keys.salary_min, job_id)
+    pipe.zrem(keys.experience, job_id)
+    pipe.zrem(keys.expiry, job_id)
+    for field in SET_FIELDS:
+        value = job_data.get(field, UNKNOWN)
+        if value is UNKNOWN:
+            values = [value.decode("utf-8") for value in client.smembers(keys.values(field))]
+        else:
+            values = [value] if value else []
+        for value in values:
+            pipe.srem(keys.set(field, value), job_id)
+
+    if pipeline is None:
+        pipe.execute()
+
+
+def _tmp_key():
+    return f"{TMP_PREFIX}:{uuid.uuid4().hex}"
+
+
+def _union_ranges(pipe, source_key, ranges, tmp_keys):
+    """Store the union of several score ranges of ``source_key`` in a temp key."""
+    parts = []
+    for bounds in ranges:
+        part = _tmp_key()
+        pipe.zrangestore(part, source_key, bounds[0], bounds[1], byscore=True)
+        parts.append(part)
+    tmp_keys.extend(parts)
+
+    target = _tmp_key()
+    tmp_keys.append(target)
+    if parts:
+        pipe.zunionstore(target, parts)
+    return target
+
+
+def _union_sets(pipe, keys, field, values, tmp_keys):
+    target = _tmp_key()
+    tmp_keys.append(target)
+    pipe.sunionstore(target, [keys.set(field, value) for value in values])
+    return target
+
+
+def _result_key(keys, version, filters, today):
+    payload = json.dumps([keys.generation, version, today, filters], sort_keys=True)
+    return f"{RESULT_PREFIX}:{hashlib.sha1(payload.encode('utf-8')).hexdigest()}"
+
+
+def _store_results(
+    pipe, keys, result_key, title, categories, salary_ranges, experience_levels, job_types, sort, today,
+):
+    """
+    Queue the commands that store the filtered jobs that have not expired by
+    ``today`` (an ordinal) in ``result_key``, scored for ordering. Returns
+    ``False`` when nothing can match.
+    """
+    tmp_keys = []
+
+    # Build the intersection; the posted index supplies the ordering score
+    sources = [keys.posted]
+    weights = {keys.posted: 1}
+    if title:
+        text_key = store_text_matches(pipe, keys, title, tmp_keys)
+        if text_key is None:
+            # Nothing searchable in the query (e.g. only stop words)
+            return False
+        sources.append(text_key)
+        weights[text_key] = RELEVANCE_FACTOR if sort == SORT_RELEVANCE else 0
+    if categories:
+        sources.append(_union_sets(pipe, keys, "category", categories, tmp_keys))
+    if job_types:
+        sources.append(_union_sets(pipe, keys, "job_type", job_types, tmp_keys))
+    if salary_ranges:
+        ranges = [r for r in map(parse_range, salary_ranges) if r]
+        sources.append(_union_ranges(pipe, keys.salary_min, ranges, tmp_keys))
+    if experience_levels:
+        ranges = [r for r in map(parse_range, experience_levels) if r]
+        sources.append(_union_ranges(pipe, keys.experience, ranges, tmp_keys))
+
+    expired = _tmp_key()
+    tmp_keys.append(expired)
+    pipe.zrangestore(expired, keys.expiry, "-inf", today, byscore=True)
+
+    pipe.zinterstore(result_key, {key: weights.get(key, 0) for key in sources})
+    pipe.zdiffstore(result_key, [result_key, expired])
+    pipe.expire(result_key, RESULT_TTL)
+    if tmp_keys:
+        pipe.delete(*tmp_keys)
+    return True
+
+
+def _queue_page(pipe, key, limit, after, before):
+    """Queue ZCARD plus the keyset range read for one page (one extra row)."""
+    pipe.zcard(key)
+    if before is not None:
+        pipe.zrangebyscore(key, f"({int(before)}", "+inf", start=0, num=limit + 1, withscores=True)
+    else:
+        upper = f"({int(after)}" if after is not None else "+inf"
+        pipe.zrevrangebyscore(key, upper, "-inf", start=0, num=limit + 1, withscores=True)
+
+
+def search_jobs(
+    client,
+    title="",
+    categories=(),
+    salary_ranges=(),
+    experience_levels=(),
+    job_types=(),
+    sort=SORT_RECENT,
+    limit=10,
+    after=None,
+    before=None,
+    facets=False,
+):
+    """
+    Return a :class:`SearchPage` for the given filters. Results are ordered
+    newest first, or by text relevance when ``sort`` is ``"relevance"`` and a
+    title query is given.
+
+    ``after``/``before`` are the scores of the last/first job of an adjacent
+    page (see ``SearchPage.first_score``/``last_score``) and select the page
+    following/preceding it. ``jobs`` only holds the decoded records of the page.
+    With ``facets`` the page also carries the facet counts of the whole result.
+    """
+    generation, version = client.mget([GENERATION_KEY, VERSION_KEY])
+    keys = JobKeyspace(decode_generation(generation))
+    version = (version or b"0").decode("utf-8")
+    today = timezone.localdate().toordinal()
+
+    filters = {
+        "title": title or "",
+        "categories": sorted(str(v).lower() for v in categories),
+        "salary_ranges": sorted(map(str, salary_ranges)),
+        "experience_levels": sorted(map(str, experience_levels)),
+        "job_types": sorted(str(v).lower() for v in job_types),
+        "sort": sort if title else SORT_RECENT,
+    }
+    has_filters = any(value for name, value in filters.items() if name != "sort")
+    # The ordering index itself is the result set of an unfiltered search
+    result_key = _result_key(keys, version, filters, today) if has_filters else keys.posted
+
+    pipe = client.pipeline(transaction=False)
+    pipe.zcount(keys.expiry, "-inf", today)
+    if has_filters:
+        pipe.exists(result_key)
+    _queue_page(pipe, result_key, limit, after, before)
+    if facets:
+        for field in FACET_FIELDS:
+            pipe.smembers(keys.values(field))
+    results = pipe.execute()
+
+    expired = results.pop(0)
+    exists = results.pop(0) if has_filters else True
+    total, rows = results[:2]
+    facet_values = {
+        field: sorted(value.decode("utf-8") for value in members)
+        for field, members in zip(FACET_FIELDS, results[2:])
+    }
+
+    if expired and not has_filters:
+        # The ordering index still holds jobs the sweeper has not dropped
+        result_key = _result_key(keys, version, filters, today)
+        pipe = client.pipeline(transaction=False)
+        pipe.exists(result_key)
+        _queue_page(pipe, result_key, limit, after, before)
+        exists, total, rows = pipe.execute()
+
+    facet_counts = None
+    pipe = client.pipeline(transaction=False)
+    if not exists:
+        if not _store_results(
+            pipe, keys, result_key, title, categories, salary_ranges,
+            experience_levels, job_types, sort, today,
+        ):
+            return SearchPage(0, [], None, None, False, read_facets([], []) if facets else None)
+        _queue_page(pipe, result_key, limit, after, before)
+    page_end = len(pipe)
+    if facets:
+        # Counted on the (now stored) result set, in the same round trip
+        plan = _queue_facets(pipe, keys, result_key, facet_values)
+    if len(pipe):
+        results = pipe.execute()
+        if not exists:
+            total, rows = results[page_end - 2:page_end]
+        if facets:
+            facet_counts = read_facets(plan, results[page_end:])
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if before is not None:
+        rows.reverse()
+
+    if not rows:
+        return SearchPage(total, [], None, None, False, facet_counts)
+
+    jobs = fetch_jobs(client, [job_id for job_id, _ in rows], keys)
+    return SearchPage(total, jobs, int(rows[0][1]), int(rows[-1][1]), has_more, facet_counts)
+
+
+def _queue_facets(pipe, keys, source_key, values):
+    """
+    Queue the facet counts of the jobs in ``source_key`` and return the plan
+    :func:`read_facets` uses to pick them out of the pipeline results.
+    """
+    plan = []
+    for field in FACET_FIELDS:
+        for value in values[field]:
+            pipe.zintercard(2, [source_key, keys.set(field, value)])
+            plan.append((field, value))
+
+    for facet, index_key, buckets in (
+        ("salary", keys.salary_min, SALARY_FACETS),
+        ("experience", keys.experience, EXPERIENCE_FACETS),
+    ):
+        scored = index_key
+        if source_key != keys.posted:
+            # The result set, scored by this facet's field
+            scored = _tmp_key()
+            pipe.zinterstore(scored, {source_key: 0, index_key: 1})
+            plan.append(None)
+        for bucket in buckets:
+            pipe.zcount(scored, *parse_range(bucket))
+            plan.append((facet, bucket))
+        if scored != index_key:
+            pipe.delete(scored)
+            plan.append(None)
+    return plan
+
+
+def read_facets(plan, results):
+    """
+    Build the facets response: category and job type values with at least
+    one job, most frequent first, and every salary/experience bucket.
+    """
+    counts = {field: {} for field in FACET_FIELDS}
+    counts["salary"] = dict.fromkeys(SALARY_FACETS, 0)
+    counts["experience"] = dict.fromkeys(EXPERIENCE_FACETS, 0)
+    for entry, count in zip(plan, results):
+        if entry is not None:
+            field, value = entry
+            counts[field][value] = int(count)
+
+    facets = {}
+    for field, values in counts.items():
+        if field in FACET_FIELDS:
+            values = sorted(((v, c) for v, c in values.items() if c), key=lambda item: (-item[1], item[0]))
+        else:
+            values = values.items()
+        facets[field] = [{"value": value, "count": count} for value, count in values]
+    return facets
+
+
+def fetch_jobs(client, job_ids, keys=None):
+    """
+    Fetch and decode the records for ``job_ids``, preserving their order.
+    Ids whose record is missing are dropped from every index so they stop
+    showing up in later searches.
+    """
+    if not job_ids:
+        return []
+
+    keys = keys or current_keyspace(client)
+    job_ids = [j.decode("utf-8") if isinstance(j, bytes) else str(j) for j in job_ids]
+    blobs = client.mget([keys.job(job_id) for job_id in job_ids])
+
+    jobs = []
+    stale = []
+    for job_id, blob in zip(job_ids, blobs):
+        if blob is None:
+            stale.append(job_id)
+            continue
+        jobs.append(record_dict(blob))
+
+    if stale:
+        # Only the id is left, so every value set of the equality fields is cleaned
+        pipe = client.pipeline(transaction=False)
+        for job_id in stale:
+            unindex_job(client, {"id": job_id}, pipeline=pipe, keys=keys)
+            unindex_job_text(client, job_id, pipeline=pipe, keys=keys)
+        pipe.execute()
+
+    return jobs
@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.utils.encoding import filepath_to_uri
 from rest_framework import serializers
 from .models import BugJob, BugJobCategory, JobsApplied, JobSaved
 from buguser.serializers import BugOrganizationDetailSerializer, BugUserDetailSerializer
@@ -40,3 +42,64 @@ class JobSavedSerializer(serializers.ModelSerializer):
         model = JobSaved
         fields = ["id", "job", "a_user", "saved_date"]
 
+
+
+def media_url(name):
+    """Absolute URL of a stored file, built without a storage backend call."""
+    return settings.WEB_URL + settings.MEDIA_URL + filepath_to_uri(name) if name else ""
+
+
+class JobCardSerializer(serializers.BaseSerializer):
+    """
+    Read-only job card for rows pointing at a job (``JobSaved``, ``JobsApplied``).
+    Build the queryset with ``setup_queryset`` so every field read here comes
+    from a single query.
+    """
+
+    job_fields = [
+        "title", "job_posted", "job_expiry", "salary_min", "salary_max", "job_type",
+        "featured", "location", "is_active", "responsibilities",
+    ]
+    row_fields = []
+
+    @classmethod
+    def setup_queryset(cls, queryset):
+        return queryset.select_related("job__category", "job__company__organization").only(
+            *cls.row_fields,
+            "job",
+            *(f"job__{field}" for field in cls.job_fields),
+            "job__category__name",
+            "job__company",
+            "job__company__organization__current_company_name",
+            "job__company__organization__company_logo",
+        )
+
+    def to_representation(self, row):
+        job = row.job
+        organization = getattr(job.company, "organization", None)
+        return {
+            "id": job.id,
+            "job_title": job.title,
+            "job_created": job.job_posted,
+            "job_expiry": job.job_expiry,
+            "salary_min": job.salary_min,
+            "salary_max": job.salary_max,
+            "job_type": job.job_type,
+            "featured": job.featured,
+            "category": job.category.name if job.category else "",
+            "location": job.location,
+            "is_active": job.is_active,
+            "description": job.responsibilities,
+            "company_name": organization.current_company_name if organization else "",
+            "company_logo": media_url(organization.company_logo.name) if organization else "",
+        }
+
+
+class AppliedJobCardSerializer(JobCardSerializer):
+    row_fields = ["applied_date", "is_approved"]
+
+    def to_representation(self, row):
+        data = super().to_representation(row)
+        data["applied_date"] = row.applied_date
+        data["is_approved"] = row.is_approved
+        return data
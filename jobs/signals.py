@@ -0,0 +1,88 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from buguser.conditional import bump_versions, track_versions
+from buguser.models import BugOrganizationDetail
+
+from .membership import APPLIED, APPROVED, SAVED, update_membership
+from .models import BugJob, BugJobCategory, JobsApplied, JobSaved
+from .stats import invalidate_stats
+from .sync import schedule_sync
+
+# Sent once after a bulk approve/reject commits, with ``job_id`` and the
+# ``approved``/``rejected`` user ids. bulk_update sends no post_save, so
+# caches derived from applications listen to this instead.
+applications_decided = Signal()
+
+# Version stamps behind the ETags of the job views
+track_versions(BugJob, BugJobCategory, JobsApplied, JobSaved)
+
+
+@receiver(post_save, sender=BugJob)
+@receiver(post_delete, sender=BugJob)
+def sync_job(sender, instance, **kwargs):
+    schedule_sync([instance.id])
+
+
+@receiver(post_save, sender=BugJobCategory)
+def sync_category_jobs(sender, instance, created, **kwargs):
+    # Deleting a category cascades to its jobs, which sync themselves
+    if not created:
+        schedule_sync(instance.jobs.values_list("id", flat=True))
+
+
+@receiver(post_save, sender=BugOrganizationDetail)
+@receiver(post_delete, sender=BugOrganizationDetail)
+def sync_company_jobs(sender, instance, **kwargs):
+    # Job records carry the company name and logo
+    if instance.user_id:
+        schedule_sync(BugJob.objects.filter(company_id=instance.user_id).values_list("id", flat=True))
+
+
+@receiver(post_save, sender=BugJob)
+@receiver(post_delete, sender=BugJob)
+@receiver(post_save, sender=BugJobCategory)
+@receiver(post_delete, sender=BugJobCategory)
+def invalidate_job_stats(sender, **kwargs):
+    transaction.on_commit(invalidate_stats)
+
+
+@receiver(post_save, sender=JobsApplied)
+def cache_application(sender, instance, **kwargs):
+    applied, approved = f"{APPLIED}{instance.job_id}", f"{APPROVED}{instance.job_id}"
+    change = ([applied, approved], []) if instance.is_approved else ([applied], [approved])
+    transaction.on_commit(lambda: update_membership({instance.user_id: change}))
+
+
+@receiver(post_delete, sender=JobsApplied)
+def forget_application(sender, instance, **kwargs):
+    change = ([], [f"{APPLIED}{instance.job_id}", f"{APPROVED}{instance.job_id}"])
+    transaction.on_commit(lambda: update_membership({instance.user_id: change}))
+
+
+@receiver(post_save, sender=JobSaved)
+def cache_saved_job(sender, instance, **kwargs):
+    change = ([f"{SAVED}{instance.job_id}"], [])
+    transaction.on_commit(lambda: update_membership({instance.user_id: change}))
+
+
+@receiver(post_delete, sender=JobSaved)
+def forget_saved_job(sender, instance, **kwargs):
+    change = ([], [f"{SAVED}{instance.job_id}"])
+    transaction.on_commit(lambda: update_membership({instance.user_id: change}))
+
+
+@receiver(applications_decided)
+def cache_decisions(sender, job_id, approved, rejected, **kwargs):
+    # Already sent after commit
+    member = f"{APPROVED}{job_id}"
+    update_membership({
+        **{user_id: ([member], []) for user_id in approved},
+        **{user_id: ([], [member]) for user_id in rejected},
+    })
+
+
+@receiver(applications_decided)
+def bump_application_version(sender, **kwargs):
+    bump_versions(JobsApplied)
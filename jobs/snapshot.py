@@ -0,0 +1,267 @@
+"""
+In-process columnar snapshot of the live jobs, for filter-only searches.
+
+Each worker keeps the filterable fields of every live job in NumPy arrays:
+salary, experience and the posted/id ordering score as numbers, category,
+job type and location dictionary-encoded as ints. The filters of
+``JobSearchView`` become vectorized boolean masks, so a search without a
+title query is answered without a round trip to Redis or the database.
+
+The snapshot follows the change feed written by :func:`jobs.sync.sync_jobs`.
+At most every ``REFRESH_INTERVAL`` seconds it reads the ids of the jobs that
+changed since its last look and reloads only those rows.
+
+Enabled with ``settings.JOBS_SNAPSHOT_SEARCH``; title searches always use
+the Redis token index.
+"""
+
+import threading
+import time
+from datetime import date
+
+import numpy as np
+from django.utils import timezone
+
+from .codec import encode_record, record_dict
+from .keyspace import CHANGES_KEY
+from .search import (
+    EXPERIENCE_FACETS, FACET_FIELDS, SALARY_FACETS, SearchPage, parse_range, posted_score, read_facets,
+)
+from .sync import job_queryset, job_record
+
+REFRESH_INTERVAL = 5
+
+# Changes are re-read this far back, so a sync whose change number was
+# assigned before a later one but written after it is not missed
+CHANGE_OVERLAP = 100
+
+# Deleted rows are only dropped by a full rebuild, once they are this many
+# and at least half of the snapshot
+COMPACT_MIN_DEAD_ROWS = 1000
+
+CODED_FIELDS = ("category", "job_type", "location")
+
+
+def _pad(array, extra):
+    return np.concatenate([array, np.zeros(extra, dtype=array.dtype)])
+
+
+class JobSnapshot:
+    def __init__(self, records=(), version=0):
+        self.version = version
+        # Change numbers applied within the overlap window, by job id
+        self.applied = {}
+        self.codes = {field: {} for field in CODED_FIELDS}
+        self.rows = {}
+        self.blobs = []
+
+        size = len(records)
+        self.ids = np.zeros(size, dtype=np.int64)
+        self.scores = np.zeros(size, dtype=np.int64)
+        self.expiry = np.zeros(size, dtype=np.int32)
+        self.salary_min = np.zeros(size, dtype=np.float64)
+        self.experience = np.zeros(size, dtype=np.float64)
+        self.alive = np.ones(size, dtype=bool)
+        self.columns = {field: np.zeros(size, dtype=np.int32) for field in CODED_FIELDS}
+
+        for row, record in enumerate(records):
+            self.blobs.append(None)
+            self._set_row(row, record)
+
+    def _code(self, field, value):
+        codes = self.codes[field]
+        if value not in codes:
+            codes[value] = len(codes)
+        return codes[value]
+
+    def _set_row(self, row, record):
+        job_id = int(record["id"])
+        self.rows[job_id] = row
+        self.blobs[row] = encode_record(record)
+        self.ids[row] = job_id
+        self.scores[row] = posted_score(record["job_created"], job_id)
+        self.expiry[row] = date.fromisoformat(record["job_expiry"]).toordinal()
+        self.salary_min[row] = float(record["salary_min"] or 0)
+        self.experience[row] = float(record["experience"] or 0)
+        self.alive[row] = True
+        for field in CODED_FIELDS:
+            self.columns[field][row] = self._code(field, record[field])
+
+    def _grow(self, extra):
+        self.ids, self.scores, self.expiry = _pad(self.ids, extra), _pad(self.scores, extra), _pad(self.expiry, extra)
+        self.salary_min, self.experience = _pad(self.salary_min, extra), _pad(self.experience, extra)
+        self.alive = _pad(self.alive, extra)
+        self.columns = {field: _pad(column, extra) for field, column in self.columns.items()}
+        self.blobs.extend([None] * extra)
+
+    @property
+    def dead_rows(self):
+        return int(np.count_nonzero(~self.alive))
+
+    def pending_changes(self, changes):
+        """The ``(job_id, change)`` pairs of the feed this snapshot has not applied yet."""
+        return [
+            (int(job_id), int(change)) for job_id, change in changes
+            if change > self.version or self.applied.get(int(job_id)) != int(change)
+        ]
+
+    def apply(self, changes, records):
+        """
+        Return a copy of the snapshot with the jobs of ``changes`` replaced by
+        ``records`` (keyed by id); ids without a record are dropped. The copy
+        is swapped in whole, so concurrent searches keep reading a consistent
+        snapshot.
+        """
+        version = max([self.version, *(change for _, change in changes)])
+        snapshot = JobSnapshot(version=version)
+        snapshot.applied = {
+            job_id: change for job_id, change in [*self.applied.items(), *changes]
+            if change > version - CHANGE_OVERLAP
+        }
+        snapshot.codes = {field: dict(codes) for field, codes in self.codes.items()}
+        snapshot.rows = dict(self.rows)
+        snapshot.blobs = list(self.blobs)
+        snapshot.ids, snapshot.scores, snapshot.expiry = self.ids.copy(), self.scores.copy(), self.expiry.copy()
+        snapshot.salary_min, snapshot.experience = self.salary_min.copy(), self.experience.copy()
+        snapshot.alive = self.alive.copy()
+        snapshot.columns = {field: column.copy() for field, column in self.columns.items()}
+
+        new_ids = [job_id for job_id in records if job_id not in snapshot.rows]
+        if new_ids:
+            snapshot._grow(len(new_ids))
+            for offset, job_id in enumerate(new_ids):
+                snapshot.rows[job_id] = len(self.blobs) + offset
+
+        for job_id, _ in changes:
+            row = snapshot.rows.get(job_id)
+            if row is None:
+                continue
+            if job_id in records:
+                snapshot._set_row(row, records[job_id])
+            else:
+                snapshot.alive[row] = False
+                snapshot.blobs[row] = None
+        return snapshot
+
+    def _match_codes(self, field, values):
+        codes = [self.codes[field].get(str(value).lower()) for value in values]
+        return np.isin(self.columns[field], [code for code in codes if code is not None])
+
+    def _match_ranges(self, column, ranges):
+        matched = np.zeros(len(column), dtype=bool)
+        for low, high in filter(None, map(parse_range, ranges)):
+            matched |= (column >= float(low)) & (column <= float(high))
+        return matched
+
+    def facets(self, mask):
+        """Facet counts of the rows in ``mask``, one ``bincount`` per coded field."""
+        plan, counts = [], []
+        for field in FACET_FIELDS:
+            bins = np.bincount(self.columns[field][mask], minlength=len(self.codes[field]))
+            for value, code in self.codes[field].items():
+                plan.append((field, value))
+                counts.append(bins[code])
+        for facet, column, buckets in (
+            ("salary", self.salary_min[mask], SALARY_FACETS),
+            ("experience", self.experience[mask], EXPERIENCE_FACETS),
+        ):
+            for bucket in buckets:
+                low, high = parse_range(bucket)
+                plan.append((facet, bucket))
+                counts.append(np.count_nonzero((column >= float(low)) & (column <= float(high))))
+        return read_facets(plan, counts)
+
+    def search(
+        self, categories=(), salary_ranges=(), experience_levels=(), job_types=(),
+        limit=10, after=None, before=None, facets=False,
+    ):
+        """Same contract as :func:`jobs.search.search_jobs` without a title query."""
+        mask = self.alive & (self.expiry > timezone.localdate().toordinal())
+        if categories:
+            mask &= self._match_codes("category", categories)
+        if job_types:
+            mask &= self._match_codes("job_type", job_types)
+        if salary_ranges:
+            mask &= self._match_ranges(self.salary_min, salary_ranges)
+        if experience_levels:
+            mask &= self._match_ranges(self.experience, experience_levels)
+
+        total = int(np.count_nonzero(mask))
+        facet_counts = self.facets(mask) if facets else None
+        rows = np.flatnonzero(mask)
+        scores = self.scores[rows]
+        if before is not None:
+            rows = rows[scores > before]
+        elif after is not None:
+            rows = rows[scores < after]
+
+        # Only the page (plus one row to detect more) is ever sorted
+        count = min(limit + 1, len(rows))
+        scores = self.scores[rows]
+        if before is not None:
+            picked = rows[np.argpartition(scores, count - 1)[:count]] if count else rows[:0]
+            picked = picked[np.argsort(self.scores[picked])]
+        else:
+            picked = rows[np.argpartition(-scores, count - 1)[:count]] if count else rows[:0]
+            picked = picked[np.argsort(-self.scores[picked])]
+
+        has_more = len(picked) > limit
+        picked = picked[:limit]
+        if before is not None:
+            picked = picked[::-1]
+        if not len(picked):
+            return SearchPage(total, [], None, None, False, facet_counts)
+
+        jobs = [record_dict(self.blobs[row]) for row in picked]
+        return SearchPage(
+            total, jobs, int(self.scores[picked[0]]), int(self.scores[picked[-1]]), has_more, facet_counts
+        )
+
+
+def _latest_change(client):
+    latest = client.zrevrange(CHANGES_KEY, 0, 0, withscores=True)
+    return int(latest[0][1]) if latest else 0
+
+
+def _load_records(job_ids=None):
+    jobs = job_queryset().filter(job_expiry__gt=timezone.localdate())
+    if job_ids is not None:
+        jobs = jobs.filter(id__in=job_ids)
+    return {job.id: job_record(job) for job in jobs.iterator(chunk_size=1000)}
+
+
+_snapshot = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def get_snapshot(client):
+    """Return this worker's snapshot, building or refreshing it when due."""
+    global _snapshot, _checked_at
+
+    if _snapshot is not None and time.monotonic() - _checked_at < REFRESH_INTERVAL:
+        return _snapshot
+
+    with _lock:
+        if _snapshot is None:
+            # Read the feed position first so nothing changed during the load is skipped
+            version = _latest_change(client)
+            _snapshot = JobSnapshot(list(_load_records().values()), version)
+        elif time.monotonic() - _checked_at >= REFRESH_INTERVAL:
+            since = max(_snapshot.version - CHANGE_OVERLAP, 0)
+            changes = _snapshot.pending_changes(
+                client.zrangebyscore(CHANGES_KEY, f"({since}", "+inf", withscores=True)
+            )
+            if changes:
+                records = _load_records([job_id for job_id, _ in changes])
+                _snapshot = _snapshot.apply(changes, records)
+                if _snapshot.dead_rows > max(COMPACT_MIN_DEAD_ROWS, len(_snapshot.ids) // 2):
+                    # Mostly deleted rows by now, start over from the database
+                    version = _latest_change(client)
+                    _snapshot = JobSnapshot(list(_load_records().values()), version)
+        _checked_at = time.monotonic()
+    return _snapshot
+
+
+def search_jobs(client, **filters):
+    return get_snapshot(client).search(**filters)
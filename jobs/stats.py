@@ -0,0 +1,74 @@
+"""
+Job statistics for dashboards, globally or for one company.
+
+Totals come from one conditional aggregate and the per-category counts from
+one annotated ``GROUP BY``. Results are cached under a stats version that
+:func:`invalidate_stats` bumps whenever a job or category changes, so a
+cached entry is never served after the data it was computed from changed.
+"""
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .models import BugJob, BugJobCategory
+
+# Raw Redis counter, INCR creates it when missing
+STATS_VERSION_KEY = "jobs:stats:version"
+
+# Entries of superseded versions are never read again, this only bounds
+# how long they occupy memory
+STATS_TIMEOUT = 60 * 60
+
+GLOBAL_SCOPE = "global"
+
+
+def stats_version():
+    return int(cache.client.get_client().get(STATS_VERSION_KEY) or 0)
+
+
+def invalidate_stats():
+    cache.client.get_client().incr(STATS_VERSION_KEY)
+
+
+def compute_job_stats(company=None):
+    """Uncached job statistics, for the jobs of ``company`` or of everyone."""
+    jobs = BugJob.objects.all()
+    in_scope = Q()
+    if company is not None:
+        jobs = jobs.filter(company=company)
+        in_scope = Q(jobs__company=company)
+
+    totals = jobs.aggregate(
+        total_jobs=Count("id"),
+        active_jobs=Count("id", filter=Q(is_active=True)),
+    )
+    categories = BugJobCategory.objects.annotate(
+        job_count=Count("jobs", filter=in_scope),
+        active_job_count=Count("jobs", filter=in_scope & Q(jobs__is_active=True)),
+    ).order_by("id")
+
+    return {
+        "total_jobs": totals["total_jobs"],
+        "active_jobs": totals["active_jobs"],
+        "inactive_jobs": totals["total_jobs"] - totals["active_jobs"],
+        "categories": [
+            {
+                "id": category.id,
+                "name": category.name,
+                "job_count": category.job_count,
+                "active_job_count": category.active_job_count,
+            }
+            for category in categories
+        ],
+    }
+
+
+def job_stats(company=None):
+    """Cached :func:`compute_job_stats`."""
+    scope = GLOBAL_SCOPE if company is None else f"company:{getattr(company, 'pk', company)}"
+    key = f"job-stats:{stats_version()}:{scope}"
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_job_stats(company)
+        cache.set(key, stats, timeout=STATS_TIMEOUT)
+    return stats
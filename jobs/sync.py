@@ -0,0 +1,206 @@
+"""
+Incremental sync of the Redis job store.
+
+Model signals (see :mod:`jobs.signals`) only queue the ids of the jobs they
+touch. The queue is flushed into one background task once the surrounding
+transaction commits, so a request that saves the same job several times, or
+saves a category shared by many jobs, costs a single task push, and the
+worker syncs the whole set in one batched Redis round trip. Every job is stored as the single canonical
+record built by :func:`job_record`, in the binary format of :mod:`jobs.codec`.
+
+Records carry no TTL. Jobs that reach their expiry date are removed from
+Redis and deactivated in the database by :func:`sweep_expired_jobs`, run
+periodically through the ``sweep_expired_jobs`` management command.
+"""
+
+import logging
+import threading
+
+from buguser.conditional import bump_versions
+from buguser.taskqueue import task
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .autocomplete import add_title, remove_title
+from .codec import decode_record, encode_record
+from .detail import detail_version_key
+from .keyspace import CHANGE_COUNTER_KEY, CHANGES_KEY, LOADING_DIRTY_KEY, target_keyspaces
+from .models import BugJob
+from .search import index_job, unindex_job
+from .stats import invalidate_stats
+from .text_index import index_job_text, unindex_job_text
+
+logger = logging.getLogger(__name__)
+
+_pending = threading.local()
+
+# Expired job ids removed from Redis per sync_jobs call
+SWEEP_BATCH_SIZE = 500
+
+
+def job_queryset():
+    """Jobs with everything :func:`job_record` reads joined in."""
+    return BugJob.objects.select_related("company__organization", "category")
+
+
+def job_record(job):
+    """The canonical Redis record of a job, used by search results and indexes."""
+    organization = getattr(job.company, "organization", None)
+    company_name = organization.current_company_name if organization else ""
+    company_logo = ""
+    if organization and organization.company_logo:
+        company_logo = settings.WEB_URL + str(organization.company_logo.url)
+
+    return {
+        "id": job.id,
+        "title": job.title.lower(),
+        "category": job.category.name.lower() if job.category else "",
+        "job_created": job.job_posted.isoformat(),
+        "job_expiry": job.job_expiry.isoformat(),
+        "salary_min": str(job.salary_min),
+        "salary_max": str(job.salary_max),
+        "experience": str(job.experience),
+        "job_type": job.job_type.lower(),
+        "featured": job.featured,
+        "is_active": job.is_active,
+        "location": job.location.lower(),
+        "company_name": (company_name or "").lower(),
+        "company_logo": company_logo,
+        "description": (job.responsibilities or "").lower(),
+    }
+
+
+def write_job(client, pipe, job, keys, fresh=False):
+    """
+    Queue the record and all index entries of a live ``job`` into ``keys``.
+    ``fresh`` means the job is not in ``keys`` yet (bulk loads), which skips
+    the lookup of stale text index entries.
+    """
+    record = job_record(job)
+    # No TTL: expired jobs are removed from the record and every index
+    # together by sweep_expired_jobs
+    pipe.set(keys.job(job.id), encode_record(record))
+    index_job(client, record, pipeline=pipe, keys=keys)
+    index_job_text(client, job, pipeline=pipe, keys=keys, fresh=fresh)
+    return record
+
+
+def sync_jobs(client, job_ids, keyspaces=None):
+    """
+    Bring the Redis records and indexes of ``job_ids`` in line with the
+    database. Jobs that were deleted or have expired are removed.
+    """
+    job_ids = sorted({int(job_id) for job_id in job_ids})
+    if not job_ids:
+        return
+
+    keyspaces = keyspaces or target_keyspaces(client)
+    jobs = job_queryset().in_bulk(job_ids)
+    today = timezone.localdate()
+
+    pipe = client.pipeline(transaction=False)
+    for keys in keyspaces:
+        # The stored records tell which index entries have to be replaced
+        previous = client.mget([keys.job(job_id) for job_id in job_ids])
+        for job_id, blob in zip(job_ids, previous):
+            if blob is not None:
+                old = decode_record(blob)
+                unindex_job(client, old, pipeline=pipe, keys=keys)
+                remove_title(client, old["title"], pipeline=pipe, keys=keys)
+            unindex_job_text(client, job_id, pipeline=pipe, keys=keys)
+
+            job = jobs.get(job_id)
+            if job is None or job.job_expiry <= today:
+                pipe.delete(keys.job(job_id))
+                pipe.zrem(keys.expiry, job_id)
+                continue
+            write_job(client, pipe, job, keys, fresh=True)
+            add_title(client, job.title, pipeline=pipe, keys=keys)
+
+    # Not generation scoped: the change feed follows the database
+    change = client.incr(CHANGE_COUNTER_KEY)
+    pipe.zadd(CHANGES_KEY, {str(job_id): change for job_id in job_ids})
+
+    if len(keyspaces) > 1:
+        # A reload is in progress, it re-syncs these once its bulk copy is done
+        pipe.sadd(LOADING_DIRTY_KEY, *job_ids)
+    pipe.execute()
+
+
+def schedule_sync(job_ids):
+    """
+    Queue ``job_ids`` for syncing once the current transaction commits (or
+    right away in autocommit mode). Ids queued by several saves in the same
+    transaction are synced together.
+    """
+    pending = getattr(_pending, "job_ids", None)
+    if pending is None:
+        pending = _pending.job_ids = set()
+    pending.update(job_ids)
+    # Each registration flushes everything queued so far, so later ones are
+    # no-ops. Registering every time survives rolled back savepoints, which
+    # discard their own callbacks.
+    transaction.on_commit(flush_pending)
+
+
+def bump_job_versions(client, job_ids):
+    """
+    Invalidate the cached detail bodies of ``job_ids`` and bump the job
+    version stamp behind the ETags in one transaction, so an ETag handed out
+    after a change never validates a body cached before it.
+    """
+    pipe = client.pipeline()
+    for job_id in job_ids:
+        pipe.incr(detail_version_key(job_id))
+    bump_versions(BugJob, pipeline=pipe)
+    pipe.execute()
+
+
+def flush_pending():
+    job_ids = getattr(_pending, "job_ids", None)
+    if not job_ids:
+        return
+    _pending.job_ids = set()
+    job_ids = sorted(job_ids)
+    # The detail cache reads the database, so it is invalidated right away;
+    # only the Redis indexes wait for the worker
+    try:
+        bump_job_versions(cache.client.get_client(), job_ids)
+    except Exception:
+        logger.exception("Failed to bump the versions of jobs %s", job_ids)
+    sync_job_ids.delay(job_ids)
+
+
+@task(queue="jobs", max_retries=5)
+def sync_job_ids(job_ids):
+    sync_jobs(cache.client.get_client(), job_ids)
+
+
+def sweep_expired_jobs(client, batch_size=SWEEP_BATCH_SIZE):
+    """
+    Deactivate every job whose expiry date has been reached with one
+    ``UPDATE`` and drop the expired ones from Redis, taking their ids from
+    the expiry index of each target keyspace. Returns ``(deactivated, synced)``.
+    """
+    today = timezone.localdate()
+    job_ids = set()
+    for keys in target_keyspaces(client):
+        job_ids.update(int(job_id) for job_id in client.zrangebyscore(keys.expiry, "-inf", today.toordinal()))
+
+    expired = BugJob.objects.filter(is_active=True, job_expiry__lte=today)
+    expired_ids = list(expired.values_list("id", flat=True))
+    job_ids.update(expired_ids)
+    deactivated = expired.update(is_active=False)
+    if deactivated:
+        # update() sends no post_save
+        invalidate_stats()
+        bump_job_versions(client, expired_ids)
+
+    # sync_jobs re-reads the database, so a job whose expiry was extended
+    # meanwhile is re-indexed rather than dropped
+    job_ids = sorted(job_ids)
+    for start in range(0, len(job_ids), batch_size):
+        sync_jobs(client, job_ids[start:start + batch_size])
+    return deactivated, len(job_ids)
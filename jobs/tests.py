@@ -1 +1,559 @@
-# Create your tests here.
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.exceptions import NotFound
+from rest_framework.test import APIClient
+
+from buguser.conditional import model_versions
+from buguser.models import BugOrganizationDetail, BugUserDetail, User, UserCreationMethod, UserType
+from buguser.taskqueue import queue_key
+from buguser.testing import FakeRedisTestCase
+
+from .applicants import APPROVED, INVALID, NOT_FOUND, REJECTED, UNCHANGED, applicant_queryset, apply_decisions
+from .detail import detail_version_key
+from .keyspace import GENERATION_KEY, LOADING_DIRTY_KEY, LOADING_GENERATION_KEY, JobKeyspace
+from .models import BugJob, BugJobCategory, JobSaved, JobsApplied
+from .membership import job_membership
+from .pagination import NEXT, JobCursorPagination
+from .signals import applications_decided
+from .autocomplete import suggest
+from .codec import decode_record, encode_record, record_dict
+from .search import SORT_RELEVANCE, fetch_jobs, search_jobs
+from .sync import sync_jobs
+
+
+class JobCardQueryCountTests(TestCase):
+    """Saved/applied job lists must not issue queries per row."""
+
+    @classmethod
+    def setUpTestData(cls):
+        UserCreationMethod.objects.get_or_create(id=1, defaults={"name": "email"})
+        company_type, _ = UserType.objects.get_or_create(id=3, defaults={"name": "organization"})
+        candidate_type, _ = UserType.objects.get_or_create(id=2, defaults={"name": "candidate"})
+
+        cls.candidate = User.objects.create_user("candidate@example.com", True, candidate_type, password="secret")
+        cls.companies = []
+        for index in range(3):
+            company = User.objects.create_user(f"company{index}@example.com", True, company_type, password="secret")
+            BugOrganizationDetail.objects.create(
+                user=company, current_company_name=f"Company {index}", company_logo=f"company_logos/{index}.png"
+            )
+            cls.companies.append(company)
+        cls.categories = [BugJobCategory.objects.create(name=name) for name in ("Engineering", "Design")]
+
+    def add_jobs(self, count):
+        today = date.today()
+        for index in range(count):
+            job = BugJob.objects.create(
+                title=f"Job {index}",
+                company=self.companies[index % len(self.companies)],
+                category=self.categories[index % len(self.categories)] if index % 5 else None,
+                job_posted=today,
+                job_expiry=today + timedelta(days=30),
+                salary_min=1000,
+                salary_max=2000,
+                location="Remote",
+            )
+            JobsApplied.objects.create(job=job, user=self.candidate)
+            JobSaved.objects.create(job=job, user=self.candidate)
+
+    def assert_constant_queries(self, url_name):
+        client = APIClient()
+        client.force_authenticate(self.candidate)
+        url = reverse(url_name)
+
+        self.add_jobs(2)
+        with self.assertNumQueries(1):
+            response = client.get(url, {"page_size": 100})
+        self.assertEqual(len(response.json()["results"]), 2)
+
+        self.add_jobs(40)
+        with self.assertNumQueries(1):
+            response = client.get(url, {"page_size": 100})
+        results = response.json()["results"]
+        self.assertEqual(len(results), 42)
+        self.assertTrue(results[0]["company_logo"].endswith(".png"))
+
+    def test_applied_jobs_query_count(self):
+        self.assert_constant_queries("jobs-applied")
+
+    def test_saved_jobs_query_count(self):
+        self.assert_constant_queries("jobs-saved")
+
+
+class JobVersionTests(FakeRedisTestCase):
+    """A committed job change invalidates the detail cache together with the ETag stamp."""
+
+    @classmethod
+    def setUpTestData(cls):
+        UserCreationMethod.objects.get_or_create(id=1, defaults={"name": "email"})
+        company_type, _ = UserType.objects.get_or_create(id=3, defaults={"name": "organization"})
+        cls.company = User.objects.create_user("company@example.com", True, company_type, password="secret")
+
+    def test_detail_version_is_bumped_before_the_sync_runs(self):
+        today = date.today()
+        job = BugJob.objects.create(
+            title="Backend Engineer", company=self.company, job_posted=today,
+            job_expiry=today + timedelta(days=30), salary_min=1000, salary_max=2000, location="Remote",
+        )
+        (stamp,), _ = model_versions([BugJob])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            job.title = "Senior Backend Engineer"
+            job.save()
+
+        self.assertEqual(self.redis.get(detail_version_key(job.id)), b"1")
+        (new_stamp,), _ = model_versions([BugJob])
+        self.assertGreater(new_stamp, stamp)
+        # The index sync is still waiting for the worker
+        self.assertEqual(self.redis.llen(queue_key("jobs")), 1)
+        self.assertFalse(self.redis.exists(JobKeyspace().job(job.id)))
+
+
+class RedisJobStoreTestCase(FakeRedisTestCase):
+    """Jobs written to the database and synced into an empty Redis job store."""
+
+    @classmethod
+    def setUpTestData(cls):
+        UserCreationMethod.objects.get_or_create(id=1, defaults={"name": "email"})
+        company_type, _ = UserType.objects.get_or_create(id=3, defaults={"name": "organization"})
+        cls.company = User.objects.create_user("company@example.com", True, company_type, password="secret")
+        BugOrganizationDetail.objects.create(user=cls.company, current_company_name="Acme")
+        cls.engineering = BugJobCategory.objects.create(name="Engineering")
+        cls.design = BugJobCategory.objects.create(name="Design")
+
+    def add_job(self, title, days_ago=0, expires_in=30, **fields):
+        today = date.today()
+        fields = {
+            "category": self.engineering, "salary_min": 1000, "salary_max": 2000, "location": "Remote",
+            "job_type": "Full-time", **fields,
+        }
+        job = BugJob.objects.create(
+            title=title, company=self.company, job_posted=today - timedelta(days=days_ago),
+            job_expiry=today + timedelta(days=expires_in), **fields,
+        )
+        sync_jobs(self.redis, [job.id])
+        return job
+
+    def search(self, **filters):
+        page = search_jobs(self.redis, **filters)
+        return page.total, [job["id"] for job in page.jobs]
+
+
+class SearchExpiryTests(RedisJobStoreTestCase):
+    """Expired jobs are left out of searches before the sweeper runs, and dead ids leave every index."""
+
+    def test_expired_jobs_are_excluded_before_the_sweep(self):
+        lasting = self.add_job("Backend Engineer", expires_in=30)
+        self.add_job("Frontend Engineer", expires_in=5)
+        self.assertEqual(self.search()[0], 2)
+
+        later = date.today() + timedelta(days=10)
+        with mock.patch("jobs.search.timezone.localdate", return_value=later):
+            self.assertEqual(self.search(), (1, [lasting.id]))
+            self.assertEqual(self.search(categories=["engineering"]), (1, [lasting.id]))
+            self.assertEqual(self.search(title="engineer"), (1, [lasting.id]))
+            page = search_jobs(self.redis, facets=True)
+        self.assertEqual(page.facets["category"], [{"value": "engineering", "count": 1}])
+
+    def test_missing_records_are_dropped_from_every_index(self):
+        job = self.add_job("Backend Engineer", skills="python")
+        keys = JobKeyspace()
+        self.redis.delete(keys.job(job.id))
+
+        self.assertEqual(self.search(title="python"), (1, []))
+
+        member = str(job.id)
+        for key in (keys.posted, keys.salary_min, keys.experience, keys.expiry):
+            self.assertIsNone(self.redis.zscore(key, member), key)
+        for field, value in (("category", "engineering"), ("job_type", "full-time"), ("location", "remote")):
+            self.assertFalse(self.redis.sismember(keys.set(field, value), member), field)
+        self.assertIsNone(self.redis.zscore(keys.token("python"), member))
+        self.assertFalse(self.redis.exists(keys.doc(job.id)))
+        self.assertEqual(self.search(title="python"), (0, []))
+
+
+class LoadJobsTests(RedisJobStoreTestCase):
+    """A reload swaps in a complete generation, and a failed one leaves nothing behind."""
+
+    def test_reload_swaps_generations(self):
+        job = self.add_job("Backend Engineer")
+        call_command("load_jobs_to_redis", stdout=StringIO())
+
+        self.assertEqual(self.redis.get(GENERATION_KEY), b"1")
+        self.assertFalse(self.redis.exists(LOADING_GENERATION_KEY))
+        self.assertEqual(self.redis.keys(f"{JobKeyspace().root}:*"), [])
+        self.assertEqual(self.search(), (1, [job.id]))
+
+    def test_failed_reload_drops_the_loading_generation(self):
+        job = self.add_job("Backend Engineer")
+        with mock.patch("jobs.management.commands.load_jobs_to_redis.write_job", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                call_command("load_jobs_to_redis", stdout=StringIO())
+
+        self.assertFalse(self.redis.exists(LOADING_GENERATION_KEY, LOADING_DIRTY_KEY))
+        self.assertEqual(self.redis.keys(f"{JobKeyspace(1).root}:*"), [])
+        self.assertEqual(self.search(), (1, [job.id]))
+
+    def test_keyspaces_hash_by_generation(self):
+        self.assertEqual(len({JobKeyspace(1), JobKeyspace("1"), JobKeyspace(2)}), 2)
+
+
+class ApplicantSearchTests(TestCase):
+    """Every search word must prefix the first or last name, case-insensitively."""
+
+    @classmethod
+    def setUpTestData(cls):
+        UserCreationMethod.objects.get_or_create(id=1, defaults={"name": "email"})
+        company_type, _ = UserType.objects.get_or_create(id=3, defaults={"name": "organization"})
+        candidate_type, _ = UserType.objects.get_or_create(id=2, defaults={"name": "candidate"})
+        company = User.objects.create_user("company@example.com", True, company_type, password="secret")
+        today = date.today()
+        cls.job = BugJob.objects.create(
+            title="Job", company=company, job_posted=today, job_expiry=today + timedelta(days=30),
+            salary_min=1000, salary_max=2000, location="Remote",
+        )
+        cls.applicants = {}
+        for first, last in (("Ann", "Lee"), ("Annabel", "Smith"), ("Leo", "Annan"), ("émile", "zola"), ("Jo_e", "100%")):
+            user = User.objects.create_user(f"{first}.{last}@example.com", True, candidate_type, password="secret")
+            BugUserDetail.objects.create(user=user, first_name=first, last_name=last)
+            JobsApplied.objects.create(job=cls.job, user=user)
+            cls.applicants[first] = user.id
+
+    def names(self, search_term):
+        ids = applicant_queryset(self.job.id, search_term).values_list("user_id", flat=True)
+        return {name for name, user_id in self.applicants.items() if user_id in ids}
+
+    def test_prefix_of_first_or_last_name(self):
+        self.assertEqual(self.names("ann"), {"Ann", "Annabel", "Leo"})
+        self.assertEqual(self.names("ANN lee"), {"Ann"})
+        self.assertEqual(self.names("nabel"), set())
+
+    def test_non_ascii_names(self):
+        self.assertEqual(self.names("émi"), {"émile"})
+        self.assertEqual(self.names("ZOL"), {"émile"})
+
+    def test_wildcards_are_literal(self):
+        self.assertEqual(self.names("%"), set())
+        self.assertEqual(self.names("jo_"), {"Jo_e"})
+        self.assertEqual(self.names("j_"), set())
+        self.assertEqual(self.names("100%"), {"Jo_e"})
+
+
+class JobSearchTests(RedisJobStoreTestCase):
+    """Filters intersect inside Redis, titles match through the token index, titles autocomplete."""
+
+    def test_unfiltered_search_is_newest_first(self):
+        older = self.add_job("Backend Engineer", days_ago=3)
+        newer = self.add_job("Frontend Engineer", days_ago=1)
+        self.assertEqual(self.search(), (2, [newer.id, older.id]))
+
+    def test_filters_intersect_and_values_union(self):
+        match = self.add_job("Backend Engineer", salary_min=50000, experience=4)
+        self.add_job("Frontend Engineer", salary_min=50000, experience=1)
+        self.add_job("Designer", category=self.design, salary_min=50000, experience=4)
+        part_time = self.add_job("Support Engineer", job_type="Part-time", salary_min=20000, experience=4)
+
+        self.assertEqual(
+            self.search(categories=["Engineering"], salary_ranges=["30000-60000"], experience_levels=["3-5"]),
+            (1, [match.id]),
+        )
+        total, ids = self.search(job_types=["full-time", "part-time"], experience_levels=["3-5"])
+        self.assertEqual(total, 3)
+        self.assertIn(part_time.id, ids)
+        self.assertEqual(self.search(categories=["marketing"]), (0, []))
+
+    def test_title_tokens_prefixes_and_skills(self):
+        backend = self.add_job("Senior Python Developer", skills="django, postgres")
+        frontend = self.add_job("React Developer", skills="javascript")
+
+        self.assertEqual(self.search(title="python developer"), (1, [backend.id]))
+        self.assertEqual(self.search(title="pyth"), (1, [backend.id]))
+        self.assertEqual(self.search(title="django"), (1, [backend.id]))
+        self.assertEqual(self.search(title="developer")[0], 2)
+        self.assertEqual(self.search(title="the and"), (0, []))
+        self.assertEqual(self.search(title="react", categories=["design"]), (0, []))
+        self.assertEqual(self.search(title="react"), (1, [frontend.id]))
+
+    def test_relevance_ranks_title_hits_first(self):
+        in_title = self.add_job("Python Engineer", days_ago=5)
+        in_skills = self.add_job("Backend Engineer", days_ago=1, skills="python")
+        self.assertEqual(self.search(title="python")[1], [in_skills.id, in_title.id])
+        self.assertEqual(self.search(title="python", sort=SORT_RELEVANCE)[1], [in_title.id, in_skills.id])
+
+    def test_updates_replace_index_entries(self):
+        job = self.add_job("Python Developer")
+        job.title, job.category = "Go Developer", self.design
+        job.save()
+        sync_jobs(self.redis, [job.id])
+
+        self.assertEqual(self.search(title="python"), (0, []))
+        self.assertEqual(self.search(title="go", categories=["design"]), (1, [job.id]))
+        self.assertEqual(self.search(categories=["engineering"]), (0, []))
+
+        job_id = job.id
+        job.delete()
+        sync_jobs(self.redis, [job_id])
+        self.assertEqual(self.search(), (0, []))
+
+    def test_autocomplete_counts_live_jobs(self):
+        first = self.add_job("Python Developer")
+        self.add_job("Python Developer")
+        self.add_job("Senior Python Developer")
+
+        self.assertEqual(suggest(self.redis, "pyth"), [("python developer", 2), ("senior python developer", 1)])
+        self.assertEqual(suggest(self.redis, "dev", limit=1), [("python developer", 2)])
+        self.assertEqual(suggest(self.redis, "senior python developer"), [("senior python developer", 1)])
+        self.assertEqual(suggest(self.redis, "  "), [])
+
+        first_id = first.id
+        first.delete()
+        sync_jobs(self.redis, [first_id])
+        self.assertEqual(dict(suggest(self.redis, "python d")), {"python developer": 1, "senior python developer": 1})
+
+    def test_fetch_jobs_keeps_order_and_drops_missing_records(self):
+        first, second = self.add_job("Backend Engineer"), self.add_job("Frontend Engineer")
+        keys = JobKeyspace()
+        self.redis.delete(keys.job(first.id))
+
+        jobs = fetch_jobs(self.redis, [second.id, first.id])
+        self.assertEqual([job["id"] for job in jobs], [second.id])
+        self.assertIsNone(self.redis.zscore(keys.posted, str(first.id)))
+        self.assertEqual(fetch_jobs(self.redis, []), [])
+
+    def test_search_view_pages_with_cursors(self):
+        jobs = [self.add_job(f"Engineer {index}", days_ago=index) for index in range(3)]
+        client = APIClient()
+
+        response = client.post(reverse("search-job"), {"page_size": 2, "facets": True}, format="json")
+        body = response.json()
+        self.assertEqual(body["count"], 3)
+        self.assertEqual([job["id"] for job in body["results"]], [jobs[0].id, jobs[1].id])
+        self.assertEqual(body["facets"]["category"], [{"value": "engineering", "count": 3}])
+
+        response = client.post(reverse("search-job"), {"page_size": 2, "cursor": body["next"]}, format="json")
+        body = response.json()
+        self.assertEqual([job["id"] for job in body["results"]], [jobs[2].id])
+        self.assertIsNone(body["next"])
+
+        response = client.post(reverse("search-job"), {"page_size": 2, "cursor": body["previous"]}, format="json")
+        self.assertEqual([job["id"] for job in response.json()["results"]], [jobs[0].id, jobs[1].id])
+
+    def test_search_view_rejects_cursors_of_another_sort(self):
+        self.add_job("Python Engineer")
+        self.add_job("Python Developer")
+        client = APIClient()
+        body = client.post(reverse("search-job"), {"title": "python", "page_size": 1}, format="json").json()
+
+        response = client.post(
+            reverse("search-job"), {"title": "python", "page_size": 1, "sort": SORT_RELEVANCE, "cursor": body["next"]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class JobCursorPaginationTests(TestCase):
+    """Keyset pages over (job_posted, id) stay exact across ties and reject forged cursors."""
+
+    @classmethod
+    def setUpTestData(cls):
+        UserCreationMethod.objects.get_or_create(id=1, defaults={"name": "email"})
+        company_type, _ = UserType.objects.get_or_create(id=3, defaults={"name": "organization"})
+        company = User.objects.create_user("company@example.com", True, company_type, password="secret")
+        today = date.today()
+        # Three jobs share each posted date
+        for index in range(7):
+            BugJob.objects.create(
+                title=f"Job {index}", company=company, job_posted=today - timedelta(days=index // 3),
+                job_expiry=today + timedelta(days=30), salary_min=1000, salary_max=2000, location="Remote",
+            )
+        cls.expected = list(BugJob.objects.order_by("-job_posted", "-id").values_list("id", flat=True))
+
+    def page(self, cursor=None, page_size=2):
+        params = {"page_size": page_size}
+        if cursor:
+            params["cursor"] = cursor
+        jobs, next_cursor, previous_cursor = JobCursorPagination().paginate_queryset(BugJob.objects.all(), params)
+        return [job.id for job in jobs], next_cursor, previous_cursor
+
+    def test_next_pages_cover_every_job_once(self):
+        seen, cursor, pages = [], None, []
+        while True:
+            ids, cursor, previous = self.page(cursor)
+            seen.extend(ids)
+            pages.append((ids, previous))
+            if cursor is None:
+                break
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(len(pages), 4)
+        self.assertIsNone(pages[0][1])
+        self.assertTrue(all(previous for _, previous in pages[1:]))
+
+    def test_previous_walks_back_across_ties(self):
+        _, cursor, _ = self.page()
+        _, cursor, _ = self.page(cursor)
+        ids, _, previous = self.page(cursor)
+        self.assertEqual(ids, self.expected[4:6])
+
+        ids, next_cursor, previous = self.page(previous)
+        self.assertEqual(ids, self.expected[2:4])
+        self.assertIsNotNone(next_cursor)
+        ids, _, previous = self.page(previous)
+        self.assertEqual(ids, self.expected[0:2])
+        self.assertIsNone(previous)
+
+    def test_invalid_cursors_are_rejected(self):
+        paginator = JobCursorPagination()
+        forged = [
+            "not base64!",
+            paginator.encode_cursor({"p": "2024-01-01", "i": 1}, "x"),
+            paginator.encode_cursor({"p": "yesterday", "i": 1}, NEXT),
+            paginator.encode_cursor({"i": 1}, NEXT),
+            paginator.encode_cursor({"p": "2024-01-01", "i": "one"}, NEXT),
+            "WzEsMl0=",  # a JSON list
+        ]
+        for cursor in forged:
+            with self.subTest(cursor=cursor), self.assertRaises(NotFound):
+                self.page(cursor)
+
+    def test_page_size_is_bounded(self):
+        paginator = JobCursorPagination()
+        self.assertEqual(paginator.get_page_size({"page_size": "0"}), 1)
+        self.assertEqual(paginator.get_page_size({"page_size": "1000"}), paginator.max_page_size)
+        self.assertEqual(paginator.get_page_size({"page_size": "ten"}), paginator.page_size)
+
+
+class JobCodecTests(TestCase):
+    """Records survive the binary round trip in the shape the API returns."""
+
+    def record(self, **fields):
+        return {
+            "id": 42, "title": "développeur backend 🚀", "category": "engineering",
+            "job_created": "2024-10-01", "job_expiry": "2024-11-30",
+            "salary_min": Decimal("12345.67"), "salary_max": "99999.99", "experience": "2.5",
+            "job_type": "full-time", "featured": True, "is_active": False, "location": "zürich",
+            "company_name": "ÆØÅ oy", "company_logo": "https://example.com/logo.png",
+            "description": "Écrire du code — beaucoup.", **fields,
+        }
+
+    def test_round_trip(self):
+        decoded = record_dict(encode_record(self.record()))
+        self.assertEqual(decoded, {
+            **self.record(), "salary_min": "12345.67", "salary_max": "99999.99", "experience": "2.5",
+        })
+
+    def test_none_fields(self):
+        decoded = record_dict(encode_record(self.record(
+            category=None, company_logo=None, description=None, salary_max=None, experience=None, featured=None,
+        )))
+        self.assertEqual(
+            [decoded[field] for field in ("category", "company_logo", "description", "salary_max", "experience")],
+            ["", "", "", "0.00", "0.0"],
+        )
+        self.assertIs(decoded["featured"], False)
+
+    def test_fields_decode_lazily(self):
+        record = decode_record(encode_record(self.record()))
+        self.assertEqual((record.id, record.job_expiry), (42, date(2024, 11, 30)))
+        self.assertEqual(record["location"], "zürich")
+        self.assertEqual(record.description, "Écrire du code — beaucoup.")
+        self.assertIsNone(record.get("missing"))
+        with self.assertRaises(KeyError):
+            record["missing"]
+
+    def test_legacy_json_records(self):
+        legacy = {"id": 7, "title": "old", "category": "design"}
+        self.assertEqual(record_dict(json.dumps(legacy).encode("utf-8")), legacy)
+
+
+class ApplicationDecisionTests(FakeRedisTestCase):
+    """Bulk decisions lock and update the applications in batches and announce the change after commit."""
+
+    @classmethod
+    def setUpTestData(cls):
+        UserCreationMethod.objects.get_or_create(id=1, defaults={"name": "email"})
+        company_type, _ = UserType.objects.get_or_create(id=3, defaults={"name": "organization"})
+        candidate_type, _ = UserType.objects.get_or_create(id=2, defaults={"name": "candidate"})
+        cls.company = User.objects.create_user("company@example.com", True, company_type, password="secret")
+        today = date.today()
+        cls.job = BugJob.objects.create(
+            title="Job", company=cls.company, job_posted=today, job_expiry=today + timedelta(days=30),
+            salary_min=1000, salary_max=2000, location="Remote",
+        )
+        cls.users = []
+        for index in range(5):
+            user = User.objects.create_user(f"candidate{index}@example.com", True, candidate_type, password="secret")
+            JobsApplied.objects.create(job=cls.job, user=user, is_approved=index in (0, 4))
+            cls.users.append(user.id)
+        cls.outsider = User.objects.create_user("outsider@example.com", True, candidate_type, password="secret")
+
+    def test_outcomes_and_batched_writes(self):
+        first, second, third, fourth, fifth = self.users
+        decisions = [
+            {"user_id": first, "is_approved": True},
+            {"user_id": second, "is_approved": True},
+            {"user_id": third, "is_approved": True},
+            {"user_id": str(fourth), "is_approved": False},
+            {"user_id": fifth, "is_approved": True},
+            {"user_id": fifth, "is_approved": False},
+            {"user_id": self.outsider.id, "is_approved": True},
+            {"user_id": "x", "is_approved": True},
+            {"user_id": second, "is_approved": "yes"},
+            "nonsense",
+        ]
+        received = []
+
+        def receiver(sender, **kwargs):
+            received.append(kwargs)
+
+        applications_decided.connect(receiver)
+        self.addCleanup(applications_decided.disconnect, receiver)
+
+        # Savepoint, three batched SELECT ... FOR UPDATE, one UPDATE, release
+        with mock.patch("jobs.applicants.DECISION_LOOKUP_BATCH", 2), self.assertNumQueries(6):
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                outcomes = apply_decisions(self.job, decisions)
+                self.assertEqual(received, [])
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual([outcome["status"] for outcome in outcomes], [
+            UNCHANGED, APPROVED, APPROVED, UNCHANGED, REJECTED, REJECTED, NOT_FOUND, INVALID, INVALID, INVALID,
+        ])
+        self.assertEqual(
+            set(JobsApplied.objects.filter(job=self.job, is_approved=True).values_list("user_id", flat=True)),
+            {first, second, third},
+        )
+        self.assertEqual(len(received), 1)
+        self.assertEqual((received[0]["job_id"], sorted(received[0]["approved"]), received[0]["rejected"]),
+                         (self.job.id, [second, third], [fifth]))
+
+    def test_receivers_update_cached_membership(self):
+        user = User.objects.get(pk=self.users[0])
+        self.assertTrue(job_membership(user, [self.job.id])[self.job.id]["is_approved"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_decisions(self.job, [{"user_id": user.id, "is_approved": False}])
+        self.assertFalse(job_membership(user, [self.job.id])[self.job.id]["is_approved"])
+
+    def test_no_change_sends_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            apply_decisions(self.job, [{"user_id": self.users[1], "is_approved": False}])
+        self.assertEqual(callbacks, [])
+
+    def test_view_is_limited_to_the_job_owner(self):
+        client = APIClient()
+        client.force_authenticate(self.outsider)
+        url = reverse("job-applicants-decisions", args=[self.job.id])
+        decisions = {"decisions": [{"user_id": self.users[1], "is_approved": True}]}
+        self.assertEqual(client.post(url, decisions, format="json").status_code, 404)
+
+        client.force_authenticate(self.company)
+        response = client.post(url, decisions, format="json")
+        self.assertEqual(response.json()["updated"], 1)
+        self.assertEqual(client.post(url, {"decisions": {}}, format="json").status_code, 400)
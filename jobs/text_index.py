@@ -0,0 +1,136 @@
+"""
+Inverted token index for job full-text matching.
+
+Tokens from ``title``, ``skills`` and ``responsibilities`` map to sorted sets
+of job ids scored by field weight (a title hit counts more than a hit in the
+responsibilities). Title and skill tokens are also indexed by prefix so that
+``"pyth"`` finds ``"python"``. Each job keeps a forward set of the index keys
+it was written to, which makes updates and deletes exact.
+"""
+
+import re
+import uuid
+
+from .keyspace import TMP_PREFIX, VERSION_KEY, current_keyspace
+
+FIELD_WEIGHTS = {"title": 3, "skills": 2, "responsibilities": 1}
+# Only short, high-signal fields get prefix entries
+PREFIX_FIELDS = ("title", "skills")
+MIN_PREFIX_LENGTH = 2
+
+# An exact token hit ranks above a prefix hit of the same field
+EXACT_WEIGHT = 2
+PREFIX_WEIGHT = 1
+
+MAX_QUERY_TERMS = 8
+
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "in", "is", "it",
+    "of", "on", "or", "the", "to", "with",
+}
+
+# Keeps tech names such as "c++", "c#" and "node.js" intact
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+
+def tokenize(text):
+    """Split ``text`` into normalized, de-duplicated tokens (order preserved)."""
+    if not text:
+        return []
+    tokens = []
+    for token in TOKEN_RE.findall(str(text).lower()):
+        token = token.rstrip(".")
+        if token and token not in STOP_WORDS and token not in tokens:
+            tokens.append(token)
+    return tokens
+
+
+def job_token_weights(job):
+    """
+    Return ``(tokens, prefixes)`` for a job, each a mapping of term to the
+    summed weight of the fields it appears in.
+    """
+    tokens = {}
+    prefixes = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        for token in tokenize(getattr(job, field, "")):
+            tokens[token] = tokens.get(token, 0) + weight
+            if field in PREFIX_FIELDS:
+                for end in range(MIN_PREFIX_LENGTH, len(token)):
+                    prefix = token[:end]
+                    prefixes[prefix] = max(prefixes.get(prefix, 0), weight)
+    return tokens, prefixes
+
+
+def index_job_text(client, job, pipeline=None, keys=None, fresh=False):
+    """
+    (Re)index the text fields of ``job`` (a ``BugJob`` or any object with
+    ``id``, ``title``, ``skills`` and ``responsibilities`` attributes).
+    ``fresh`` skips the lookup of previous entries when ``keys`` is a
+    generation that is being built from scratch.
+    """
+    keys = keys or current_keyspace(client)
+    pipe = pipeline if pipeline is not None else client.pipeline(transaction=False)
+
+    # Forget whatever the previous version of the job was indexed under
+    if not fresh:
+        unindex_job_text(client, job.id, pipeline=pipe, keys=keys)
+    pipe.incr(VERSION_KEY)
+
+    tokens, prefixes = job_token_weights(job)
+    written = []
+    for token, weight in tokens.items():
+        written.append(keys.token(token))
+        pipe.zadd(written[-1], {str(job.id): weight})
+    for prefix, weight in prefixes.items():
+        written.append(keys.token_prefix(prefix))
+        pipe.zadd(written[-1], {str(job.id): weight})
+    if written:
+        pipe.sadd(keys.doc(job.id), *written)
+
+    if pipeline is None:
+        pipe.execute()
+
+
+def unindex_job_text(client, job_id, pipeline=None, keys=None):
+    """Remove a job from every token and prefix set it was indexed in."""
+    keys = keys or current_keyspace(client)
+    written = client.smembers(keys.doc(job_id))
+    pipe = pipeline if pipeline is not None else client.pipeline(transaction=False)
+    for key in written:
+        pipe.zrem(key, str(job_id))
+    pipe.delete(keys.doc(job_id))
+    pipe.incr(VERSION_KEY)
+    if pipeline is None:
+        pipe.execute()
+
+
+def store_text_matches(pipe, keys, query, tmp_keys):
+    """
+    Queue commands on ``pipe`` that store the jobs matching every term of
+    ``query`` in a temporary sorted set scored by relevance, and return that
+    key. Returns ``None`` when the query has no searchable terms.
+    """
+    terms = tokenize(query)[:MAX_QUERY_TERMS]
+    if not terms:
+        return None
+
+    term_keys = []
+    for term in terms:
+        term_tmp = f"{TMP_PREFIX}:{uuid.uuid4().hex}"
+        pipe.zunionstore(
+            term_tmp,
+            {keys.token(term): EXACT_WEIGHT, keys.token_prefix(term): PREFIX_WEIGHT},
+            aggregate="MAX",
+        )
+        term_keys.append(term_tmp)
+    tmp_keys.extend(term_keys)
+
+    if len(term_keys) == 1:
+        return term_keys[0]
+
+    target = f"{TMP_PREFIX}:{uuid.uuid4().hex}"
+    tmp_keys.append(target)
+    pipe.zinterstore(target, term_keys, aggregate="SUM")
+    return target
+
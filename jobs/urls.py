@@ -1,10 +1,11 @@
 from django.urls import path
-from .views import JobCreateView, JobDetailView, JobSearchView, JobAppliedCreateView, JobSavedCreateView, JobCategoryView, GetJobStats, ChangeJobStatus, JobListView, JobUnSaveCreateView, ApplicantsListView, JobsAppliedView, JobsSavedView, JobCategoryCountView
+from .views import JobCreateView, JobDetailView, JobSearchView, JobAppliedCreateView, JobSavedCreateView, JobCategoryView, GetJobStats, ChangeJobStatus, JobListView, JobUnSaveCreateView, ApplicantsListView, ApplicantsExportView, ApplicantsDecisionView, JobsAppliedView, JobsSavedView, JobCategoryCountView, JobAutocompleteView
 
 urlpatterns = [
     path("", JobCreateView.as_view(), name="create-job"),
     path("list/<str:slug>/", JobListView.as_view(), name="job-list"),
     path("search/", JobSearchView.as_view(), name="search-job"),
+    path("autocomplete/", JobAutocompleteView.as_view(), name="job-autocomplete"),
     path("<int:pk>/", JobDetailView.as_view(), name="job-detail"),
     path("apply/", JobAppliedCreateView.as_view(), name="apply-job"),
     path("save/", JobSavedCreateView.as_view(), name="save-job"),
@@ -13,6 +14,8 @@ urlpatterns = [
     path("stats/", GetJobStats.as_view(), name="job-stats"),
     path("status/", ChangeJobStatus.as_view(), name="change-job-status"),
     path("applicants/<int:pk>/", ApplicantsListView.as_view(), name="job-applicants"),
+    path("applicants/<int:pk>/decisions/", ApplicantsDecisionView.as_view(), name="job-applicants-decisions"),
+    path("applicants/<int:pk>/export/", ApplicantsExportView.as_view(), name="job-applicants-export"),
     path("applied/", JobsAppliedView.as_view(), name="jobs-applied"),
     path("saved/", JobsSavedView.as_view(), name="jobs-saved"),
     path("categories/", JobCategoryCountView.as_view(), name="job-category-count"),
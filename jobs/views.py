@@ -5,20 +5,33 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.core.cache import cache
 from django.utils import timezone
 from .models import BugJob, JobsApplied, JobSaved, BugJobCategory
-from .serializers import JobSerializer, JobAppliedSerializer, JobSavedSerializer, JobCategorySerializer
+from .serializers import JobSerializer, JobAppliedSerializer, JobSavedSerializer, JobCategorySerializer, JobCardSerializer, AppliedJobCardSerializer
+from .search import search_jobs, SORT_RECENT, SORT_RELEVANCE
+from .autocomplete import suggest, DEFAULT_LIMIT
+from .sync import job_record
+from . import snapshot
+from .stats import job_stats
+from .membership import annotate_jobs, job_membership
+from .detail import job_detail
+from buguser.conditional import ConditionalGetMixin
 import json
 from datetime import datetime, date
 from django.utils import timezone
 from buguser.models import BugUserDetail
 from django.conf import settings
 from django.db.models import Q
-from django.forms.models import model_to_dict
+from django.http import StreamingHttpResponse
 
 
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 
-from rest_framework.pagination import PageNumberPagination
+from .pagination import JobCursorPagination, JobCardPagination, ApplicantPagination, NEXT, PREVIOUS
+from .applicants import (
+    applicant_queryset, applicant_row, apply_decisions, parse_flag, stream_csv, stream_ndjson,
+    APPROVED, REJECTED, UNCHANGED, NOT_FOUND, INVALID, MAX_DECISIONS,
+)
+from rest_framework.exceptions import NotFound
 
 
 
@@ -53,41 +66,9 @@ class JobCreateView(APIView):
             # Create the job instance, passing the user as the company
             job = serializer.save(company=user)
 
-            company_name = job.company.organization.current_company_name
-            company_logo = settings.WEB_URL + str(job.company.organization.company_logo.url)
-
-            # Prepare the job data
-            job_data = {
-                "id": job.id,
-                "title": job.title.lower(),
-                "job_created": job.job_posted.isoformat(),
-                "job_expiry": job.job_expiry.isoformat(),
-                "salary_min": str(job.salary_min),
-                "salary_max": str(job.salary_max),
-                "job_type": job.job_type,
-                "featured": job.featured,
-                "company_name": company_name,
-                "company_logo": company_logo,
-                "description": job.responsibilities.lower()
-            }
-
-            # Convert job.job_expiry to datetime and make it timezone aware
-            job_expiry_datetime = datetime.combine(job.job_expiry, datetime.min.time())
-            job_expiry_aware = timezone.make_aware(job_expiry_datetime, timezone.get_current_timezone())
-
-            # Calculate the expiry time in seconds
-            current_time = timezone.now()
-            expiry_seconds = int((job_expiry_aware - current_time).total_seconds())
-
-            if expiry_seconds > 0:
-                redis_client = cache.client.get_client()
-
-                # Store job in Redis (Django's cache framework) with an expiry time
-                job_key = f"job:{job.id}"
-                redis_client.set(job_key, json.dumps(job_data), ex=expiry_seconds)
-
-                # Add the job title to a Redis set for quick searching
-                redis_client.sadd("job_titles", job.title.lower())
+            # The job is written to the Redis search store by the post_save
+            # sync once the request's transaction commits
+            job_data = job_record(job)
 
             return Response(
                 {"msg": "BugJob Created Successfully", "job": job_data},
@@ -102,13 +83,6 @@ class JobCreateView(APIView):
     
 
 
-class JobPagination(PageNumberPagination):
-    page_size = 10  # Default number of items per page
-    page_query_param = "page"
-    page_size_query_param = "page_size"
-    max_page_size = 100
-
-
 class JobSearchView(APIView):
 
     @swagger_auto_schema(
@@ -118,8 +92,8 @@ class JobSearchView(APIView):
                 "title": openapi.Schema(
                     type=openapi.TYPE_STRING, description="Title to search"
                 ),
-                "page": openapi.Schema(
-                    type=openapi.TYPE_INTEGER, description="Page number", default=1
+                "cursor": openapi.Schema(
+                    type=openapi.TYPE_STRING, description="Opaque cursor from a previous response's next/previous"
                 ),
                 "page_size": openapi.Schema(
                     type=openapi.TYPE_INTEGER,
@@ -138,8 +112,16 @@ class JobSearchView(APIView):
                 "jobType": openapi.Schema(
                     type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING), description="List of job types"
                 ),
+                "sort": openapi.Schema(
+                    type=openapi.TYPE_STRING, enum=[SORT_RECENT, SORT_RELEVANCE], default=SORT_RECENT,
+                    description="Order results by posting date or by title/skills relevance"
+                ),
+                "facets": openapi.Schema(
+                    type=openapi.TYPE_BOOLEAN, default=False,
+                    description="Also return category, job type, salary and experience counts for the whole result"
+                ),
             },
-            required=["page", "page_size"],
+            required=["page_size"],
         ),
         responses={
             200: openapi.Response(
@@ -165,6 +147,9 @@ class JobSearchView(APIView):
                             ),
                             "job_type": openapi.Schema(type=openapi.TYPE_STRING),
                             "featured": openapi.Schema(type=openapi.TYPE_BOOLEAN),
+                            "applied": openapi.Schema(type=openapi.TYPE_BOOLEAN),
+                            "saved": openapi.Schema(type=openapi.TYPE_BOOLEAN),
+                            "is_approved": openapi.Schema(type=openapi.TYPE_BOOLEAN),
                         },
                     ),
                 ),
@@ -178,75 +163,111 @@ class JobSearchView(APIView):
         salary_ranges = request.data.get("salaryRange", [])
         experience_levels = request.data.get("experienceLevel", [])
         job_types = request.data.get("jobType", [])
+        sort = request.data.get("sort", SORT_RECENT)
+        with_facets = str(request.data.get("facets", "")).lower() in ("1", "true")
+
+        # Get pagination parameters (body first, query string as fallback)
+        params = {**request.query_params.dict(), **request.data}
+        paginator = JobCursorPagination()
+        page_size = paginator.get_page_size(params)
+        cursor = paginator.decode_cursor(params)
+        if cursor is not None and (not isinstance(cursor.get("s"), int) or cursor.get("o") != sort):
+            return Response(
+                {"detail": paginator.invalid_cursor_message}, status=status.HTTP_404_NOT_FOUND
+            )
 
-        # Get pagination parameters
-        page = request.data.get("page", 1)
-        page_size = request.data.get("page_size", 10)
-
-        # Fetch jobs from Redis or database (assuming Redis is used)
+        filters = {
+            "categories": categories,
+            "salary_ranges": salary_ranges,
+            "experience_levels": experience_levels,
+            "job_types": job_types,
+            "limit": page_size,
+            "facets": with_facets,
+            "after": cursor["s"] if cursor and cursor["d"] == NEXT else None,
+            "before": cursor["s"] if cursor and cursor["d"] == PREVIOUS else None,
+        }
         redis_client = cache.client.get_client()
-        job_keys = redis_client.keys("job:*")
-
-        # Use a pipeline to batch Redis calls
-        pipeline = redis_client.pipeline()
-        for job_key in job_keys:
-            pipeline.get(job_key)
-        job_data_list = pipeline.execute()
-
-        # Initialize matching jobs
-        matching_jobs = []
-
-        # Filter through the jobs
-        for job_data in job_data_list:
-            job_data = json.loads(job_data.decode("utf-8"))
-            job_title = job_data.get("title", "").lower()
-            job_category = job_data.get("category", "").lower()
-            job_salary_min = float(job_data.get("salary_min", 0))
-            job_salary_max = float(job_data.get("salary_max", 0))
-            job_experience = float(job_data.get("experience", 0))
-            job_type_data = job_data.get("job_type", "").lower()
-            job_company_name = job_data.get("created_by", {}).get("company_name", "").lower()
-            job_company_logo = job_data.get("created_by", {}).get("company_logo", "").lower()
-            job_description = job_data.get("description", "").lower()
-
-            # Salary filtering logic
-            valid_salary = False
-            for salary_range in salary_ranges:
-                try:
-                    min_salary, max_salary = map(float, salary_range.split("-"))
-                    if min_salary <= job_salary_min <= max_salary:
-                        valid_salary = True
-                        break
-                except ValueError:
-                    valid_salary = False  # Invalid salary range format
-
-            # Check filters
-            if (
-                (not search_query or search_query in job_title)
-                and (not categories or job_category in [cat.lower() for cat in categories])
-                and (valid_salary or not salary_ranges)  # If no salary range provided, skip filtering
-                and (not experience_levels or any(exp_level.lower() in job_data.get("experience", "").lower() for exp_level in experience_levels))
-                and (not job_types or job_type_data in [jt.lower() for jt in job_types])
-            ):
-                matching_jobs.append(job_data)
+        if settings.JOBS_SNAPSHOT_SEARCH and not search_query.strip():
+            # Vectorized filtering over this worker's in-memory snapshot
+            page = snapshot.search_jobs(redis_client, **filters)
+        else:
+            # Filter and order inside Redis; only the requested page is fetched
+            page = search_jobs(redis_client, title=search_query, sort=sort, **filters)
+
+        next_cursor = previous_cursor = None
+        if page.jobs:
+            backwards = cursor is not None and cursor["d"] == PREVIOUS
+            if page.has_more or backwards:
+                next_cursor = paginator.encode_cursor({"s": page.last_score, "o": sort}, NEXT)
+            if (page.has_more and backwards) or (cursor is not None and not backwards):
+                previous_cursor = paginator.encode_cursor({"s": page.first_score, "o": sort}, PREVIOUS)
+
+        annotate_jobs(request.user, page.jobs)
+
+        response = {
+            "count": page.total,
+            "next": next_cursor,
+            "previous": previous_cursor,
+            "results": page.jobs,
+        }
+        if with_facets:
+            response["facets"] = page.facets
+        return Response(response, status=status.HTTP_200_OK)
 
-        # Sort jobs by job_created
-        matching_jobs.sort(key=lambda x: x.get("job_created"), reverse=True)
 
-        # Apply pagination
-        paginator = JobPagination()
-        paginator.page_size = page_size
-        paginated_jobs = paginator.paginate_queryset(matching_jobs, request)
 
-        # Return the paginated response
-        return paginator.get_paginated_response(paginated_jobs)
 
+class JobAutocompleteView(APIView):
 
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                "q", openapi.IN_QUERY, description="Title prefix to complete", type=openapi.TYPE_STRING, required=True
+            ),
+            openapi.Parameter(
+                "limit", openapi.IN_QUERY, description="Maximum number of suggestions", type=openapi.TYPE_INTEGER, default=DEFAULT_LIMIT
+            ),
+        ],
+        responses={
+            200: openapi.Response(
+                "Title suggestions ranked by live job count",
+                openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        properties={
+                            "title": openapi.Schema(type=openapi.TYPE_STRING),
+                            "job_count": openapi.Schema(type=openapi.TYPE_INTEGER),
+                        },
+                    ),
+                ),
+            )
+        },
+    )
+    def get(self, request, format=None):
+        query = request.query_params.get("q", "")
+        try:
+            limit = int(request.query_params.get("limit", DEFAULT_LIMIT))
+        except ValueError:
+            return Response(
+                {"detail": "limit must be an integer."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        redis_client = cache.client.get_client()
+        suggestions = [
+            {"title": title, "job_count": job_count}
+            for title, job_count in suggest(redis_client, query, limit)
+        ]
+        return Response(suggestions, status=status.HTTP_200_OK)
 
 
-class JobDetailView(APIView):
+class JobDetailView(ConditionalGetMixin, APIView):
     # Set default permission classes for all methods
     permission_classes = [IsAuthenticated]
+    # The body carries the user's applied/saved/is_approved flags
+    version_models = (BugJob, BugJobCategory, JobsApplied, JobSaved)
+    vary_on_user = True
 
     def get_permissions(self):
         """
@@ -273,53 +294,15 @@ class JobDetailView(APIView):
 
     def get(self, request, pk, format=None):
 
-        try:
-            job = BugJob.objects.get(pk=pk)
-        except BugJob.DoesNotExist:
+        # Shared body from the read-through cache
+        job = job_detail(pk)
+        if job is None:
             return Response(
                 {"error": "BugJob not found"}, status=status.HTTP_404_NOT_FOUND
             )
-        
-        # check whether Job is applied or not
-        job_applied = JobsApplied.objects.filter(job__id=pk, user=request.user.id).exists()
-
-        # check whether Job is saved or not
-        job_saved = JobSaved.objects.filter(job=job, user=request.user.id).exists()
-
-        serializer = model_to_dict(job)
-        serializer["category"] = job.category.name.title() if job.category else ""
-        serializer["applied"] = job_applied
-        serializer["saved"] = job_saved
-        serializer["is_approved"] = JobsApplied.objects.filter(job=job, user=request.user).first().is_approved if job_applied else False
 
-        # Calculate the expiry time in seconds
-        current_time = timezone.now()
-
-        # Convert job_expiry to datetime if it's a date
-        if isinstance(job.job_expiry, date) and not isinstance(job.job_expiry, datetime):
-            job_expiry_datetime = datetime.combine(job.job_expiry, datetime.min.time(), tzinfo=current_time.tzinfo)
-        else:
-            job_expiry_datetime = job.job_expiry
-
-        expiry_seconds = int((job_expiry_datetime - current_time).total_seconds())
-
-        job_data = {
-                "id": job.id,
-                "title": job.title.lower(),
-                "job_created": job.job_posted.isoformat(),
-                "job_expiry": job.job_expiry.isoformat(),
-                "salary_min": str(job.salary_min),
-                "salary_max": str(job.salary_max),
-                "job_type": job.job_type,
-                "featured": job.featured,
-                "category": job.category.name.lower() if job.category else "",
-            }
-
-        if expiry_seconds > 0:
-            # Save in Redis with the new expiry time
-            cache.set(
-                f"job:{job.id}", job_data, timeout=expiry_seconds
-            )
+        # applied/saved/is_approved from the user's membership set
+        serializer = {**job, **job_membership(request.user, [pk])[pk]}
 
         return Response(serializer, status=status.HTTP_200_OK)
 
@@ -353,7 +336,7 @@ class JobDetailView(APIView):
             return Response(
                 {"error": "BugJob not found"}, status=status.HTTP_404_NOT_FOUND
             )
-        
+
         if 'is_active' in request.data:
             job.is_active = request.data.get('is_active')
             job.save()
@@ -362,16 +345,6 @@ class JobDetailView(APIView):
             serializer.is_valid(raise_exception=True)
             serializer.save()
 
-        # Calculate the expiry time in seconds
-        current_time = timezone.now()
-        expiry_seconds = int((job.job_expiry - current_time).total_seconds())
-
-        if expiry_seconds > 0:
-            # Update the job data in Redis
-            cache.set(
-                f"job:{job.id}", json.dumps(serializer.data), timeout=expiry_seconds
-            )
-
         return Response(
             {"msg": "BugJob Updated Successfully"}, status=status.HTTP_200_OK
         )
@@ -398,9 +371,6 @@ class JobDetailView(APIView):
 
         job.delete()
 
-        # Remove job from Redis
-        cache.delete(f"job:{pk}")
-
         return Response(
             {"msg": "BugJob Deleted Successfully"}, status=status.HTTP_204_NO_CONTENT
         )
@@ -560,7 +530,8 @@ class JobUnSaveCreateView(APIView):
             {"msg": "Job Unsaved Successfully"}, status=status.HTTP_200_OK)
 
 
-class JobCategoryView(APIView):
+class JobCategoryView(ConditionalGetMixin, APIView):
+    version_models = (BugJobCategory,)
 
     @swagger_auto_schema(
         responses={
@@ -634,14 +605,6 @@ class ChangeJobStatus(APIView):
         job.is_active = status == "active"
         job.save()
 
-        # find the job from redis and update the is_active
-        job_key = f"job:{job_id}"
-        job_data = cache.get(job_key)
-        if job_data:
-            job_data = json.loads(job_data)
-            job_data["is_active"] = job.is_active
-            cache.set(job_key, json.dumps(job_data))
-
         return Response(
             {"msg": f"Job status updated to {status}"},
             status=status.HTTP_200_OK
@@ -660,30 +623,49 @@ class GetJobStats(APIView):
                         "total_jobs": openapi.Schema(type=openapi.TYPE_INTEGER),
                         "active_jobs": openapi.Schema(type=openapi.TYPE_INTEGER),
                         "inactive_jobs": openapi.Schema(type=openapi.TYPE_INTEGER),
+                        "categories": openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(
+                                type=openapi.TYPE_OBJECT,
+                                properties={
+                                    "id": openapi.Schema(type=openapi.TYPE_INTEGER),
+                                    "name": openapi.Schema(type=openapi.TYPE_STRING),
+                                    "job_count": openapi.Schema(type=openapi.TYPE_INTEGER),
+                                    "active_job_count": openapi.Schema(type=openapi.TYPE_INTEGER),
+                                },
+                            ),
+                        ),
                     },
                 ),
             )
         },
+        manual_parameters=[
+            openapi.Parameter(
+                "scope", openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=["company", "global"], default="company",
+                description="Statistics of the requesting company's jobs or of all jobs",
+            ),
+        ],
     )
     def get(self, request, format=None):
-        user = request.user
-        total_jobs = BugJob.objects.filter(company=user).count()
-        active_jobs = BugJob.objects.filter(company=user, is_active=True).count()
-        inactive_jobs = BugJob.objects.filter(company=user, is_active=False).count()
+        if request.query_params.get("scope") == "global":
+            stats = job_stats()
+        else:
+            stats = job_stats(company=request.user)
 
-        return Response(
-            {
-                "total_jobs": total_jobs,
-                "active_jobs": active_jobs,
-                "inactive_jobs": inactive_jobs,
-            },
-            status=status.HTTP_200_OK,
-        )
+        return Response(stats, status=status.HTTP_200_OK)
     
 
 class JobListView(APIView):
 
     @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                "cursor", openapi.IN_QUERY, description="Opaque cursor from a previous response's next/previous", type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                "page_size", openapi.IN_QUERY, description="Number of items per page", type=openapi.TYPE_INTEGER, default=JobCursorPagination.page_size
+            ),
+        ],
         responses={
             status.HTTP_200_OK: openapi.Response(
                 "List of jobs",
@@ -738,14 +720,20 @@ class JobListView(APIView):
             # Example: Filter by category, location, etc.
             category = request.query_params.get('category', None)
             if category:
-                jobs = jobs.filter(category__iexact=category.lower())
+                jobs = jobs.filter(category__name__iexact=category.lower())
 
             location = request.query_params.get('location', None)
             if location:
                 jobs = jobs.filter(location__iexact=location.lower())
 
+            # Keyset pagination on (job_posted, id), newest first
+            paginator = JobCursorPagination()
+            page, next_cursor, previous_cursor = paginator.paginate_queryset(
+                jobs, request.query_params
+            )
+
             response_dict = []
-            for job in jobs:
+            for job in page:
                 job_data = {
                     "id": job.id,
                     "title": job.title.lower(),
@@ -759,8 +747,13 @@ class JobListView(APIView):
                     "is_active": job.is_active,
                 }
                 response_dict.append(job_data)
-            return Response(response_dict, status=status.HTTP_200_OK)
+            return Response(
+                {"next": next_cursor, "previous": previous_cursor, "results": response_dict},
+                status=status.HTTP_200_OK,
+            )
 
+        except NotFound:
+            raise
         except Exception as e:
             print(e)
             # Log the exception as needed
@@ -813,147 +806,204 @@ class JobListView(APIView):
 class ApplicantsListView(APIView):
     permission_classes = [IsAuthenticated]
 
-    from django.db.models import Q
+    @swagger_auto_schema(
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                "searchTerm": openapi.Schema(
+                    type=openapi.TYPE_STRING, description="Prefix of the applicant's first and/or last name"
+                ),
+                "isApproved": openapi.Schema(
+                    type=openapi.TYPE_BOOLEAN, description="Only approved (true) or pending (false) applicants"
+                ),
+            },
+        ),
+        manual_parameters=[
+            openapi.Parameter(
+                "cursor", openapi.IN_QUERY, description="Cursor from a previous response's next/previous link", type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                "page_size", openapi.IN_QUERY, description="Number of items per page", type=openapi.TYPE_INTEGER, default=ApplicantPagination.page_size
+            ),
+        ],
+    )
+    def post(self, request, pk, format=None):
+        # Applications, users and their details come from one joined query
+        job_applied = applicant_queryset(
+            pk,
+            search_term=request.data.get("searchTerm", ""),
+            is_approved=parse_flag(request.data.get("isApproved")),
+        )
+
+        paginator = ApplicantPagination()
+        page = paginator.paginate_queryset(job_applied, request, view=self)
+        return paginator.get_paginated_response([applicant_row(job) for job in page])
+
 
+class ApplicantsDecisionView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                "decisions": openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        properties={
+                            "user_id": openapi.Schema(type=openapi.TYPE_INTEGER),
+                            "is_approved": openapi.Schema(type=openapi.TYPE_BOOLEAN),
+                        },
+                    ),
+                    description=f"Up to {MAX_DECISIONS} approve/reject decisions",
+                ),
+            },
+            required=["decisions"],
+        ),
+        responses={
+            status.HTTP_200_OK: openapi.Response(
+                "Outcome per decision",
+                openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        "updated": openapi.Schema(type=openapi.TYPE_INTEGER),
+                        "results": openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(
+                                type=openapi.TYPE_OBJECT,
+                                properties={
+                                    "user_id": openapi.Schema(type=openapi.TYPE_INTEGER),
+                                    "status": openapi.Schema(
+                                        type=openapi.TYPE_STRING,
+                                        enum=[APPROVED, REJECTED, UNCHANGED, NOT_FOUND, INVALID],
+                                    ),
+                                },
+                            ),
+                        ),
+                    },
+                ),
+            ),
+        },
+    )
     def post(self, request, pk, format=None):
-        # Get the search term from the query params
-        search_term = request.data.get('searchTerm', "")
+        # Only the company that posted the job decides on its applicants
+        try:
+            job = BugJob.objects.get(pk=pk, company=request.user)
+        except BugJob.DoesNotExist:
+            return Response({"detail": "BugJob not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        # Filter applicants by job id and search term using Q objects
-        job_applied = JobsApplied.objects.filter(
-            Q(job__id=pk) & 
-            Q(user__buguserdetail__first_name__icontains=search_term)
-        )
+        decisions = request.data.get("decisions")
+        if not isinstance(decisions, list):
+            return Response({"detail": "decisions must be a list"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(decisions) > MAX_DECISIONS:
+            return Response(
+                {"detail": f"At most {MAX_DECISIONS} decisions per request"}, status=status.HTTP_400_BAD_REQUEST
+            )
 
-        response_dict = []
-
-        for job in job_applied:
-            # Fetch BugUserDetail for the user
-            try:
-                bug_user_detail = BugUserDetail.objects.get(user=job.user)
-            except BugUserDetail.DoesNotExist:
-                bug_user_detail = None
-
-            # Construct the response for each applicant
-            job_data = {
-                "id": job.id,
-                "job_id": job.job.id,
-                "job_title": job.job.title,
-                "applied_date": job.applied_date,
-                "is_approved": job.is_approved,
-                "user": {
-                    "id": job.user.id,
-                    "email": job.user.email,
-                    "first_name": bug_user_detail.first_name if bug_user_detail else None,
-                    "last_name": bug_user_detail.last_name if bug_user_detail else None,
-                    "position": bug_user_detail.position if bug_user_detail else None,
-                    "dob": bug_user_detail.dob if bug_user_detail else None,
-                    "country": bug_user_detail.country if bug_user_detail else None,
-                    "city": bug_user_detail.city if bug_user_detail else None,
-                    "address": bug_user_detail.address if bug_user_detail else None,
-                    "phone": bug_user_detail.phone if bug_user_detail else None,
-                    "profile_pic": settings.WEB_URL + str(bug_user_detail.profile_pic.url) if bug_user_detail and bug_user_detail.profile_pic else None,
-                    "gender": bug_user_detail.gender if bug_user_detail else None,
-                    "about_me": bug_user_detail.about_me if bug_user_detail else None,
-                }
-            }
-            response_dict.append(job_data)
+        results = apply_decisions(job, decisions)
+        updated = len({result["user_id"] for result in results if result["status"] in (APPROVED, REJECTED)})
+        return Response({"updated": updated, "results": results}, status=status.HTTP_200_OK)
 
-        return Response(response_dict, status=status.HTTP_200_OK)
+
+class ApplicantsExportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    export_formats = {
+        "csv": (stream_csv, "text/csv", "csv"),
+        "ndjson": (stream_ndjson, "application/x-ndjson", "ndjson"),
+    }
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                "output", openapi.IN_QUERY, type=openapi.TYPE_STRING, enum=["csv", "ndjson"], default="csv",
+                description="Export format",
+            ),
+            openapi.Parameter(
+                "searchTerm", openapi.IN_QUERY, type=openapi.TYPE_STRING, description="Prefix of the applicant's first and/or last name"
+            ),
+            openapi.Parameter(
+                "isApproved", openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN, description="Only approved (true) or pending (false) applicants"
+            ),
+        ],
+    )
+    def get(self, request, pk, format=None):
+        # Only the company that posted the job may export its applicants
+        if not BugJob.objects.filter(pk=pk, company=request.user).exists():
+            return Response({"detail": "BugJob not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        output = request.query_params.get("output", "csv")
+        if output not in self.export_formats:
+            return Response(
+                {"detail": "Invalid output. Must be 'csv' or 'ndjson'"}, status=status.HTTP_400_BAD_REQUEST
+            )
+        stream, content_type, extension = self.export_formats[output]
+
+        job_applied = applicant_queryset(
+            pk,
+            search_term=request.query_params.get("searchTerm", ""),
+            is_approved=parse_flag(request.query_params.get("isApproved")),
+        ).order_by("-id")
+
+        # Rows are written as they are read, the export is never held in memory
+        response = StreamingHttpResponse(stream(job_applied), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="job-{pk}-applicants.{extension}"'
+        return response
+
+
+JOB_CARD_PAGE_PARAMETERS = [
+    openapi.Parameter(
+        "cursor", openapi.IN_QUERY, description="Cursor from a previous response's next/previous link", type=openapi.TYPE_STRING
+    ),
+    openapi.Parameter(
+        "page_size", openapi.IN_QUERY, description="Number of items per page", type=openapi.TYPE_INTEGER, default=JobCardPagination.page_size
+    ),
+]
 
 
 class JobsAppliedView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @swagger_auto_schema(manual_parameters=JOB_CARD_PAGE_PARAMETERS)
     def get(self, request, format=None):
-
-        # Filter jobs applied by user and search term using Q objects
-        job_applied = JobsApplied.objects.filter(
-            Q(user=request.user)
+        # One query for the page, whatever the number of applications
+        job_applied = AppliedJobCardSerializer.setup_queryset(
+            JobsApplied.objects.filter(user=request.user)
         )
 
-        response_dict = []
-
-        for job in job_applied:
-            # Construct the response for each job applied
-            job_data = {
-                "id": job.job.id,
-                "job_title": job.job.title,
-                "job_created": job.job.job_posted,
-                "job_expiry": job.job.job_expiry,
-                "salary_min": job.job.salary_min,
-                "salary_max": job.job.salary_max,
-                "job_type": job.job.job_type,
-                "featured": job.job.featured,
-                "category": job.job.category.name if job.job.category else "",
-                "location": job.job.location,
-                "is_active": job.job.is_active,
-                "description": job.job.responsibilities,
-                "applied_date": job.applied_date,
-                "is_approved": job.is_approved,
-                "company_name": job.job.company.organization.current_company_name,
-                "company_logo": settings.WEB_URL + str(job.job.company.organization.company_logo.url),
-            }
-            response_dict.append(job_data)
+        paginator = JobCardPagination()
+        page = paginator.paginate_queryset(job_applied, request, view=self)
+        return paginator.get_paginated_response(AppliedJobCardSerializer(page, many=True).data)
 
-        return Response(response_dict, status=status.HTTP_200_OK)
-    
 
 class JobsSavedView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @swagger_auto_schema(manual_parameters=JOB_CARD_PAGE_PARAMETERS)
     def get(self, request, format=None):
-
-        # Filter jobs saved by user
-        job_saved = JobSaved.objects.filter(
-            Q(user=request.user)
+        job_saved = JobCardSerializer.setup_queryset(
+            JobSaved.objects.filter(user=request.user)
         )
 
-        response_dict = []
-
-        for job in job_saved:
-            # Construct the response for each job saved
-            job_data = {
-                "id": job.job.id,
-                "job_title": job.job.title,
-                "job_created": job.job.job_posted,
-                "job_expiry": job.job.job_expiry,
-                "salary_min": job.job.salary_min,
-                "salary_max": job.job.salary_max,
-                "job_type": job.job.job_type,
-                "featured": job.job.featured,
-                "category": job.job.category.name if job.job.category else "",
-                "location": job.job.location,
-                "is_active": job.job.is_active,
-                "description": job.job.responsibilities,
-                "company_name": job.job.company.organization.current_company_name,
-                "company_logo": settings.WEB_URL + str(job.job.company.organization.company_logo.url),
-            }
-            response_dict.append(job_data)
+        paginator = JobCardPagination()
+        page = paginator.paginate_queryset(job_saved, request, view=self)
+        return paginator.get_paginated_response(JobCardSerializer(page, many=True).data)
 
-        return Response(response_dict, status=status.HTTP_200_OK)
-    
 
-
-class JobCategoryCountView(APIView):
+class JobCategoryCountView(ConditionalGetMixin, APIView):
+    version_models = (BugJob, BugJobCategory)
 
     def get(self, request, format=None):
-        # Fetch all job categories
-        job_categories = BugJobCategory.objects.all()
-
-        response_dict = []
-
-        for category in job_categories:
-            # Count the number of jobs in each category
-            job_count = BugJob.objects.filter(category=category).count()
-
-            # Construct the response for each category
-            category_data = {
-                "id": category.id,
-                "name": category.name,
-                "job_count": job_count,
+        # Counted in one grouped query and cached until jobs change
+        response_dict = [
+            {
+                "id": category["id"],
+                "name": category["name"],
+                "job_count": category["job_count"],
             }
-            response_dict.append(category_data)
+            for category in job_stats()["categories"]
+        ]
 
         return Response(response_dict, status=status.HTTP_200_OK)
     
\ No newline at end of file
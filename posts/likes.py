@@ -0,0 +1,68 @@
+"""
+Like toggles for posts and comments.
+
+A toggle never loads the likers: it deletes the ``(object, user)`` row of the
+through table, which doubles as the existence check on its unique index, and
+inserts it when there was nothing to delete. The counter column moves by one
+with an ``F()`` update in the same transaction and the new count is read back
+from it, so a post with 100k likes costs the same as one with none.
+"""
+
+from django.db import IntegrityError, transaction
+
+from buguser.counters import decrement, increment
+
+from .models import Comment, Post
+from .signals import comment_likes, liked, post_likes
+
+COUNTERS = {Post: post_likes, Comment: comment_likes}
+
+# Ids accepted per type by the "did I like these" lookup
+MAX_LIKED_LOOKUP = 200
+
+
+def _link(model, pk, user_id):
+    field = model.likes.field
+    return {f"{field.m2m_field_name()}_id": pk, f"{field.m2m_reverse_field_name()}_id": user_id}
+
+
+def toggle_like(model, pk, user):
+    """Like or unlike ``model`` row ``pk`` for ``user``; returns ``(liked, like_count)``."""
+    counter = COUNTERS[model]
+    through = model.likes.through
+    link = _link(model, pk, user.pk)
+
+    with transaction.atomic():
+        deleted, _ = through.objects.filter(**link).delete()
+        if deleted:
+            decrement(counter, [pk])
+            now_liked = False
+        else:
+            try:
+                with transaction.atomic():
+                    through.objects.create(**link)
+            except IntegrityError:
+                # A concurrent toggle of the same user inserted it first
+                pass
+            else:
+                increment(counter, [pk])
+            now_liked = True
+
+        like_count = model.objects.filter(pk=pk).values_list(counter.field, flat=True).get()
+        transaction.on_commit(
+            lambda: liked.send(sender=model, instance_id=pk, user_id=user.pk, liked=now_liked)
+        )
+    return now_liked, like_count
+
+
+def liked_ids(model, user, ids):
+    """The ids among ``ids`` whose ``model`` row ``user`` has liked, in one indexed query."""
+    ids = list(ids)[:MAX_LIKED_LOOKUP]
+    if not ids or not user.is_authenticated:
+        return []
+    field = model.likes.field
+    return list(
+        model.likes.through.objects.filter(
+            **{f"{field.m2m_reverse_field_name()}_id": user.pk, f"{field.m2m_field_name()}_id__in": ids}
+        ).values_list(f"{field.m2m_field_name()}_id", flat=True)
+    )
@@ -0,0 +1,77 @@
+# Generated by Django 5.0.3 on 2026-10-18 13:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def backfill_threads(apps, schema_editor):
+    Comment = apps.get_model("posts", "Comment")
+    parents = dict(Comment.objects.values_list("id", "reply_id"))
+
+    paths = {}
+
+    def path_of(comment_id):
+        # Walk up to the first ancestor whose path is known, then back down
+        chain = []
+        while comment_id is not None and comment_id not in paths and comment_id not in chain:
+            chain.append(comment_id)
+            comment_id = parents.get(comment_id)
+        prefix = paths.get(comment_id, "")
+        for ancestor in reversed(chain):
+            if len(prefix) + 11 > 255:
+                # Deeper than the column allows: kept at the deepest level
+                prefix = prefix[:-11]
+            prefix = paths[ancestor] = prefix + "{:010d}/".format(ancestor)
+        return prefix
+
+    batch = []
+    for comment in Comment.objects.only("id").order_by("id").iterator(chunk_size=BATCH_SIZE):
+        comment.path = path_of(comment.id)
+        comment.root_id = int(comment.path[:10])
+        batch.append(comment)
+        if len(batch) >= BATCH_SIZE:
+            Comment.objects.bulk_update(batch, ["path", "root_id"])
+            batch = []
+    if batch:
+        Comment.objects.bulk_update(batch, ["path", "root_id"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0005_comment_like_count_post_comment_count_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="comment",
+            name="path",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.AddField(
+            model_name="comment",
+            name="root",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="thread",
+                to="posts.comment",
+            ),
+        ),
+        migrations.RunPython(backfill_threads, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(fields=["root", "path"], name="comment_thread_path_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                condition=models.Q(("reply__isnull", True)),
+                fields=["post", "-id"],
+                name="comment_post_roots_idx",
+            ),
+        ),
+    ]
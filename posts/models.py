@@ -1,10 +1,56 @@
 from django.db import models
+from django.db.models import F, Prefetch, Q, Window
+from django.db.models.functions import RowNumber
+from buguser.counters import CounterFieldsMixin
 from buguser.models import User
 
 # Create your models here.
 
+# A comment's path is the zero padded ids of its ancestors and itself, so
+# sorting a thread by path lists it depth first
+PATH_SEGMENT = "{:010d}/"
+PATH_STEP = len(PATH_SEGMENT.format(0))
+PATH_MAX_LENGTH = 255
 
-class Post(models.Model):
+
+def path_segment(pk):
+    return PATH_SEGMENT.format(pk)
+
+
+class CommentQuerySet(models.QuerySet):
+    def for_display(self):
+        """Comments with their author, author details and like ids loaded up front."""
+        return self.select_related("user__buguserdetail").prefetch_related(
+            Prefetch("likes", queryset=User.objects.only("id"))
+        )
+
+
+class PostQuerySet(models.QuerySet):
+    def for_feed(self, comment_limit=None):
+        """
+        Posts with everything ``PostSerializer`` renders loaded in a fixed
+        number of queries, however many posts and comments there are: likes,
+        comments and comment authors through prefetches (the counts are
+        columns). With ``comment_limit`` only the latest that many comments
+        of each post are loaded.
+        """
+        comments = Comment.objects.for_display().order_by("date_added", "id")
+        if comment_limit is not None:
+            comments = comments.annotate(
+                recency=Window(
+                    RowNumber(),
+                    partition_by=F("post_id"),
+                    order_by=[F("date_added").desc(), F("id").desc()],
+                )
+            ).filter(recency__lte=comment_limit)
+
+        return self.prefetch_related(
+            Prefetch("likes", queryset=User.objects.only("id")),
+            Prefetch("comments", queryset=comments, to_attr="feed_comments"),
+        )
+
+
+class Post(CounterFieldsMixin, models.Model):
     id = models.AutoField(primary_key=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     title = models.CharField(max_length=255)
@@ -13,12 +59,19 @@ class Post(models.Model):
     likes = models.ManyToManyField(User, related_name="post_likes", blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by buguser.counters, see posts/signals.py
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    objects = PostQuerySet.as_manager()
+
+    counter_fields = ("like_count", "comment_count")
 
     def get_total_likes(self):
-        return self.likes.count()
+        return self.like_count
 
     def get_total_comments(self):
-        return len(self.comments_json)
+        return self.comment_count
 
     def __str__(self):
         return self.title
@@ -27,7 +80,7 @@ class Post(models.Model):
 """ Comment model """
 
 
-class Comment(models.Model):
+class Comment(CounterFieldsMixin, models.Model):
     post = models.ForeignKey(Post, related_name="comments", on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     body = models.TextField(max_length=200)
@@ -36,9 +89,48 @@ class Comment(models.Model):
     reply = models.ForeignKey(
         "self", null=True, related_name="replies", on_delete=models.CASCADE
     )
+    like_count = models.PositiveIntegerField(default=0)
+    # Top-level comment of the thread (itself for top-level comments) and
+    # materialized path, both set once the comment has an id
+    root = models.ForeignKey(
+        "self", null=True, blank=True, related_name="thread", on_delete=models.CASCADE
+    )
+    path = models.CharField(max_length=PATH_MAX_LENGTH, blank=True, default="")
+
+    objects = CommentQuerySet.as_manager()
+
+    counter_fields = ("like_count",)
+
+    class Meta:
+        indexes = [
+            # A thread's replies in depth first order
+            models.Index(fields=["root", "path"], name="comment_thread_path_idx"),
+            # Keyset pages of a post's top-level comments
+            models.Index(
+                fields=["post", "-id"], condition=Q(reply__isnull=True), name="comment_post_roots_idx"
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        if not self.path:
+            self.root_id, self.path = self.id, path_segment(self.id)
+            if self.reply_id:
+                parent = Comment.objects.only("root_id", "path").get(pk=self.reply_id)
+                parent_path = parent.path
+                if len(parent_path) + PATH_STEP > PATH_MAX_LENGTH:
+                    # Too deep: shown as a sibling of its parent
+                    parent_path = parent_path[:-PATH_STEP]
+                self.root_id, self.path = parent.root_id, parent_path + path_segment(self.id)
+            Comment.objects.filter(pk=self.pk).update(root_id=self.root_id, path=self.path)
+
+    @property
+    def depth(self):
+        """0 for top-level comments."""
+        return len(self.path) // PATH_STEP - 1
 
     def total_clikes(self):
-        return self.likes.count()
+        return self.like_count
 
     def __str__(self):
         return "%s - %s - %s" % (self.post.title, self.name, self.id)
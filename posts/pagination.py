@@ -0,0 +1,10 @@
+from rest_framework.pagination import CursorPagination
+
+
+class CommentThreadPagination(CursorPagination):
+    """Keyset pagination over a post's top-level comments, newest first."""
+
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 50
+    ordering = "-id"
@@ -13,6 +13,7 @@ class PostSerializer(serializers.ModelSerializer):
     # post_likes = PostUserSerializer(many=True)
     post_image_url = serializers.SerializerMethodField()
     total_comments = serializers.SerializerMethodField()
+    total_likes = serializers.SerializerMethodField()
     comments = serializers.SerializerMethodField()
 
     class Meta:
@@ -27,6 +28,7 @@ class PostSerializer(serializers.ModelSerializer):
             "updated_at",
             "post_image_url",
             "total_comments",
+            "total_likes",
             "comments",
             # "post_likes",
         ]
@@ -38,6 +40,7 @@ class PostSerializer(serializers.ModelSerializer):
             "updated_at",
             "post_image_url",
             "total_comments",
+            "total_likes",
             "comments",
             # "post_likes",
         ]
@@ -52,10 +55,17 @@ class PostSerializer(serializers.ModelSerializer):
         return None
 
     def get_total_comments(self, obj):
-        return obj.comments.count()
+        return obj.comment_count
 
+    def get_total_likes(self, obj):
+        return obj.like_count
+
+    # Posts from Post.objects.for_feed() carry their comments, anything else
+    # falls back to a query per post
     def get_comments(self, obj):
-        comments = obj.comments.all()
+        comments = getattr(obj, "feed_comments", None)
+        if comments is None:
+            comments = obj.comments.for_display()
         return CommentSerializer(comments, many=True).data
 
 
@@ -96,6 +106,13 @@ class CommentSerializer(serializers.ModelSerializer):
         return comment
 
 
+class ThreadCommentSerializer(CommentSerializer):
+    depth = serializers.IntegerField(read_only=True)
+
+    class Meta(CommentSerializer.Meta):
+        fields = CommentSerializer.Meta.fields + ["root", "depth"]
+
+
 class LikePostSerializer(serializers.Serializer):
     post_id = serializers.IntegerField()
 
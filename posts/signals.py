@@ -0,0 +1,14 @@
+from django.dispatch import Signal
+
+from buguser.counters import count_m2m, count_related
+
+from .models import Comment, Post
+
+post_likes = count_m2m(Post.likes, "like_count")
+comment_likes = count_m2m(Comment.likes, "like_count")
+count_related(Post, "comment_count", Comment, "post")
+
+# Sent after a like toggle commits, with ``instance_id``, ``user_id`` and
+# ``liked``; ``sender`` is Post or Comment. Toggles write the through table
+# directly, so no m2m_changed is sent for them.
+liked = Signal()
@@ -1 +1,329 @@
-# Create your tests here.
+from importlib import import_module
+from io import StringIO
+from unittest import mock
+
+from django.apps import apps
+from django.core.management import call_command
+from django.db.models.query import QuerySet
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from buguser.counters import recount
+from buguser.models import BugUserDetail, User, UserCreationMethod, UserType
+from buguser.testing import FakeRedisTestCase
+
+from .likes import liked_ids, toggle_like
+from .models import PATH_MAX_LENGTH, PATH_STEP, Comment, Post, path_segment
+from .signals import comment_likes, liked, post_likes
+from .threads import first_replies, more_replies
+
+
+def create_users(*names):
+    UserCreationMethod.objects.get_or_create(id=1, defaults={"name": "email"})
+    user_type, _ = UserType.objects.get_or_create(id=2, defaults={"name": "candidate"})
+    return [User.objects.create_user(f"{name}@example.com", True, user_type, password="secret") for name in names]
+
+
+class CounterTests(TestCase):
+    """Counter columns follow likes and comments from either side and are repaired by a recount."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice, cls.bob, cls.carol = create_users("alice", "bob", "carol")
+
+    def setUp(self):
+        self.post = Post.objects.create(user=self.alice, title="Hello", content="...")
+
+    def counts(self, post=None):
+        post = Post.objects.get(pk=(post or self.post).pk)
+        return post.like_count, post.comment_count
+
+    def test_likes_added_and_removed_from_the_post(self):
+        self.post.likes.add(self.alice, self.bob)
+        self.assertEqual(self.counts(), (2, 0))
+
+        # Removing a user who never liked it changes nothing
+        self.post.likes.remove(self.bob, self.carol)
+        self.assertEqual(self.counts(), (1, 0))
+
+        self.post.likes.clear()
+        self.assertEqual(self.counts(), (0, 0))
+
+    def test_likes_added_and_removed_from_the_user(self):
+        other = Post.objects.create(user=self.alice, title="Other", content="...")
+        self.bob.post_likes.add(self.post, other)
+        self.carol.post_likes.add(self.post)
+        self.assertEqual((self.counts(), self.counts(other)), ((2, 0), (1, 0)))
+
+        self.bob.post_likes.remove(self.post)
+        self.assertEqual((self.counts(), self.counts(other)), ((1, 0), (1, 0)))
+
+        self.bob.post_likes.clear()
+        self.assertEqual((self.counts(), self.counts(other)), ((1, 0), (0, 0)))
+
+    def test_comments_are_counted(self):
+        first = Comment.objects.create(post=self.post, user=self.bob, body="First")
+        Comment.objects.create(post=self.post, user=self.carol, body="Second")
+        self.assertEqual(self.counts(), (0, 2))
+
+        first.delete()
+        self.assertEqual(self.counts(), (0, 1))
+
+    def test_saving_a_stale_row_keeps_the_counters(self):
+        stale = Post.objects.get(pk=self.post.pk)
+        self.post.likes.add(self.bob)
+        stale.title = "Renamed"
+        stale.save()
+
+        self.assertEqual(self.counts(), (1, 0))
+        self.assertEqual(Post.objects.get(pk=self.post.pk).title, "Renamed")
+
+    def test_decrement_stops_at_zero(self):
+        comment = Comment.objects.create(post=self.post, user=self.bob, body="First")
+        Post.objects.filter(pk=self.post.pk).update(comment_count=0)
+        comment.delete()
+        self.assertEqual(self.counts(), (0, 0))
+
+    def test_recount_fixes_only_drifted_rows(self):
+        other = Post.objects.create(user=self.alice, title="Other", content="...")
+        self.post.likes.add(self.bob)
+        other.likes.add(self.bob)
+        Post.objects.filter(pk=self.post.pk).update(like_count=7)
+
+        self.assertEqual(recount(post_likes, [other.pk]), 0)
+        self.assertEqual(recount(post_likes), 1)
+        self.assertEqual(self.counts(), (1, 0))
+
+    def test_reconcile_counters_command(self):
+        comment = Comment.objects.create(post=self.post, user=self.bob, body="First")
+        comment.likes.add(self.carol)
+        Post.objects.filter(pk=self.post.pk).update(like_count=3, comment_count=0)
+        Comment.objects.filter(pk=comment.pk).update(like_count=0)
+
+        out = StringIO()
+        call_command("reconcile_counters", "--dry-run", stdout=out)
+        self.assertIn("3 rows across", out.getvalue())
+        self.assertEqual(self.counts(), (3, 0))
+
+        call_command("reconcile_counters", stdout=StringIO())
+        self.assertEqual(self.counts(), (0, 1))
+        self.assertEqual(Comment.objects.get(pk=comment.pk).like_count, 1)
+        self.assertEqual(recount(comment_likes), 0)
+
+
+class BackfillMigrationTests(TestCase):
+    """The data migrations fill the new columns of rows written before them."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice, cls.bob = create_users("alice", "bob")
+
+    def test_counters_are_backfilled(self):
+        post = Post.objects.create(user=self.alice, title="Hello", content="...")
+        empty = Post.objects.create(user=self.alice, title="Empty", content="...")
+        comment = Comment.objects.create(post=post, user=self.bob, body="First")
+        Comment.objects.create(post=post, user=self.alice, body="Second")
+        post.likes.add(self.alice, self.bob)
+        comment.likes.add(self.alice)
+        Post.objects.update(like_count=0, comment_count=5)
+        Comment.objects.update(like_count=0)
+
+        import_module("posts.migrations.0005_comment_like_count_post_comment_count_and_more").backfill_counters(
+            apps, None
+        )
+
+        self.assertEqual(
+            list(Post.objects.order_by("id").values_list("like_count", "comment_count")), [(2, 2), (0, 0)]
+        )
+        self.assertEqual(Comment.objects.get(pk=comment.pk).like_count, 1)
+        self.assertEqual(Post.objects.get(pk=empty.pk).comment_count, 0)
+
+    def test_threads_are_backfilled(self):
+        post = Post.objects.create(user=self.alice, title="Hello", content="...")
+        root = Comment.objects.create(post=post, user=self.alice, body="Root")
+        reply = Comment.objects.create(post=post, user=self.bob, body="Reply", reply=root)
+        nested = Comment.objects.create(post=post, user=self.alice, body="Nested", reply=reply)
+        other = Comment.objects.create(post=post, user=self.bob, body="Other")
+        expected = {
+            comment.pk: (comment.root_id, comment.path)
+            for comment in Comment.objects.filter(pk__in=[root.pk, reply.pk, nested.pk, other.pk])
+        }
+        Comment.objects.update(root=None, path="")
+
+        migration = import_module("posts.migrations.0006_comment_path_comment_root_and_more")
+        migration.backfill_threads(apps, None)
+
+        self.assertEqual({comment.pk: (comment.root_id, comment.path) for comment in Comment.objects.all()}, expected)
+        self.assertEqual(Comment.objects.get(pk=nested.pk).path, "".join(
+            "{:010d}/".format(pk) for pk in (root.pk, reply.pk, nested.pk)
+        ))
+
+
+class LikeToggleTests(FakeRedisTestCase):
+    """A toggle flips one through row, moves the counter by one and announces the change after commit."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice, cls.bob = create_users("alice", "bob")
+
+    def setUp(self):
+        super().setUp()
+        self.post = Post.objects.create(user=self.alice, title="Hello", content="...")
+        self.received = []
+        liked.connect(self.receive)
+        self.addCleanup(liked.disconnect, self.receive)
+
+    def receive(self, sender, **kwargs):
+        self.received.append((sender, kwargs["instance_id"], kwargs["user_id"], kwargs["liked"]))
+
+    def toggle(self, model, pk, user):
+        with self.captureOnCommitCallbacks(execute=True):
+            return toggle_like(model, pk, user)
+
+    def test_like_then_unlike(self):
+        self.assertEqual(self.toggle(Post, self.post.pk, self.bob), (True, 1))
+        self.assertEqual(self.toggle(Post, self.post.pk, self.alice), (True, 2))
+        self.assertEqual(set(self.post.likes.values_list("id", flat=True)), {self.alice.pk, self.bob.pk})
+
+        self.assertEqual(self.toggle(Post, self.post.pk, self.bob), (False, 1))
+        self.assertEqual(list(self.post.likes.values_list("id", flat=True)), [self.alice.pk])
+        self.assertEqual(Post.objects.get(pk=self.post.pk).like_count, 1)
+        self.assertEqual(recount(post_likes), 0)
+        self.assertEqual(self.received, [
+            (Post, self.post.pk, self.bob.pk, True),
+            (Post, self.post.pk, self.alice.pk, True),
+            (Post, self.post.pk, self.bob.pk, False),
+        ])
+
+    def test_comment_likes(self):
+        comment = Comment.objects.create(post=self.post, user=self.alice, body="First")
+        self.assertEqual(self.toggle(Comment, comment.pk, self.bob), (True, 1))
+        self.assertEqual(Post.objects.get(pk=self.post.pk).like_count, 0)
+        self.assertEqual(self.toggle(Comment, comment.pk, self.bob), (False, 0))
+        self.assertEqual(recount(comment_likes), 0)
+
+    def test_signal_waits_for_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            toggle_like(Post, self.post.pk, self.bob)
+        self.assertEqual(self.received, [])
+        self.assertEqual(len(callbacks), 1)
+
+    def test_concurrent_insert_is_absorbed_by_the_savepoint(self):
+        self.post.likes.add(self.bob)
+        # The delete misses the row another request inserted after it looked
+        with mock.patch.object(QuerySet, "delete", return_value=(0, {})):
+            result = self.toggle(Post, self.post.pk, self.bob)
+
+        # Still liked once, counted once, and the transaction carried on
+        self.assertEqual(result, (True, 1))
+        self.assertEqual(self.post.likes.count(), 1)
+        self.assertEqual(self.received, [(Post, self.post.pk, self.bob.pk, True)])
+
+    def test_liked_ids(self):
+        other = Post.objects.create(user=self.alice, title="Other", content="...")
+        self.post.likes.add(self.bob)
+        self.assertEqual(liked_ids(Post, self.bob, [self.post.pk, other.pk]), [self.post.pk])
+        self.assertEqual(liked_ids(Post, self.alice, [self.post.pk, other.pk]), [])
+
+    def test_like_view(self):
+        client = APIClient()
+        client.force_authenticate(self.bob)
+        url = reverse("post-like", args=[self.post.pk])
+
+        self.assertEqual(client.post(url).json()["total_likes"], 1)
+        self.assertEqual(client.post(url).json()["total_likes"], 0)
+        self.assertEqual(client.post(reverse("post-like", args=[self.post.pk + 100])).status_code, 404)
+
+
+class CommentThreadTests(TestCase):
+    """Comments carry their thread root and path, so threads read depth first in a fixed number of queries."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice, cls.bob = create_users("alice", "bob")
+        BugUserDetail.objects.create(user=cls.alice, first_name="Alice", last_name="Smith")
+        cls.post = Post.objects.create(user=cls.alice, title="Hello", content="...")
+
+    def comment(self, body, reply=None):
+        return Comment.objects.create(post=self.post, user=self.alice, body=body, reply=reply)
+
+    def test_paths_and_depths(self):
+        root = self.comment("root")
+        reply = self.comment("reply", root)
+        nested = self.comment("nested", reply)
+
+        self.assertEqual((root.root_id, root.path, root.depth), (root.id, path_segment(root.id), 0))
+        self.assertEqual((reply.root_id, reply.depth), (root.id, 1))
+        nested = Comment.objects.get(pk=nested.pk)
+        self.assertEqual(nested.path, path_segment(root.id) + path_segment(reply.id) + path_segment(nested.id))
+        self.assertEqual((nested.root_id, nested.depth), (root.id, 2))
+
+    def test_paths_stop_growing_at_the_column_length(self):
+        parent = self.comment("0")
+        for level in range(1, PATH_MAX_LENGTH // PATH_STEP + 3):
+            child = self.comment(str(level), parent)
+            self.assertLessEqual(len(child.path), PATH_MAX_LENGTH)
+            parent = child
+
+        deepest = PATH_MAX_LENGTH // PATH_STEP - 1
+        self.assertEqual(parent.depth, deepest)
+        self.assertTrue(parent.path.endswith(path_segment(parent.id)))
+        # Too deep replies sit next to their parent
+        self.assertEqual(parent.path[:-PATH_STEP], Comment.objects.get(pk=parent.reply_id).path[:-PATH_STEP])
+
+    def build_thread(self):
+        """root > (a > (a1, a2 > a21), b); replies added out of display order."""
+        root = self.comment("root")
+        a = self.comment("a", root)
+        b = self.comment("b", root)
+        a2 = self.comment("a2", a)
+        a1 = self.comment("a1", a)
+        a21 = self.comment("a21", a2)
+        return root, [a, a2, a21, a1, b]
+
+    def test_first_replies_are_depth_first(self):
+        root, replies = self.build_thread()
+        other = self.comment("other")
+        single = self.comment("single", other)
+
+        # The replies and their likes prefetch
+        with self.assertNumQueries(2):
+            threads = first_replies([root.id, other.id], 4)
+
+        loaded, count = threads[root.id]
+        self.assertEqual([reply.body for reply in loaded], ["a", "a2", "a21", "a1"])
+        self.assertEqual([reply.depth for reply in loaded], [1, 2, 3, 2])
+        self.assertEqual(count, len(replies))
+        self.assertEqual(([reply.id for reply in threads[other.id][0]], threads[other.id][1]), ([single.id], 1))
+
+    def test_threads_without_replies(self):
+        root = self.comment("root")
+        self.assertEqual(first_replies([root.id], 3), {root.id: ([], 0)})
+
+    def test_more_replies_page_by_path(self):
+        root, replies = self.build_thread()
+        expected = [reply.id for reply in replies]
+
+        seen, after, has_more = [], None, True
+        while has_more:
+            page, has_more = more_replies(root.id, after, 2)
+            seen.extend(reply.id for reply in page)
+            after = page[-1].path
+        self.assertEqual(seen, expected)
+
+    def test_thread_views(self):
+        root, replies = self.build_thread()
+        client = APIClient()
+        client.force_authenticate(self.bob)
+
+        body = client.get(reverse("comment-threads", args=[self.post.id]), {"replies": 2}).json()
+        thread = body["results"][0]
+        self.assertEqual((thread["id"], thread["reply_count"]), (root.id, len(replies)))
+        self.assertEqual(
+            [(reply["id"], reply["depth"]) for reply in thread["replies"]], [(replies[0].id, 1), (replies[1].id, 2)]
+        )
+
+        rest = client.get(thread["more_replies"]).json()
+        self.assertEqual([reply["id"] for reply in rest["results"]], [reply.id for reply in replies[2:]])
+        self.assertIsNone(rest["next"])
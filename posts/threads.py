@@ -0,0 +1,57 @@
+"""
+Threaded comments.
+
+Every comment stores the top-level comment of its thread (``root``) and a
+materialized ``path``, so a page of threads is loaded as one keyset page of
+top-level comments plus a single query for the first replies of all of them,
+whatever the depth of the trees. Replies come depth first, each with its
+``depth``; the rest of a long thread is paged by path.
+"""
+
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+
+from .models import Comment
+
+DEFAULT_REPLIES = 3
+MAX_REPLIES = 20
+
+REPLY_PAGE_SIZE = 20
+MAX_REPLY_PAGE_SIZE = 100
+
+
+def thread_roots(post_id):
+    return Comment.objects.for_display().filter(post_id=post_id, reply__isnull=True)
+
+
+def first_replies(root_ids, limit):
+    """
+    ``{root_id: (replies, reply_count)}`` with the first ``limit`` replies of
+    each thread in depth first order, in one query (plus the likes prefetch).
+    """
+    replies = (
+        Comment.objects.for_display()
+        .filter(root_id__in=root_ids, reply__isnull=False)
+        .annotate(
+            position=Window(RowNumber(), partition_by=F("root_id"), order_by=F("path").asc()),
+            reply_count=Window(Count("id"), partition_by=F("root_id")),
+        )
+        .filter(position__lte=limit)
+        .order_by("root_id", "path")
+    )
+    threads = {root_id: ([], 0) for root_id in root_ids}
+    for reply in replies:
+        loaded, _ = threads[reply.root_id]
+        loaded.append(reply)
+        threads[reply.root_id] = (loaded, reply.reply_count)
+    return threads
+
+
+def more_replies(root_id, after, limit):
+    """The next ``limit`` replies of a thread after path ``after``, and whether there are more."""
+    replies = list(
+        Comment.objects.for_display()
+        .filter(root_id=root_id, reply__isnull=False, path__gt=after or "")
+        .order_by("path")[:limit + 1]
+    )
+    return replies[:limit], len(replies) > limit
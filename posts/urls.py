@@ -7,6 +7,9 @@ from .views import (
     CommentListView,
     CommentLikeView,
     CommentUpdateView,
+    LikedLookupView,
+    CommentThreadListView,
+    CommentThreadRepliesView,
 )
 
 urlpatterns = [
@@ -14,7 +17,10 @@ urlpatterns = [
     path("<int:pk>/", PostDetailView.as_view(), name="post-detail"),
     path("categories/", CategoryListCreateView.as_view(), name="category-list-create"),
     path("<int:post_id>/like/", LikePostView.as_view(), name="post-like"),
+    path("liked/", LikedLookupView.as_view(), name="post-liked"),
     path("comments/<int:post_id>/", CommentListView.as_view(), name="comment-list"),
+    path("<int:post_id>/threads/", CommentThreadListView.as_view(), name="comment-threads"),
+    path("threads/<int:root_id>/replies/", CommentThreadRepliesView.as_view(), name="comment-thread-replies"),
     path(
         "comments/<int:comment_id>/", CommentUpdateView.as_view(), name="comment-update"
     ),
@@ -1,3 +1,4 @@
+from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
@@ -8,14 +9,41 @@ from .serializers import (
     PostSerializer,
     PostCategorySerializer,
     CommentSerializer,
+    ThreadCommentSerializer,
 )
 from .models import Post, PostCategory, Comment
+from .likes import MAX_LIKED_LOOKUP, liked_ids, toggle_like
+from .pagination import CommentThreadPagination
+from .threads import (
+    DEFAULT_REPLIES, MAX_REPLIES, MAX_REPLY_PAGE_SIZE, REPLY_PAGE_SIZE, first_replies, more_replies, thread_roots,
+)
 from buguser.renderers import UserRenderer
 from django.core.paginator import Paginator
+from django.urls import reverse
+from django.utils.http import urlencode
 from rest_framework.exceptions import PermissionDenied, NotFound
 
 # Create your views here.
 
+MAX_FEED_COMMENTS = 50
+
+FEED_PARAMETERS = [
+    openapi.Parameter(
+        "comments",
+        openapi.IN_QUERY,
+        description=f"Embed only the latest N comments of each post (at most {MAX_FEED_COMMENTS})",
+        type=openapi.TYPE_INTEGER,
+    ),
+]
+
+
+def feed_comment_limit(request):
+    """The ``?comments=N`` limit of embedded comments, ``None`` for all of them."""
+    try:
+        return min(max(int(request.query_params["comments"]), 0), MAX_FEED_COMMENTS)
+    except (KeyError, ValueError):
+        return None
+
 
 class PostListCreateView(APIView):
     renderer_classes = [UserRenderer]
@@ -23,10 +51,11 @@ class PostListCreateView(APIView):
 
     @swagger_auto_schema(
         operation_summary="Retrieve all posts of the logged-in user",
+        manual_parameters=FEED_PARAMETERS,
         responses={200: PostSerializer(many=True)},
     )
     def get(self, request, format=None):
-        posts = Post.objects.filter(user=request.user)
+        posts = Post.objects.filter(user=request.user).for_feed(feed_comment_limit(request))
         serializer = PostSerializer(posts, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -47,18 +76,19 @@ class PostDetailView(APIView):
     renderer_classes = [UserRenderer]
     permission_classes = [IsAuthenticated]
 
-    def get_object(self, pk):
-        post = get_object_or_404(Post, pk=pk)
-        if post.user != self.request.user:
+    def get_object(self, pk, queryset=None):
+        post = get_object_or_404(queryset if queryset is not None else Post, pk=pk)
+        if post.user_id != self.request.user.id:
             raise PermissionDenied("You do not have permission to edit this post.")
         return post
 
     @swagger_auto_schema(
         operation_summary="Retrieve a specific post by ID",
+        manual_parameters=FEED_PARAMETERS,
         responses={200: PostSerializer, 404: "Not Found"},
     )
     def get(self, request, pk, format=None):
-        post = self.get_object(pk)
+        post = self.get_object(pk, Post.objects.for_feed(feed_comment_limit(request)))
         serializer = PostSerializer(post)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -117,10 +147,11 @@ class ProfilePostView(APIView):
 
     @swagger_auto_schema(
         operation_summary="Retrieve posts for the logged-in user profile",
+        manual_parameters=FEED_PARAMETERS,
         responses={200: PostSerializer(many=True)},
     )
     def get(self, request, format=None):
-        posts = Post.objects.filter(user=request.user)
+        posts = Post.objects.filter(user=request.user).for_feed(feed_comment_limit(request))
         serializer = PostSerializer(posts, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -149,18 +180,11 @@ class LikePostView(APIView):
     )
     def post(self, request, post_id, format=None):
         try:
-            post = get_object_or_404(Post, id=post_id)
-            user = request.user
-            if user in post.likes.all():
-                post.likes.remove(user)
-                message = "Post unliked."
-            else:
-                post.likes.add(user)
-                message = "Post liked."
-
-            post.save()
+            get_object_or_404(Post.objects.only("id"), id=post_id)
+            liked, total_likes = toggle_like(Post, post_id, request.user)
+            message = "Post liked." if liked else "Post unliked."
             return Response(
-                {"message": message, "total_likes": post.get_total_likes()},
+                {"message": message, "total_likes": total_likes},
                 status=status.HTTP_200_OK,
             )
         except NotFound:
@@ -178,7 +202,7 @@ class CommentListView(APIView):
         responses={200: CommentSerializer(many=True), 404: "Not Found"},
     )
     def get(self, request, post_id, format=None):
-        comments = Comment.objects.filter(post=post_id).order_by("-date_added")
+        comments = Comment.objects.filter(post=post_id).for_display().order_by("-date_added")
         paginator = Paginator(comments, 5)  # Show 5 comments per page
 
         page_number = request.GET.get("page")
@@ -236,15 +260,125 @@ class CommentLikeView(APIView):
         responses={200: "Comment liked/unliked", 404: "Not Found"},
     )
     def post(self, request, comment_id, format=None):
-        comment = get_object_or_404(Comment, id=comment_id)
-        user = request.user
+        get_object_or_404(Comment.objects.only("id"), id=comment_id)
+        liked, total_likes = toggle_like(Comment, comment_id, request.user)
+        message = "Comment liked." if liked else "Comment unliked."
+        return Response({"message": message, "total_likes": total_likes}, status=status.HTTP_200_OK)
+
+
+def parse_ids(value):
+    """Ids from a comma separated query parameter, ignoring anything that is not one."""
+    return [int(part) for part in (value or "").split(",") if part.strip().isdigit()]
+
+
+class LikedLookupView(APIView):
+    renderer_classes = [UserRenderer]
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Which of these posts and comments the logged-in user has liked",
+        manual_parameters=[
+            openapi.Parameter(
+                "posts", openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                description=f"Comma separated post ids (at most {MAX_LIKED_LOOKUP})",
+            ),
+            openapi.Parameter(
+                "comments", openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                description=f"Comma separated comment ids (at most {MAX_LIKED_LOOKUP})",
+            ),
+        ],
+        responses={200: "Liked post and comment ids"},
+    )
+    def get(self, request, format=None):
+        return Response(
+            {
+                "posts": liked_ids(Post, request.user, parse_ids(request.query_params.get("posts"))),
+                "comments": liked_ids(Comment, request.user, parse_ids(request.query_params.get("comments"))),
+            },
+            status=status.HTTP_200_OK,
+        )
 
-        if user in comment.likes.all():
-            comment.likes.remove(user)
-            message = "Comment unliked."
-        else:
-            comment.likes.add(user)
-            message = "Comment liked."
 
-        comment.save()
-        return Response({"message": message}, status=status.HTTP_200_OK)
+def bounded_int(value, default, maximum):
+    try:
+        return min(max(int(value), 1), maximum)
+    except (TypeError, ValueError):
+        return default
+
+
+def more_replies_url(request, root_id, after):
+    url = reverse("comment-thread-replies", args=[root_id])
+    return request.build_absolute_uri(f"{url}?{urlencode({'after': after})}")
+
+
+class CommentThreadListView(APIView):
+    renderer_classes = [UserRenderer]
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Retrieve a page of comment threads of a post",
+        manual_parameters=[
+            openapi.Parameter(
+                "cursor", openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                description="Opaque cursor from a previous response's next/previous",
+            ),
+            openapi.Parameter(
+                "page_size", openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                default=CommentThreadPagination.page_size, description="Threads per page",
+            ),
+            openapi.Parameter(
+                "replies", openapi.IN_QUERY, type=openapi.TYPE_INTEGER, default=DEFAULT_REPLIES,
+                description=f"Replies embedded per thread, depth first (at most {MAX_REPLIES})",
+            ),
+        ],
+        responses={200: "Top-level comments with their first replies", 404: "Not Found"},
+    )
+    def get(self, request, post_id, format=None):
+        get_object_or_404(Post.objects.only("id"), id=post_id)
+        limit = bounded_int(request.query_params.get("replies"), DEFAULT_REPLIES, MAX_REPLIES)
+
+        paginator = CommentThreadPagination()
+        roots = paginator.paginate_queryset(thread_roots(post_id), request, view=self)
+        threads = first_replies([root.id for root in roots], limit)
+
+        results = []
+        for root in roots:
+            replies, reply_count = threads[root.id]
+            thread = ThreadCommentSerializer(root).data
+            thread["reply_count"] = reply_count
+            thread["replies"] = ThreadCommentSerializer(replies, many=True).data
+            thread["more_replies"] = (
+                more_replies_url(request, root.id, replies[-1].path) if reply_count > len(replies) else None
+            )
+            results.append(thread)
+        return paginator.get_paginated_response(results)
+
+
+class CommentThreadRepliesView(APIView):
+    renderer_classes = [UserRenderer]
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="Retrieve more replies of a comment thread, depth first",
+        manual_parameters=[
+            openapi.Parameter(
+                "after", openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                description="Continue after this reply path (from more_replies/next)",
+            ),
+            openapi.Parameter(
+                "page_size", openapi.IN_QUERY, type=openapi.TYPE_INTEGER, default=REPLY_PAGE_SIZE,
+                description=f"Replies per page (at most {MAX_REPLY_PAGE_SIZE})",
+            ),
+        ],
+        responses={200: "Replies of the thread"},
+    )
+    def get(self, request, root_id, format=None):
+        page_size = bounded_int(request.query_params.get("page_size"), REPLY_PAGE_SIZE, MAX_REPLY_PAGE_SIZE)
+        replies, has_more = more_replies(root_id, request.query_params.get("after"), page_size)
+        return Response(
+            {
+                "next": more_replies_url(request, root_id, replies[-1].path) if has_more else None,
+                "results": ThreadCommentSerializer(replies, many=True).data,
+            },
+            status=status.HTTP_200_OK,
+        )
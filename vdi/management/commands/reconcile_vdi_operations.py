@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from vdi.operations import DESCRIBE_BATCH, reconcile_operations
+import time
+
+
+class Command(BaseCommand):
+    help = "Poll EC2 for pending VDI operations and record their outcome (run from cron, or with --interval)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DESCRIBE_BATCH,
+            help="Instances described per describe_instances call",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Keep running and poll every this many seconds",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(options["batch_size"], 1)
+
+        while True:
+            started = time.monotonic()
+            pending, completed = reconcile_operations(batch_size=batch_size)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Completed {completed} of {pending} pending operations in {time.monotonic() - started:.2f}s"
+                )
+            )
+            if options["interval"] <= 0:
+                break
+            time.sleep(options["interval"])
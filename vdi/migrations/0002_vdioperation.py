@@ -0,0 +1,40 @@
+# Generated by Django 5.0.3 on 2026-10-18 13:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("vdi", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VdiOperation",
+            fields=[
+                ("id", models.AutoField(primary_key=True, serialize=False)),
+                ("action", models.CharField(choices=[("create", "Create"), ("stop", "Stop"), ("terminate", "Terminate")], max_length=20)),
+                ("instance_id", models.CharField(max_length=255)),
+                ("target_state", models.CharField(max_length=20)),
+                ("status", models.CharField(choices=[("pending", "Pending"), ("succeeded", "Succeeded"), ("failed", "Failed")], default="pending", max_length=20)),
+                ("error", models.TextField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("completed_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name="vdiinstance",
+            name="instance_termination_time",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="vdiinstance",
+            index=models.Index(fields=["instance_id"], name="vdiinstance_instance_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="vdioperation",
+            index=models.Index(fields=["status", "id"], name="vdioperation_status_idx"),
+        ),
+    ]
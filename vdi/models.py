@@ -17,7 +17,7 @@ class VdiInstance(models.Model):
     instance_vpc_id = models.CharField(max_length=255, null=True, blank=True)
     instance_ami_id = models.CharField(max_length=255, null=True, blank=True)
     instance_launch_time = models.DateTimeField()
-    instance_termination_time = models.DateTimeField()
+    instance_termination_time = models.DateTimeField(null=True, blank=True)
     instance_user_data = models.TextField(null=True, blank=True)
     instance_tags = models.TextField(null=True, blank=True)
     instance_monitoring = models.BooleanField(default=False, null=True, blank=True)
@@ -45,5 +45,52 @@ class VdiInstance(models.Model):
     instance_auto_scaling_group_associations = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # The reconciler matches EC2 descriptions to rows by instance id
+            models.Index(fields=["instance_id"], name="vdiinstance_instance_id_idx"),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class VdiOperation(models.Model):
+    """A create, stop or terminate request, completed by the reconciler (vdi/operations.py)."""
+
+    CREATE = "create"
+    STOP = "stop"
+    TERMINATE = "terminate"
+    ACTION_CHOICES = [
+        (CREATE, "Create"),
+        (STOP, "Stop"),
+        (TERMINATE, "Terminate"),
+    ]
+
+    PENDING = "pending"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    ]
+
+    id = models.AutoField(primary_key=True)
+    action = models.CharField(max_length=20, choices=ACTION_CHOICES)
+    instance_id = models.CharField(max_length=255)
+    # The EC2 state that completes the operation
+    target_state = models.CharField(max_length=20)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "id"], name="vdioperation_status_idx"),
+        ]
+
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return "%s %s (%s)" % (self.action, self.instance_id, self.status)
\ No newline at end of file
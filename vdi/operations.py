@@ -0,0 +1,159 @@
+"""
+Asynchronous VDI lifecycle operations.
+
+The views only ask EC2 to create, stop or terminate an instance, which
+returns at once, and record a pending :class:`~vdi.models.VdiOperation`.
+:func:`reconcile_operations` then polls EC2 for every pending operation
+with one ``describe_instances`` call per ``DESCRIBE_BATCH`` instances,
+copies the reported state onto the ``VdiInstance`` rows with
+``bulk_update`` and completes the operations whose instance reached (or can
+no longer reach) their target state. It runs as a self-rescheduling
+background task while operations are pending (see :mod:`vdi.tasks`) and
+through ``manage.py reconcile_vdi_operations``.
+
+All EC2 calls go through :func:`ec2_client`; wrap that client in a botocore
+``Stubber`` to run the views and the reconciler without AWS.
+"""
+
+import functools
+from datetime import timedelta
+
+import boto3
+from django.db import transaction
+from django.utils import timezone
+
+from .models import VdiInstance, VdiOperation
+
+# AWS Configuration
+AWS_REGION = "ap-south-1"  # Adjust to your region
+AMI_ID = "ami-053284fc22a2c3f82"  # Windows Server 2019 AMI ID
+INSTANCE_TYPE = "t2.micro"
+KEY_NAME = "vdi"
+SECURITY_GROUP_NAME = "launch-wizard-1"  # Use an existing security group
+SECURITY_GROUP_ID = "sg-08ff58819f64a19f7"
+AWS_ACCESS_KEY_ID = ""
+AWS_SECRET_ACCESS_KEY = ""
+
+# Instance ids per describe_instances call (the filter value limit)
+DESCRIBE_BATCH = 200
+# Seconds between polls while operations are pending
+POLL_INTERVAL = 10
+OPERATION_TIMEOUT = timedelta(minutes=20)
+
+TARGET_STATES = {
+    VdiOperation.CREATE: "running",
+    VdiOperation.STOP: "stopped",
+    VdiOperation.TERMINATE: "terminated",
+}
+
+# States from which an instance will not reach the target state by itself
+DEAD_ENDS = {
+    "running": {"shutting-down", "terminated", "stopping", "stopped"},
+    "stopped": {"shutting-down", "terminated"},
+    "terminated": set(),
+}
+
+INSTANCE_FIELDS = [
+    "instance_state",
+    "instance_type",
+    "instance_public_ip",
+    "instance_private_ip",
+    "instance_public_dns",
+    "instance_private_dns",
+    "instance_launch_time",
+    "instance_termination_time",
+    "instance_state_transition_reason",
+    "instance_state_reason",
+]
+
+
+@functools.lru_cache(maxsize=None)
+def ec2_client():
+    return boto3.client(
+        "ec2",
+        aws_access_key_id=AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+        region_name=AWS_REGION,
+    )
+
+
+def start_operation(action, instance_id):
+    """Record a pending operation and make sure the reconciler polls for it."""
+    from .tasks import schedule_poll
+
+    operation = VdiOperation.objects.create(action=action, instance_id=instance_id, target_state=TARGET_STATES[action])
+    transaction.on_commit(schedule_poll)
+    return operation
+
+
+def describe_instances(client, instance_ids):
+    """``{instance_id: description}`` of the ``instance_ids`` EC2 knows about."""
+    described = {}
+    params = {"Filters": [{"Name": "instance-id", "Values": list(instance_ids)}]}
+    while True:
+        response = client.describe_instances(**params)
+        for reservation in response["Reservations"]:
+            for instance in reservation["Instances"]:
+                described[instance["InstanceId"]] = instance
+        if not response.get("NextToken"):
+            return described
+        params["NextToken"] = response["NextToken"]
+
+
+def apply_description(row, instance, now):
+    """Copy an EC2 instance description onto a ``VdiInstance`` row."""
+    state = instance["State"]["Name"]
+    row.instance_state = state
+    row.instance_type = instance.get("InstanceType", row.instance_type)
+    row.instance_public_ip = instance.get("PublicIpAddress")
+    row.instance_private_ip = instance.get("PrivateIpAddress")
+    row.instance_public_dns = instance.get("PublicDnsName") or None
+    row.instance_private_dns = instance.get("PrivateDnsName") or None
+    row.instance_launch_time = instance.get("LaunchTime", row.instance_launch_time)
+    row.instance_state_transition_reason = instance.get("StateTransitionReason") or None
+    row.instance_state_reason = instance.get("StateReason", {}).get("Message")
+    if state == "terminated" and row.instance_termination_time is None:
+        row.instance_termination_time = now
+
+
+def reconcile_operations(client=None, batch_size=DESCRIBE_BATCH):
+    """
+    Poll EC2 for the pending operations and complete the finished ones.
+    Returns ``(pending, completed)`` counts.
+    """
+    client = client or ec2_client()
+    pending = list(VdiOperation.objects.filter(status=VdiOperation.PENDING).order_by("id"))
+    if not pending:
+        return 0, 0
+
+    instance_ids = sorted({operation.instance_id for operation in pending})
+    described = {}
+    for start in range(0, len(instance_ids), batch_size):
+        described.update(describe_instances(client, instance_ids[start:start + batch_size]))
+
+    now = timezone.now()
+    rows = list(VdiInstance.objects.filter(instance_id__in=described))
+    for row in rows:
+        apply_description(row, described[row.instance_id], now)
+    VdiInstance.objects.bulk_update(rows, INSTANCE_FIELDS)
+
+    completed = []
+    for operation in pending:
+        instance = described.get(operation.instance_id)
+        # New instances can be missing from describe_instances for a while
+        state = instance["State"]["Name"] if instance else None
+        if state == operation.target_state:
+            operation.status = VdiOperation.SUCCEEDED
+        elif state in DEAD_ENDS[operation.target_state]:
+            operation.status = VdiOperation.FAILED
+            reason = instance.get("StateReason", {}).get("Message")
+            operation.error = f"Instance is {state}" + (f": {reason}" if reason else "")
+        elif now - operation.created_at > OPERATION_TIMEOUT:
+            operation.status = VdiOperation.FAILED
+            operation.error = f"Instance did not become {operation.target_state} in time (last state: {state})"
+        else:
+            continue
+        operation.completed_at = operation.updated_at = now
+        completed.append(operation)
+    VdiOperation.objects.bulk_update(completed, ["status", "error", "completed_at", "updated_at"])
+    return len(pending), len(completed)
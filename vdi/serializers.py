@@ -0,0 +1,8 @@
+from rest_framework import serializers
+from .models import VdiOperation
+
+
+class VdiOperationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = VdiOperation
+        fields = ["id", "action", "instance_id", "target_state", "status", "error", "created_at", "completed_at"]
@@ -0,0 +1,19 @@
+"""Background tasks of the VDI app, run by ``manage.py run_tasks``."""
+
+from buguser.taskqueue import task
+
+from .operations import POLL_INTERVAL, reconcile_operations
+
+
+@task
+def poll_operations():
+    pending, completed = reconcile_operations()
+    if pending > completed:
+        schedule_poll()
+
+
+def schedule_poll():
+    # The key keeps one poll queued at a time however many operations start.
+    # Delayed, so it is skipped under TASKS_EAGER; reconcile_vdi_operations
+    # polls there instead.
+    poll_operations.schedule(countdown=POLL_INTERVAL, key="vdi:poll", unique_for=POLL_INTERVAL - 1)
@@ -1,3 +1,162 @@
-from django.test import TestCase
+from datetime import datetime, timedelta, timezone as dt_timezone
 
-# Create your tests here.
+from botocore.stub import ANY, Stubber
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import VdiInstance, VdiOperation
+from .operations import ec2_client, reconcile_operations
+
+LAUNCH_TIME = datetime(2024, 10, 1, 9, 30, tzinfo=dt_timezone.utc)
+
+
+def description(instance_id, state, **extra):
+    return {"InstanceId": instance_id, "State": {"Code": 0, "Name": state}, **extra}
+
+
+class VdiOperationTests(TestCase):
+    """Lifecycle requests return at once; the reconciler completes them from one describe_instances call."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.stubber = Stubber(ec2_client())
+        self.stubber.activate()
+        self.addCleanup(self.stubber.deactivate)
+
+    def add_instance(self, instance_id, state="pending"):
+        return VdiInstance.objects.create(name=instance_id, instance_id=instance_id, instance_state=state,
+                                          instance_launch_time=LAUNCH_TIME)
+
+    def expect_describe(self, *instances):
+        self.stubber.add_response(
+            "describe_instances",
+            {"Reservations": [{"Instances": list(instances)}]},
+            {"Filters": [{"Name": "instance-id", "Values": sorted(i["InstanceId"] for i in instances)}]},
+        )
+
+    def test_create_returns_a_pending_operation_without_waiting(self):
+        self.stubber.add_response(
+            "run_instances",
+            {"Instances": [description("i-0001", "pending", LaunchTime=LAUNCH_TIME, PrivateIpAddress="10.0.0.5")]},
+            {
+                "ImageId": ANY, "InstanceType": ANY, "KeyName": ANY, "MinCount": 1, "MaxCount": 1,
+                "SecurityGroupIds": ANY, "TagSpecifications": ANY,
+            },
+        )
+        response = self.client.post(reverse("create_instance"), {"name": "lab"}, format="json")
+
+        self.assertEqual(response.status_code, 202)
+        operation = VdiOperation.objects.get(pk=response.data["operation_id"])
+        self.assertEqual((operation.action, operation.status), (VdiOperation.CREATE, VdiOperation.PENDING))
+        self.assertEqual(VdiInstance.objects.get(instance_id="i-0001").instance_state, "pending")
+        self.stubber.assert_no_pending_responses()
+
+        status_response = self.client.get(reverse("vdi_operation", args=[operation.id]))
+        self.assertEqual(status_response.data["status"], VdiOperation.PENDING)
+        self.assertEqual(status_response.data["instance_state"], "pending")
+
+    def test_stop_records_the_transitional_state(self):
+        self.add_instance("i-0002", "running")
+        self.stubber.add_response(
+            "stop_instances",
+            {"StoppingInstances": [{"InstanceId": "i-0002", "CurrentState": {"Code": 64, "Name": "stopping"}}]},
+            {"InstanceIds": ["i-0002"]},
+        )
+        response = self.client.post(reverse("stop_instance"), {"instance_id": "i-0002"}, format="json")
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(VdiInstance.objects.get(instance_id="i-0002").instance_state, "stopping")
+        self.assertEqual(VdiOperation.objects.get().target_state, "stopped")
+
+    def test_terminate_records_the_transitional_state(self):
+        self.add_instance("i-000a", "running")
+        self.stubber.add_response(
+            "terminate_instances",
+            {"TerminatingInstances": [{"InstanceId": "i-000a", "CurrentState": {"Code": 32, "Name": "shutting-down"}}]},
+            {"InstanceIds": ["i-000a"]},
+        )
+        response = self.client.post(reverse("delete_instance"), {"instance_id": "i-000a"}, format="json")
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(VdiInstance.objects.get(instance_id="i-000a").instance_state, "shutting-down")
+        self.assertEqual(VdiOperation.objects.get().target_state, "terminated")
+
+    def test_reconciler_updates_all_pending_operations_in_one_call(self):
+        for instance_id in ("i-0003", "i-0004", "i-0005"):
+            self.add_instance(instance_id)
+        running = VdiOperation.objects.create(action=VdiOperation.CREATE, instance_id="i-0003", target_state="running")
+        booting = VdiOperation.objects.create(action=VdiOperation.CREATE, instance_id="i-0004", target_state="running")
+        terminated = VdiOperation.objects.create(
+            action=VdiOperation.TERMINATE, instance_id="i-0005", target_state="terminated"
+        )
+        self.expect_describe(
+            description("i-0003", "running", PublicIpAddress="13.0.0.1", PublicDnsName="ec2-13-0-0-1.example"),
+            description("i-0004", "pending"),
+            description("i-0005", "terminated"),
+        )
+
+        with self.assertNumQueries(4):
+            self.assertEqual(reconcile_operations(), (3, 2))
+        self.stubber.assert_no_pending_responses()
+
+        running.refresh_from_db()
+        booting.refresh_from_db()
+        terminated.refresh_from_db()
+        self.assertEqual(running.status, VdiOperation.SUCCEEDED)
+        self.assertEqual(booting.status, VdiOperation.PENDING)
+        self.assertEqual(terminated.status, VdiOperation.SUCCEEDED)
+        self.assertEqual(VdiInstance.objects.get(instance_id="i-0003").instance_public_ip, "13.0.0.1")
+        self.assertIsNotNone(VdiInstance.objects.get(instance_id="i-0005").instance_termination_time)
+
+    def test_reconciler_fails_dead_ends_and_timeouts(self):
+        self.add_instance("i-0006")
+        self.add_instance("i-0007")
+        dead = VdiOperation.objects.create(action=VdiOperation.CREATE, instance_id="i-0006", target_state="running")
+        stale = VdiOperation.objects.create(action=VdiOperation.CREATE, instance_id="i-0007", target_state="running")
+        VdiOperation.objects.filter(pk=stale.pk).update(created_at=timezone.now() - timedelta(hours=1))
+        self.expect_describe(
+            description("i-0006", "terminated", StateReason={"Code": "Server.InternalError", "Message": "boom"}),
+            description("i-0007", "pending"),
+        )
+
+        self.assertEqual(reconcile_operations(), (2, 2))
+
+        dead.refresh_from_db()
+        stale.refresh_from_db()
+        self.assertEqual((dead.status, dead.error), (VdiOperation.FAILED, "Instance is terminated: boom"))
+        self.assertEqual(stale.status, VdiOperation.FAILED)
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_mode_does_not_poll_in_the_request(self):
+        self.stubber.add_response(
+            "run_instances",
+            {"Instances": [description("i-0008", "pending", LaunchTime=LAUNCH_TIME)]},
+            {
+                "ImageId": ANY, "InstanceType": ANY, "KeyName": ANY, "MinCount": 1, "MaxCount": 1,
+                "SecurityGroupIds": ANY, "TagSpecifications": ANY,
+            },
+        )
+        self.add_instance("i-0009", "running")
+        self.stubber.add_response(
+            "stop_instances",
+            {"StoppingInstances": [{"InstanceId": "i-0009", "CurrentState": {"Code": 64, "Name": "stopping"}}]},
+            {"InstanceIds": ["i-0009"]},
+        )
+
+        # A describe_instances call would find no stubbed response; the
+        # failed callback would be logged
+        with self.assertNoLogs(level="ERROR"):
+            with self.captureOnCommitCallbacks(execute=True):
+                created = self.client.post(reverse("create_instance"), {"name": "lab"}, format="json")
+            with self.captureOnCommitCallbacks(execute=True):
+                stopped = self.client.post(reverse("stop_instance"), {"instance_id": "i-0009"}, format="json")
+
+        self.assertEqual((created.status_code, stopped.status_code), (202, 202))
+        self.stubber.assert_no_pending_responses()
+        self.assertEqual(VdiOperation.objects.filter(status=VdiOperation.PENDING).count(), 2)
+
+        # The pending instances are left to reconcile_vdi_operations
+        self.expect_describe(description("i-0008", "pending"), description("i-0009", "stopping"))
+        self.assertEqual(reconcile_operations(), (2, 0))